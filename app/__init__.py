@@ -179,6 +179,23 @@ def create_app(config_name='default'):
     from app.routes.families import bp as families_bp
     app.register_blueprint(families_bp)
     
+    # Register report routes
+    from app.routes.reports import bp as reports_bp
+    app.register_blueprint(reports_bp)
+    
+    # Register statement reconciliation routes
+    from app.routes.reconciliation import bp as reconciliation_bp
+    app.register_blueprint(reconciliation_bp)
+    
+    # Register the read-only JSON API (/api/v1)
+    from app.routes.api import bp as api_bp
+    app.register_blueprint(api_bp)
+    
+    # ========== REGISTER CLI COMMANDS ==========
+    # Maintenance commands (flask check-query-plans, etc.)
+    from app.commands import register_commands
+    register_commands(app)
+    
     # ========== LOGIN MANAGER USER LOADER ==========
     # This tells Flask-Login how to find a user by ID
     # We need to import User here to avoid circular imports
@@ -0,0 +1,597 @@
+"""
+CLI Commands
+
+This module adds custom `flask` commands for maintenance jobs.
+
+Run them with: flask <command>  (FLASK_APP=run.py)
+
+Why a separate module?
+- run.py stays a small entry point
+- Commands are registered in create_app(), so they work with any entry point
+"""
+
+import sys
+import click
+
+
+def register_commands(app):
+    """
+    Register all custom CLI commands on the app
+    
+    Called from create_app().
+    """
+    
+    @app.cli.command('check-query-plans')
+    def check_query_plans_command():
+        """
+        Check that the hot queries use an index (EXPLAIN QUERY PLAN)
+        
+        Exits with status 1 if any query falls back to a table scan,
+        so it can be used as a regression check.
+        """
+        from app.utils.query_plans import check_query_plans
+        
+        results = check_query_plans()
+        for result in results:
+            click.echo(f"[{'OK' if result['ok'] else 'FAIL'}] {result['name']}")
+            for line in result['plan']:
+                click.echo(f"       {line}")
+        
+        failed = [r for r in results if not r['ok']]
+        if failed:
+            click.echo(f"{len(failed)} of {len(results)} queries do not use their index.")
+            sys.exit(1)
+        click.echo(f"All {len(results)} hot queries use an index.")
+
+    @app.cli.command('rebuild-ledger')
+    def rebuild_ledger_command():
+        """
+        Rebuild every student's ledger row from fee_payment
+        
+        Reconciliation: run it after bulk imports or manual SQL fixes.
+        """
+        from app.models import StudentLedger
+        
+        count = StudentLedger.rebuild()
+        click.echo(f"Student ledger rebuilt: {count} students.")
+    
+    @app.cli.command('rollover')
+    @click.option('--to', 'target_year', required=True, help='New academic year name, e.g. 2026-2027')
+    @click.option('--dry-run', is_flag=True, help='Show what would change, then roll everything back')
+    def rollover_command(target_year, dry_run):
+        """
+        Year-end rollover: promote students, clone fees, archive paid fees
+        
+        Everything happens in one transaction.
+        """
+        from app.utils.rollover import rollover, RolloverError
+        
+        try:
+            report = rollover(target_year, dry_run=dry_run)
+        except RolloverError as e:
+            click.echo(f"Rollover not done: {e}")
+            sys.exit(1)
+        
+        click.echo(f"Rollover {report['source_year']} -> {report['target_year']}"
+                   f"{' (DRY RUN - nothing saved)' if report['dry_run'] else ''}")
+        click.echo("Promotions:")
+        for row in report['promotions']:
+            to_class = row['to_class'] or 'graduated'
+            click.echo(f"  {row['from_class']} -> {to_class}: {row['students']} students")
+        click.echo(f"Fee structures cloned: {report['fee_structures_cloned']} "
+                   f"({report['class_links_cloned']} class links, {report['late_fee_rules_cloned']} late fee rules, "
+                   f"{report['installment_plans_cloned']} installment plans)")
+        click.echo(f"Settled payments archived: {report['payments_archived']}")
+    
+    @app.cli.command('archive-year')
+    @click.argument('year_name')
+    def archive_year_command(year_name):
+        """
+        Move a closed academic year's payments into its own archive file
+        
+        The file goes to ARCHIVE_DIR (instance/archive/); summary rows stay
+        behind so balances and yearly totals do not change.
+        """
+        from app.utils.archive import archive_year, ArchiveError
+        
+        try:
+            archived = archive_year(year_name)
+        except ArchiveError as e:
+            click.echo(f"Archive not done: {e}")
+            sys.exit(1)
+        
+        click.echo(f"Archived {year_name} -> {archived.file_name}")
+        click.echo(f"  Payments: {archived.payments_count}, group payments: {archived.group_payments_count}, "
+                   f"receipts: {archived.receipts_count}")
+        click.echo(f"  Total collected: Rs. {archived.total_collected:,.2f}")
+    
+    @app.cli.command('rebuild-cube')
+    def rebuild_cube_command():
+        """
+        Rebuild the collection cube from fee_payment
+        
+        Reconciliation: run it after bulk imports or manual SQL fixes.
+        Archived years keep their cube rows.
+        """
+        from app.models import CollectionCube
+        
+        count = CollectionCube.rebuild()
+        click.echo(f"Collection cube rebuilt: {count} rows.")
+    
+    @app.cli.command('clear-report-cache')
+    def clear_report_cache_command():
+        """
+        Delete every cached report file
+        
+        Not needed after normal edits (data versions invalidate the cache);
+        use it after manual SQL changes or to free disk space.
+        """
+        from app.utils.report_cache import clear
+        
+        click.echo(f"Report cache cleared: {clear()} file(s) deleted.")
+    
+    @app.cli.command('generate-fees')
+    @click.option('--month', required=True, help='Month to generate, e.g. 2025-08')
+    @click.option('--user', 'username', required=True, help='Username recorded as creator of the fee records')
+    @click.option('--dry-run', is_flag=True, help='Show what would be created, then roll everything back')
+    def generate_fees_command(month, username, dry_run):
+        """
+        Create one month's fee records for every active student
+        
+        Recurring fees are created once per month, one-time fees once per
+        year; running it again for the same month creates nothing new.
+        """
+        from datetime import datetime
+        from app.models import User
+        from app.utils.fee_generation import generate_fees, FeeGenerationError
+        
+        try:
+            month_date = datetime.strptime(month, '%Y-%m').date()
+        except ValueError:
+            click.echo("Month must look like 2025-08.")
+            sys.exit(1)
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            click.echo(f"No user named {username}.")
+            sys.exit(1)
+        
+        try:
+            report = generate_fees(month_date, user.id, dry_run=dry_run)
+        except FeeGenerationError as e:
+            click.echo(f"Fees not generated: {e}")
+            sys.exit(1)
+        
+        click.echo(f"Fees for {report['month']}{' (DRY RUN - nothing saved)' if report['dry_run'] else ''}: "
+                   f"{report['fees_created']} created for {report['students']} students, "
+                   f"{report['skipped_existing']} already existed, {report['discounted']} discounted")
+        if report['credit_fees']:
+            click.echo(f"Paid from advance credit: {report['credit_fees']} fee(s), Rs. {report['credit_amount']:,.2f}")
+    
+    @app.cli.command('repair-counters')
+    def repair_counters_command():
+        """
+        Recount the counter cache columns (family sizes, class sizes, group payments)
+        
+        Reconciliation: run it after bulk imports or manual SQL fixes.
+        """
+        from app.models.counters import repair_counters
+        
+        for counter, fixed in repair_counters().items():
+            click.echo(f"{counter}: {fixed} row(s) fixed")
+    
+    @app.cli.command('export-data')
+    @click.argument('name', type=click.Choice(['students', 'payments', 'receipts']))
+    @click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+    @click.option('--output', '-o', default='-', help='File to write (default: standard output)')
+    @click.option('--gzip', 'compress', is_flag=True, help='Gzip the output (automatic for *.gz files)')
+    def export_data_command(name, fmt, output, compress):
+        """
+        Stream a whole table (students, payments or receipts) as NDJSON or CSV
+        
+        Rows are written while they are read, so memory stays flat for any size.
+        Example: flask export-data payments --format csv -o payments.csv.gz
+        """
+        from app.utils.bulk_export import write_export
+        
+        compress = compress or output.endswith('.gz')
+        if output == '-':
+            write_export(name, fmt, sys.stdout.buffer, compress)
+            return
+        with open(output, 'wb') as file:
+            written = write_export(name, fmt, file, compress)
+        click.echo(f"Exported {name} to {output} ({written:,} bytes).")
+    
+    @app.cli.command('analytics-sync')
+    @click.option('--full', is_flag=True, help='Rewrite the whole mirror instead of adding changed rows')
+    def analytics_sync_command(full):
+        """
+        Copy changed rows into the Parquet analytics mirror
+        
+        Run it from cron (e.g. every hour); analytic queries read the mirror.
+        """
+        from app.utils.analytics import AnalyticsError, sync
+        
+        try:
+            report = sync(full=full)
+        except AnalyticsError as e:
+            click.echo(f"Analytics sync not done: {e}")
+            sys.exit(1)
+        
+        for table, rows in report.items():
+            click.echo(f"{table}: {rows} row(s) written")
+    
+    @app.cli.command('reconcile-statement')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--provider', type=click.Choice(['easypaisa', 'jazzcash', 'bank']), required=True)
+    @click.option('--apply', 'apply', is_flag=True, help='Mark the matched payments as verified')
+    def reconcile_statement_command(path, provider, apply):
+        """
+        Match a provider statement (CSV or XLSX) against the recorded payments
+        
+        Prints every line that did not match cleanly and the payments missing from the statement.
+        """
+        from app.utils.reconciliation import MATCHED, ReconciliationError, reconcile
+        
+        try:
+            with open(path, 'rb') as file:
+                report = reconcile(file, path, provider, apply=apply)
+        except ReconciliationError as e:
+            click.echo(f"Reconciliation not done: {e}")
+            sys.exit(1)
+        
+        for row in report['lines']:
+            if row['result'] != MATCHED:
+                click.echo(f"Line {row['line']}: {row['result']} {row.get('transaction_id') or ''} "
+                           f"{row.get('payment_number') or ''} {row['note']}".rstrip())
+        for payment in report['not_on_statement']:
+            click.echo(f"Not on statement: {payment.number} {payment.transaction_id or ''} {payment.date}")
+        click.echo(', '.join(f"{result}: {count}" for result, count in report['summary'].items())
+                   + (' (saved)' if report['applied'] else ''))
+    
+    @app.cli.command('allocate-payment')
+    @click.option('--student', 'student_code', help='Student ID (e.g. SCH-2025-0001) whose fees are paid')
+    @click.option('--family', 'family_code', help='Family code whose fees are paid (all siblings)')
+    @click.option('--amount', required=True, help='Amount received, e.g. 9000')
+    @click.option('--user', 'username', required=True, help='Username recorded as receiver of the payment')
+    @click.option('--method', default='CASH', type=click.Choice(['CASH', 'EASYPAISA', 'JAZZCASH', 'BANK_TRANSFER']))
+    @click.option('--transaction-id', help='Transaction ID (online payments)')
+    @click.option('--account-name', help='Account holder name (online payments)')
+    @click.option('--dry-run', is_flag=True, help='Show the allocation, then roll everything back')
+    def allocate_payment_command(student_code, family_code, amount, username, method, transaction_id,
+                                 account_name, dry_run):
+        """
+        Record one payment and spread it over the oldest open fees
+        
+        One group payment with one receipt; every fee that receives money gets
+        a payment allocation row (its own method and date stay as they were).
+        Anything more than the open fees is kept as advance credit.
+        """
+        from app.models import Family, Student, User
+        from app.utils.allocation import AllocationError, allocate_payment
+        
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            click.echo(f"No user named {username}.")
+            sys.exit(1)
+        
+        student_id = family_id = None
+        if student_code and not family_code:
+            student = Student.query.filter_by(student_id=student_code).first()
+            if not student:
+                click.echo(f"No student with ID {student_code}.")
+                sys.exit(1)
+            student_id = student.id
+        elif family_code and not student_code:
+            family = Family.query.filter_by(family_code=family_code).first()
+            if not family:
+                click.echo(f"No family with code {family_code}.")
+                sys.exit(1)
+            family_id = family.id
+        else:
+            click.echo("Give either --student or --family.")
+            sys.exit(1)
+        
+        try:
+            report = allocate_payment(amount, user.id, student_id=student_id, family_id=family_id,
+                                      payment_method=method, transaction_id=transaction_id,
+                                      account_name=account_name, dry_run=dry_run)
+        except AllocationError as e:
+            click.echo(f"Payment not recorded: {e}")
+            sys.exit(1)
+        
+        for row in report['allocations']:
+            click.echo(f"Fee {row['id']} due {row['due_date']}: +{row['allocated']:,.2f} "
+                       f"({row['paid']:,.2f} of {row['fee_amount']:,.2f}, {row['status']})")
+        if report['credited']:
+            click.echo(f"Advance credit: +{report['credited']:,.2f}")
+        click.echo(f"{report['group_payment_number']} / {report['receipt_number']}: Rs. {report['amount']:,.2f}"
+                   f"{' (DRY RUN - nothing saved)' if report['dry_run'] else ''}")
+    
+    @app.cli.command('set-late-fee-rule')
+    @click.argument('fee_structure_id', type=int)
+    @click.option('--percent', type=str, help='Charge this percentage of the fee, e.g. 5')
+    @click.option('--fixed', type=str, help='Charge this amount, e.g. 200')
+    @click.option('--grace-days', type=int, default=0, help='Days after the due date before charging')
+    @click.option('--monthly/--once', default=False, help='Charge again every month the fee stays open')
+    @click.option('--disable', is_flag=True, help='Stop charging late fees for this fee structure')
+    def set_late_fee_rule_command(fee_structure_id, percent, fixed, grace_days, monthly, disable):
+        """
+        Create, change or disable the late-fee rule of a fee structure
+        """
+        from app import db
+        from app.models import FeeStructure, LateFeeRule
+        from decimal import Decimal, InvalidOperation
+        
+        fee = db.session.get(FeeStructure, fee_structure_id)
+        if not fee:
+            click.echo(f"No fee structure with id {fee_structure_id}.")
+            sys.exit(1)
+        rule = fee.late_fee_rule
+        
+        if disable:
+            if rule:
+                rule.is_active = False
+                db.session.commit()
+            click.echo(f"Late fees disabled for {fee.fee_name}.")
+            return
+        
+        if (percent is None) == (fixed is None):
+            click.echo("Give either --percent or --fixed.")
+            sys.exit(1)
+        try:
+            value = Decimal(percent if percent is not None else fixed)
+        except InvalidOperation:
+            click.echo("The value must be a number.")
+            sys.exit(1)
+        if value <= 0 or grace_days < 0:
+            click.echo("The value must be greater than zero and the grace days not negative.")
+            sys.exit(1)
+        
+        if not rule:
+            rule = LateFeeRule(fee_structure_id=fee.id)
+            db.session.add(rule)
+        rule.rule_type = LateFeeRule.TYPE_PERCENT if percent is not None else LateFeeRule.TYPE_FIXED
+        rule.value = value
+        rule.grace_days = grace_days
+        rule.repeat_monthly = monthly
+        rule.is_active = True
+        db.session.commit()
+        click.echo(f"Late fee for {fee.fee_name}: {rule.value}{'%' if percent is not None else ' Rs.'}, "
+                   f"{rule.grace_days} grace day(s), {'every month' if monthly else 'once'}.")
+    
+    @app.cli.command('apply-late-fees')
+    @click.option('--user', 'username', required=True, help='Username recorded as creator of the surcharge fee records')
+    @click.option('--date', 'as_of', help='Run as of this date, e.g. 2025-08-20 (default: today)')
+    @click.option('--dry-run', is_flag=True, help='Show what would be charged, then roll everything back')
+    def apply_late_fees_command(username, as_of, dry_run):
+        """
+        Charge late fees on every open fee past its due date and grace days
+        
+        Run it daily from cron; a fee is charged at most once per month.
+        Each surcharge is a fee record of its own ("Late Fee"), due on the run date.
+        """
+        from datetime import datetime
+        from app.models import User
+        from app.utils.late_fees import apply_late_fees
+        
+        if as_of:
+            try:
+                as_of = datetime.strptime(as_of, '%Y-%m-%d').date()
+            except ValueError:
+                click.echo("Date must look like 2025-08-20.")
+                sys.exit(1)
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            click.echo(f"No user named {username}.")
+            sys.exit(1)
+        
+        report = apply_late_fees(user.id, as_of, dry_run=dry_run)
+        click.echo(f"Late fees for {report['period']}{' (DRY RUN - nothing saved)' if report['dry_run'] else ''}: "
+                   f"{report['charges']} charge(s), Rs. {report['total']:,.2f}, {report['students']} student(s)")
+        if report['billed_earlier_charges']:
+            click.echo(f"  {report['billed_earlier_charges']} earlier charge(s) billed as fee records")
+    
+    @app.cli.command('add-discount-rule')
+    @click.argument('name')
+    @click.option('--percent', type=str, help='Discount this percentage of the fee, e.g. 10')
+    @click.option('--fixed', type=str, help='Discount this amount, e.g. 500')
+    @click.option('--min-family-size', type=int, help='Only families with at least this many active students')
+    @click.option('--class', 'class_name', help='Only students of this class (class name)')
+    @click.option('--fee-type', help='Only fees of this type, e.g. MONTHLY')
+    @click.option('--student', 'student_code', help='Only this student (student ID), e.g. for a scholarship')
+    def add_discount_rule_command(name, percent, fixed, min_family_size, class_name, fee_type, student_code):
+        """
+        Add a discount rule (sibling discount, scholarship...)
+        
+        Applies to fees generated from now on, and to open fees without a
+        discount when a payment is posted for them.
+        """
+        from app import db
+        from app.models import ClassGrade, DiscountRule, FeeStructure, Student
+        from decimal import Decimal, InvalidOperation
+        
+        if (percent is None) == (fixed is None):
+            click.echo("Give either --percent or --fixed.")
+            sys.exit(1)
+        try:
+            value = Decimal(percent if percent is not None else fixed)
+        except InvalidOperation:
+            click.echo("The value must be a number.")
+            sys.exit(1)
+        if value <= 0 or (percent is not None and value > 100):
+            click.echo("The value must be greater than zero (and at most 100 for a percentage).")
+            sys.exit(1)
+        if fee_type and fee_type not in dict(FeeStructure.FEE_TYPES):
+            click.echo(f"Unknown fee type {fee_type}; use one of: {', '.join(dict(FeeStructure.FEE_TYPES))}.")
+            sys.exit(1)
+        
+        rule = DiscountRule(
+            name=name,
+            rule_type=DiscountRule.TYPE_PERCENT if percent is not None else DiscountRule.TYPE_FIXED,
+            value=value,
+            min_family_size=min_family_size,
+            fee_type=fee_type
+        )
+        if class_name:
+            class_grade = ClassGrade.query.filter_by(class_name=class_name).first()
+            if not class_grade:
+                click.echo(f"No class named {class_name}.")
+                sys.exit(1)
+            rule.class_grade_id = class_grade.id
+        if student_code:
+            student = Student.query.filter_by(student_id=student_code).first()
+            if not student:
+                click.echo(f"No student with ID {student_code}.")
+                sys.exit(1)
+            rule.student_id = student.id
+        
+        db.session.add(rule)
+        db.session.commit()
+        click.echo(f"Discount rule {rule.id} added: {rule.name}.")
+    
+    @app.cli.command('disable-discount-rule')
+    @click.argument('rule_id', type=int)
+    def disable_discount_rule_command(rule_id):
+        """
+        Stop applying a discount rule (discounts already given stay)
+        """
+        from app import db
+        from app.models import DiscountRule
+        
+        rule = db.session.get(DiscountRule, rule_id)
+        if not rule:
+            click.echo(f"No discount rule with id {rule_id}.")
+            sys.exit(1)
+        rule.is_active = False
+        db.session.commit()
+        click.echo(f"Discount rule {rule.id} disabled: {rule.name}.")
+    
+    @app.cli.command('set-installment-plan')
+    @click.argument('fee_structure_id', type=int)
+    @click.option('--part', 'parts', multiple=True, required=True,
+                  help='DATE:PERCENT of one installment, e.g. 2025-04-10:50 (repeat, in order)')
+    def set_installment_plan_command(fee_structure_id, parts):
+        """
+        Split a one-time fee into dated installments
+        
+        Example: flask set-installment-plan 4 --part 2025-04-10:50 --part 2025-07-10:25 --part 2025-10-10:25
+        """
+        from datetime import datetime
+        from decimal import Decimal, InvalidOperation
+        from app.utils.installments import InstallmentError, set_plan
+        
+        schedule = []
+        for part in parts:
+            try:
+                day, percentage = part.split(':')
+                schedule.append((datetime.strptime(day, '%Y-%m-%d').date(), Decimal(percentage)))
+            except (ValueError, InvalidOperation):
+                click.echo(f"Part must look like 2025-04-10:50, not {part}.")
+                sys.exit(1)
+        
+        try:
+            plan = set_plan(fee_structure_id, schedule)
+        except InstallmentError as e:
+            click.echo(f"Plan not saved: {e}")
+            sys.exit(1)
+        
+        for installment in plan.installments:
+            click.echo(f"{installment.name}: {installment.percentage}% due {installment.due_date}")
+    
+    @app.cli.command('generate-installments')
+    @click.option('--user', 'username', required=True, help='Username recorded as creator of the fee records')
+    @click.option('--fee', 'fee_ids', type=int, multiple=True, help='Only the plan of this fee structure (repeatable)')
+    @click.option('--dry-run', is_flag=True, help='Show what would be created, then roll everything back')
+    def generate_installments_command(username, fee_ids, dry_run):
+        """
+        Create every student's installment fee records for the current year's plans
+        
+        Running it again creates only what is missing (new students, new plans).
+        """
+        from app.models import User
+        from app.utils.installments import InstallmentError, generate_installments
+        
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            click.echo(f"No user named {username}.")
+            sys.exit(1)
+        
+        try:
+            report = generate_installments(user.id, fee_structure_ids=fee_ids or None, dry_run=dry_run)
+        except InstallmentError as e:
+            click.echo(f"Installments not generated: {e}")
+            sys.exit(1)
+        
+        click.echo(f"Installments{' (DRY RUN - nothing saved)' if report['dry_run'] else ''}: "
+                   f"{report['installments_created']} created for {report['students']} students "
+                   f"from {report['plans']} plan(s), {report['skipped_existing']} already existed, "
+                   f"{report['discounted']} discounted")
+        if report['credit_fees']:
+            click.echo(f"Paid from advance credit: {report['credit_fees']} installment(s), "
+                       f"Rs. {report['credit_amount']:,.2f}")
+    
+    @app.cli.command('apply-credit')
+    @click.option('--user', 'username', help='Username recorded on the credit entries')
+    @click.option('--dry-run', is_flag=True, help='Show what would be paid, then roll everything back')
+    def apply_credit_command(username, dry_run):
+        """
+        Pay open fees from the advance-payment credit wallets, oldest first
+        
+        Fee generation does this by itself; run it after adding fees by hand.
+        """
+        from app import db
+        from app.models import User
+        from app.utils.credit import apply_credit
+        
+        user_id = None
+        if username:
+            user = User.query.filter_by(username=username).first()
+            if not user:
+                click.echo(f"No user named {username}.")
+                sys.exit(1)
+            user_id = user.id
+        
+        try:
+            report = apply_credit(user_id)
+            if dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        click.echo(f"Advance credit{' (DRY RUN - nothing saved)' if dry_run else ''}: "
+                   f"{report['fees_paid']} fee(s) of {report['students']} student(s) paid, "
+                   f"Rs. {report['amount']:,.2f} from {report['wallets']} wallet(s)")
+    
+    @app.cli.command('forecast-collections')
+    @click.option('--months', type=int, default=6, help='Months to forecast (until the academic year ends)')
+    @click.option('--as-of', help='Run date, e.g. 2025-08-15 (defaults to today)')
+    def forecast_collections_command(months, as_of):
+        """
+        Expected collections of the coming months, per class
+        
+        Charges (enrolment x fee amounts) times each class's payment rate.
+        """
+        from datetime import datetime
+        from app.utils.forecast import cash_flow_forecast
+        
+        try:
+            as_of = datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else None
+        except ValueError:
+            click.echo("Date must look like 2025-08-15.")
+            sys.exit(1)
+        
+        report = cash_flow_forecast(as_of, months=months)
+        if not report['months']:
+            click.echo("No months left to forecast in this academic year.")
+            return
+        
+        click.echo(f"{'Class':<20} {'Rate':>6} " + ' '.join(f"{month:>12}" for month in report['months']))
+        for row in report['rows']:
+            click.echo(f"{row['class_name'][:20]:<20} {row['payment_rate']:>6.0%} "
+                       + ' '.join(f"{value:>12,.0f}" for value in row['expected']))
+        click.echo(f"{'Expected':<20} {'':>6} " + ' '.join(f"{value:>12,.0f}" for value in report['expected']))
+        click.echo(f"{'Charged':<20} {'':>6} " + ' '.join(f"{value:>12,.0f}" for value in report['charges']))
+        click.echo(f"Total expected: Rs. {report['total_expected']:,.2f} of Rs. {report['total_charges']:,.2f} charged")
@@ -123,7 +123,7 @@ class StudentForm(FlaskForm):
     is_active = SelectField(
         'Status',
         choices=[(True, 'Active'), (False, 'Inactive')],
-        coerce=lambda x: x == 'True',
+        coerce=lambda x: x in (True, 'True'),  # choices are compared after coercion too
         default=True
     )
     
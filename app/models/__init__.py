@@ -27,9 +27,21 @@ from app.models.family import Family
 # Models that depend on base models
 from app.models.student import Student
 from app.models.fee_structure import FeeStructure, fee_structure_classes
+from app.models.discount_rule import DiscountRule
+from app.models.installment_plan import InstallmentPlan, FeeInstallment
 from app.models.fee_payment import FeePayment
 from app.models.group_payment import GroupPayment
 from app.models.payment_receipt import PaymentReceipt
+from app.models.payment_allocation import PaymentAllocation
+from app.models.late_fee import LateFeeRule, LateFeeCharge
+from app.models.credit_wallet import CreditWallet, CreditEntry
+from app.models.archived_year import ArchivedYear, ArchivedStudentYear
+from app.models.student_ledger import StudentLedger
+from app.models.collection_cube import CollectionCube
+from app.models.data_version import DataVersion
+
+# Event listeners that keep the counter cache columns exact
+from app.models import counters
 
 # Export all models
 # This ensures all tables are registered with SQLAlchemy
@@ -43,7 +55,20 @@ __all__ = [
     'Student',
     'FeeStructure',
     'fee_structure_classes',  # Junction table
+    'DiscountRule',
+    'InstallmentPlan',
+    'FeeInstallment',
     'FeePayment',
     'GroupPayment',
-    'PaymentReceipt'
+    'PaymentReceipt',
+    'PaymentAllocation',
+    'LateFeeRule',
+    'LateFeeCharge',
+    'CreditWallet',
+    'CreditEntry',
+    'ArchivedYear',
+    'ArchivedStudentYear',
+    'StudentLedger',
+    'CollectionCube',
+    'DataVersion'
 ]
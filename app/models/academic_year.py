@@ -16,6 +16,7 @@ Without Academic Year, we can't distinguish between these!
 """
 
 from app import db
+from app.utils.query_cache import cached_query
 from datetime import datetime, date
 
 
@@ -65,27 +66,43 @@ class AcademicYear(db.Model):
     
     @staticmethod
     def get_current():
-        """Get the current academic year"""
-        return AcademicYear.query.filter_by(is_current=True).first()
+        """
+        Get the current academic year
+        
+        Cached until an academic year is changed (see app/utils/query_cache.py)
+        """
+        return cached_query(
+            'academic_year:current',
+            ['academic_year'],
+            lambda: AcademicYear.query.filter_by(is_current=True).first()
+        )
     
     @staticmethod
-    def set_current(year_id):
+    def set_current(year_id, commit=True):
         """
         Set an academic year as current
         
         This automatically unsets any other current year.
         Only one year can be current at a time.
+        
+        Parameters:
+        commit: Set to False to leave the change in the caller's transaction
         """
-        # Unset all current years
-        AcademicYear.query.update({'is_current': False})
+        year = db.session.get(AcademicYear, year_id)
+        if not year:
+            return False
+        
+        # Unset the other current year(s) - only rows that are actually current
+        AcademicYear.query.filter(
+            AcademicYear.is_current == True,
+            AcademicYear.id != year_id
+        ).update({'is_current': False}, synchronize_session=False)
         
         # Set the specified year as current
-        year = AcademicYear.query.get(year_id)
-        if year:
-            year.is_current = True
+        year.is_current = True
+        if commit:
             db.session.commit()
-            return True
-        return False
+        return True
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -0,0 +1,136 @@
+"""
+Archived Year Models
+
+These are the compact rows left behind when a closed academic year is
+moved to cold storage (flask archive-year YEAR).
+
+Why these models?
+- Old payments and receipts are moved out of fms.db into one SQLite file
+  per year (instance/archive/), so the live database stays small
+- Totals must not disappear with them: a student's ledger and the yearly
+  reports still need what was charged and paid in archived years
+- These small tables keep exactly that, so the archive file is only
+  opened when someone asks for the individual payments
+
+Example:
+- 2024-2025 archived: 9,840 payments -> instance/archive/fms_2024-2025.db
+- Left behind: one ArchivedYear row + one ArchivedStudentYear row per student
+"""
+
+from app import db
+from app.utils.money import Money, to_decimal
+from datetime import datetime
+import os
+
+
+class ArchivedYear(db.Model):
+    """
+    Archived Year Model
+    
+    One row per academic year whose payments were moved to an archive file.
+    
+    Table name: archived_year
+    """
+    
+    __tablename__ = 'archived_year'
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Academic Year (Primary Key + Foreign Key): a year is archived once
+    academic_year_id = db.Column(db.Integer, db.ForeignKey('academic_year.id', ondelete='RESTRICT'), primary_key=True)
+    
+    # Archive file name (inside the ARCHIVE_DIR folder)
+    file_name = db.Column(db.String(255), nullable=False, unique=True)
+    
+    # What was moved
+    payments_count = db.Column(db.Integer, nullable=False, default=0)
+    group_payments_count = db.Column(db.Integer, nullable=False, default=0)
+    receipts_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Total money received in the archived year (exact, see app/utils/money.py)
+    total_collected = db.Column(Money, nullable=False, default=0)
+    
+    # Timestamps
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # ========== RELATIONSHIPS ==========
+    academic_year = db.relationship('AcademicYear', backref=db.backref('archive', uselist=False))
+    
+    # ========== METHODS ==========
+    
+    def file_path(self, archive_dir):
+        """Full path of the archive file"""
+        return os.path.join(archive_dir, self.file_name)
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<ArchivedYear {self.academic_year_id} - {self.file_name}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'academic_year_id': self.academic_year_id,
+            'year_name': self.academic_year.year_name if self.academic_year else None,
+            'file_name': self.file_name,
+            'payments_count': self.payments_count,
+            'group_payments_count': self.group_payments_count,
+            'receipts_count': self.receipts_count,
+            'total_collected': to_decimal(self.total_collected),
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+
+class ArchivedStudentYear(db.Model):
+    """
+    Archived Student Year Model
+    
+    One row per student per archived year: what the student was charged
+    and paid in that year. StudentLedger adds these to the live payments,
+    so lifetime balances stay the same after archiving.
+    
+    Table name: archived_student_year
+    """
+    
+    __tablename__ = 'archived_student_year'
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Student + Academic Year (composite Primary Key)
+    # student_id comes first so ledger lookups for one student use the key
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), primary_key=True)
+    academic_year_id = db.Column(db.Integer, db.ForeignKey('archived_year.academic_year_id', ondelete='CASCADE'), primary_key=True)
+    
+    # Number of fee records moved to the archive
+    fees_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Money columns (integer paisa, read back as Decimal)
+    total_charged = db.Column(Money, nullable=False, default=0)
+    total_paid = db.Column(Money, nullable=False, default=0)
+    
+    # Date of the student's latest payment in that year
+    last_payment_date = db.Column(db.Date, nullable=True)
+    
+    # ========== METHODS ==========
+    
+    @staticmethod
+    def years_for_student(student_id):
+        """Academic year ids that have archived payments for a student"""
+        return db.session.execute(
+            db.select(ArchivedStudentYear.academic_year_id)
+            .where(ArchivedStudentYear.student_id == student_id)
+        ).scalars().all()
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<ArchivedStudentYear student={self.student_id} year={self.academic_year_id}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'student_id': self.student_id,
+            'academic_year_id': self.academic_year_id,
+            'fees_count': self.fees_count,
+            'total_charged': to_decimal(self.total_charged),
+            'total_paid': to_decimal(self.total_paid),
+            'last_payment_date': self.last_payment_date.isoformat() if self.last_payment_date else None
+        }
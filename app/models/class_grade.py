@@ -13,6 +13,7 @@ Example: Class 1, Class 2, Class 3... or Grade 1, Grade 2...
 """
 
 from app import db
+from app.utils.query_cache import cached_query
 from datetime import datetime
 
 
@@ -48,6 +49,9 @@ class ClassGrade(db.Model):
     # Active status: Can deactivate a class without deleting it
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     
+    # Number of active students in the class (counter cache, see app/models/counters.py)
+    active_students = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
@@ -70,6 +74,19 @@ class ClassGrade(db.Model):
     
     # ========== METHODS ==========
     
+    @staticmethod
+    def get_active():
+        """
+        Active classes in order (for dropdowns and class filters)
+        
+        Cached until a class is changed (see app/utils/query_cache.py)
+        """
+        return cached_query(
+            'class_grade:active',
+            ['class_grade'],
+            lambda: ClassGrade.query.filter_by(is_active=True).order_by(ClassGrade.order).all()
+        )
+    
     def __repr__(self):
         """String representation for debugging"""
         return f'<ClassGrade {self.class_name}>'
@@ -81,5 +98,6 @@ class ClassGrade(db.Model):
             'class_name': self.class_name,
             'class_code': self.class_code,
             'order': self.order,
-            'is_active': self.is_active
+            'is_active': self.is_active,
+            'active_students': self.active_students
         }
@@ -0,0 +1,340 @@
+"""
+Collection Cube Model
+
+This keeps pre-added totals of what was charged and collected, one row per
+(academic year, class, month, fee type, payment method).
+
+Why this model?
+- Class-wise and month-wise collection views, dashboards and revenue
+  charts all need the same totals
+- Adding them up from fee_payment means reading every payment of the year
+- The cube has a few hundred rows per year, so those pages read a handful
+  of small rows instead
+
+What the dimensions mean:
+- month: the month the fee is due in (due_date), as "YYYY-MM"
+- class_grade_id: the class the fee was charged to (fee_payment.class_grade_id,
+  NULL for students without a class); promoting a student does not move
+  their old fees
+
+How is it kept up to date?
+- Every flush that writes a FeePayment (or changes a fee amount) marks
+  the affected (year, class, month) cells as dirty; after the flush those cells are recomputed in the same
+  transaction, like StudentLedger
+- Bulk jobs that write with Core (fee generation, payment allocation) call
+  CollectionCube.refresh_where() for the rows they wrote
+- `flask rebuild-cube` rebuilds it from fee_payment
+
+Archived years (flask archive-year) keep their cube rows: the rebuild
+only touches years whose payments are still in fee_payment.
+"""
+
+from app import db
+from app.models.fee_payment import FeePayment
+from app.models.fee_structure import FeeStructure
+from app.models.payment_allocation import PaymentAllocation
+from app.utils.money import Money, paisa, to_decimal
+from datetime import date, datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+class CollectionCube(db.Model):
+    """
+    Collection Cube Model
+    
+    One row per (academic year, class, month, fee type, payment method).
+    All values are derived from fee_payment and payment_allocation, never edited by hand.
+    
+    Table name: collection_cube
+    """
+    
+    __tablename__ = 'collection_cube'
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Dimensions
+    academic_year_id = db.Column(db.Integer, db.ForeignKey('academic_year.id', ondelete='CASCADE'), nullable=False)
+    class_grade_id = db.Column(db.Integer, db.ForeignKey('class_grade.id', ondelete='SET NULL'), nullable=True)
+    month = db.Column(db.String(7), nullable=False)
+    fee_type = db.Column(db.String(50), nullable=False)
+    payment_method = db.Column(db.String(20), nullable=False)
+    
+    # Measures (money as integer paisa, read back as Decimal)
+    fees_count = db.Column(db.Integer, nullable=False, default=0)
+    charged = db.Column(Money, nullable=False, default=0)
+    collected = db.Column(Money, nullable=False, default=0)
+    paid_count = db.Column(db.Integer, nullable=False, default=0)
+    # Fees paid in full on or before their due date
+    on_time_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # A cell is refreshed by (year, class, month); reads filter by year
+    __table_args__ = (
+        db.UniqueConstraint('academic_year_id', 'class_grade_id', 'month', 'fee_type', 'payment_method',
+                            name='uq_collection_cube_cell'),
+    )
+    
+    MEASURES = ['fees_count', 'charged', 'collected', 'paid_count', 'on_time_count']
+    
+    # ========== METHODS ==========
+    
+    @staticmethod
+    def _cells_select(where):
+        """
+        Build the SELECT that computes cube rows for the fee payments matching `where`
+        
+        One grouped query over two kinds of rows, so collected money lands
+        under the method it was received by: the fee rows (counts, charged,
+        money paid on the row itself) and their PaymentAllocation rows
+        (money from lump-sum payments, with the allocation's method).
+        Amounts are added up as integer paisa.
+        """
+        month = db.func.substr(db.cast(FeePayment.due_date, db.String), 1, 7)
+        direct = paisa(FeePayment.amount) - paisa(FeePayment.allocated)
+        is_paid = FeePayment.status == FeePayment.STATUS_PAID
+        dimensions = [
+            FeeStructure.academic_year_id.label('academic_year_id'),
+            FeePayment.class_grade_id.label('class_grade_id'),
+            month.label('month'),
+            FeeStructure.fee_type.label('fee_type')
+        ]
+        
+        fee_rows = db.select(
+            *dimensions,
+            FeePayment.payment_method.label('payment_method'),
+            db.literal(1).label('fees_count'),
+            FeePayment.charged_paisa().label('charged'),
+            db.case((direct > 0, direct), else_=0).label('collected'),
+            db.case((is_paid, 1), else_=0).label('paid_count'),
+            db.case((db.and_(is_paid, FeePayment.payment_date <= FeePayment.due_date), 1), else_=0).label('on_time_count')
+        ).join(
+            FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+        ).where(where)
+        
+        allocation_rows = db.select(
+            *dimensions,
+            PaymentAllocation.payment_method,
+            db.literal(0),
+            db.literal(0),
+            db.type_coerce(PaymentAllocation.amount, db.BigInteger),  # Money: paisa already
+            db.literal(0),
+            db.literal(0)
+        ).select_from(PaymentAllocation).join(
+            FeePayment, FeePayment.id == PaymentAllocation.fee_payment_id
+        ).join(
+            FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+        ).where(where)
+        
+        rows = db.union_all(fee_rows, allocation_rows).subquery('cube_rows')
+        keys = [rows.c.academic_year_id, rows.c.class_grade_id, rows.c.month, rows.c.fee_type, rows.c.payment_method]
+        return db.select(
+            *keys,
+            *[db.func.sum(rows.c[name]) for name in CollectionCube.MEASURES],
+            db.literal(datetime.utcnow())
+        ).group_by(*keys)
+    
+    @staticmethod
+    def _insert_cells(connection, where):
+        """Insert the computed cube rows for the fee payments matching `where`"""
+        insert = CollectionCube.__table__.insert().from_select(
+            ['academic_year_id', 'class_grade_id', 'month', 'fee_type', 'payment_method']
+            + CollectionCube.MEASURES + ['updated_at'],
+            CollectionCube._cells_select(where)
+        )
+        return connection.execute(insert).rowcount
+    
+    @staticmethod
+    def refresh(cells, connection=None):
+        """
+        Recompute cube cells
+        
+        Parameters:
+        cells: Iterable of (academic_year_id, class_grade_id, month "YYYY-MM")
+        connection: Connection to use (defaults to the current session's)
+        
+        Returns:
+        Number of cube rows written
+        """
+        if connection is None:
+            connection = db.session.connection()
+        
+        table = CollectionCube.__table__
+        written = 0
+        for year_id, class_id, month in set(cells):
+            first_day = date(int(month[:4]), int(month[5:7]), 1)
+            next_month = date(first_day.year + first_day.month // 12, first_day.month % 12 + 1, 1)
+            
+            in_class = table.c.class_grade_id.is_(None) if class_id is None else table.c.class_grade_id == class_id
+            connection.execute(table.delete().where(
+                table.c.academic_year_id == year_id, in_class, table.c.month == month
+            ))
+            
+            fee_in_class = FeePayment.class_grade_id.is_(None) if class_id is None else FeePayment.class_grade_id == class_id
+            written += CollectionCube._insert_cells(connection, db.and_(
+                FeeStructure.academic_year_id == year_id,
+                fee_in_class,
+                FeePayment.due_date >= first_day,
+                FeePayment.due_date < next_month
+            ))
+        return written
+    
+    @staticmethod
+    def cells_for(where, connection=None):
+        """The (year, class, month) cells of the fee payments matching `where`"""
+        if connection is None:
+            connection = db.session.connection()
+        month = db.func.substr(db.cast(FeePayment.due_date, db.String), 1, 7)
+        return set(connection.execute(
+            db.select(FeeStructure.academic_year_id, FeePayment.class_grade_id, month).distinct()
+            .join(FeeStructure, FeeStructure.id == FeePayment.fee_structure_id)
+            .where(where)
+        ).all())
+    
+    @staticmethod
+    def refresh_where(where, connection=None):
+        """
+        Recompute the cells of the fee payments matching `where`
+        
+        For bulk jobs that insert or update fee payments with Core
+        (e.g. fee generation): call it after the write, in the same transaction.
+        """
+        if connection is None:
+            connection = db.session.connection()
+        return CollectionCube.refresh(CollectionCube.cells_for(where, connection), connection)
+    
+    @staticmethod
+    def rebuild():
+        """
+        Rebuild the cube from fee_payment and commit
+        
+        Years that were archived keep their rows (their payments are no
+        longer in fee_payment). Used by `flask rebuild-cube`.
+        """
+        from app.models.archived_year import ArchivedYear
+        
+        table = CollectionCube.__table__
+        archived_years = db.select(ArchivedYear.academic_year_id)
+        db.session.execute(table.delete().where(table.c.academic_year_id.not_in(archived_years)))
+        count = CollectionCube._insert_cells(
+            db.session.connection(), FeeStructure.academic_year_id.not_in(archived_years)
+        )
+        db.session.commit()
+        return count
+    
+    @staticmethod
+    def totals(academic_year_id, group_by=('class_grade_id', 'month')):
+        """
+        Add up the cube for one year by the given dimensions
+        
+        Parameters:
+        academic_year_id: Year to read
+        group_by: Dimension column names, e.g. ('month',) or ('class_grade_id', 'month')
+        
+        Returns:
+        List of dictionaries: the dimensions plus every measure (money as Decimal)
+        """
+        table = CollectionCube.__table__
+        dimensions = [table.c[name] for name in group_by]
+        measures = [
+            db.type_coerce(db.func.sum(table.c[name]), table.c[name].type).label(name)
+            for name in CollectionCube.MEASURES
+        ]
+        rows = db.session.execute(
+            db.select(*dimensions, *measures)
+            .where(table.c.academic_year_id == academic_year_id)
+            .group_by(*dimensions)
+            .order_by(*dimensions)
+        ).mappings().all()
+        return [dict(row) for row in rows]
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<CollectionCube {self.academic_year_id}/{self.class_grade_id}/{self.month} {self.fee_type} {self.payment_method}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'academic_year_id': self.academic_year_id,
+            'class_grade_id': self.class_grade_id,
+            'month': self.month,
+            'fee_type': self.fee_type,
+            'payment_method': self.payment_method,
+            'fees_count': self.fees_count,
+            'charged': to_decimal(self.charged),
+            'collected': to_decimal(self.collected),
+            'paid_count': self.paid_count,
+            'on_time_count': self.on_time_count
+        }
+
+
+# ========== EVENT LISTENERS ==========
+# Remember what changed during the flush; recompute the cells after it
+
+def _pending(session):
+    """What to recompute after the current flush"""
+    return session.info.setdefault('cube_pending', {
+        'payments': set(),       # (class_grade_id, fee_structure_id, due_date)
+        'fee_structures': set()
+    })
+
+
+def _old_and_new(history, current):
+    """Values an attribute had before and after the flush"""
+    return set(history.deleted) | {current}
+
+
+@event.listens_for(FeePayment, 'after_insert')
+@event.listens_for(FeePayment, 'after_update')
+@event.listens_for(FeePayment, 'after_delete')
+def mark_cube_dirty(mapper, connection, target):
+    """A written payment changes the cell it is in (and the one it left)"""
+    session = Session.object_session(target)
+    if session is None:
+        return
+    state = inspect(target)
+    payments = _pending(session)['payments']
+    for class_id in _old_and_new(state.attrs.class_grade_id.history, target.class_grade_id):
+        for fee_structure_id in _old_and_new(state.attrs.fee_structure_id.history, target.fee_structure_id):
+            for due_date in _old_and_new(state.attrs.due_date.history, target.due_date):
+                payments.add((class_id, fee_structure_id, due_date))
+
+
+@event.listens_for(FeeStructure, 'after_update')
+def mark_cube_dirty_on_fee_change(mapper, connection, target):
+    """A changed fee amount or type changes every cell the fee is charged in"""
+    state = inspect(target)
+    if state.attrs.amount.history.has_changes() or state.attrs.fee_type.history.has_changes():
+        session = Session.object_session(target)
+        if session is not None:
+            _pending(session)['fee_structures'].add(target.id)
+
+
+@event.listens_for(Session, 'after_flush')
+def refresh_dirty_cube_cells(session, flush_context):
+    """Recompute the cube cells touched by this flush (same transaction)"""
+    pending = session.info.pop('cube_pending', None)
+    if not pending:
+        return
+    connection = session.connection()
+    cells = set()
+    
+    if pending['payments']:
+        fee_ids = {fee_id for _, fee_id, _ in pending['payments']}
+        years = dict(connection.execute(
+            db.select(FeeStructure.id, FeeStructure.academic_year_id).where(FeeStructure.id.in_(fee_ids))
+        ).all())
+        for class_id, fee_id, due_date in pending['payments']:
+            if fee_id in years and due_date is not None:
+                cells.add((years[fee_id], class_id, due_date.strftime('%Y-%m')))
+    
+    if pending['fee_structures']:
+        cells |= CollectionCube.cells_for(FeePayment.fee_structure_id.in_(pending['fee_structures']), connection)
+    
+    if cells:
+        CollectionCube.refresh(cells, connection)
@@ -0,0 +1,218 @@
+"""
+Counter Cache Columns
+
+This keeps three count columns exact, so listings never run a COUNT(*)
+per row:
+- family.students_count: students in the family
+- class_grade.active_students: active students in the class
+- group_payment.students_count: fee payments in the group payment (linked
+  to it, or paid by it through a PaymentAllocation)
+
+Why counter columns?
+- Family.to_dict() called self.students.count(): one query per family,
+  so a list of 500 families cost 500 extra queries
+- Dashboards showing class sizes would do the same per class
+
+How are they kept exact?
+- Every flush that inserts, deletes or moves a Student (family, class,
+  active flag) or a FeePayment (group payment) marks the affected
+  families / classes / group payments
+- After the flush they are recounted with one UPDATE per counter, in the
+  same transaction (a recount, not +1/-1, so it cannot drift)
+- Bulk jobs that bypass the ORM (rollover) call refresh_counters()
+- `flask repair-counters` recounts everything and reports what was wrong
+"""
+
+from app import db
+from app.models.class_grade import ClassGrade
+from app.models.data_version import DataVersion
+from app.models.family import Family
+from app.models.fee_payment import FeePayment
+from app.models.group_payment import GroupPayment
+from app.models.payment_allocation import PaymentAllocation
+from app.models.student import Student
+from app.utils.query_cache import mark_written
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+def _family_count():
+    """Students in the family (correlated to the family row being updated)"""
+    return db.select(db.func.count(Student.id)).where(
+        Student.family_id == Family.id
+    ).scalar_subquery()
+
+
+def _class_count():
+    """Active students in the class"""
+    return db.select(db.func.count(Student.id)).where(
+        Student.class_grade_id == ClassGrade.id,
+        Student.is_active == True
+    ).scalar_subquery()
+
+
+def _group_count():
+    """Fee payments in the group payment (linked to it or paid by one of its allocations)"""
+    # Correlated two levels down (auto-correlation only reaches one)
+    allocated = db.select(PaymentAllocation.fee_payment_id).where(
+        PaymentAllocation.group_payment_id == GroupPayment.id
+    ).correlate(GroupPayment)
+    return db.select(db.func.count(FeePayment.id)).where(
+        db.or_(FeePayment.group_payment_id == GroupPayment.id, FeePayment.id.in_(allocated))
+    ).scalar_subquery()
+
+
+# Counter column -> its correct value
+COUNTERS = [
+    (Family.students_count, _family_count),
+    (ClassGrade.active_students, _class_count),
+    (GroupPayment.students_count, _group_count),
+]
+
+
+def _recount(column, count, ids, connection, only_wrong=False):
+    """
+    Set a counter column to its correct value in one UPDATE
+    
+    Parameters:
+    ids: Rows to recount (None = every row)
+    only_wrong: Only touch rows whose value is wrong (for the repair report)
+    
+    Returns:
+    Number of rows updated
+    """
+    table = column.table
+    statement = table.update().values({column.name: count()})
+    if ids is not None:
+        statement = statement.where(table.c.id.in_(ids))
+    if only_wrong:
+        statement = statement.where(column != count())
+    return connection.execute(statement).rowcount
+
+
+def refresh_counters(family_ids=None, class_ids=None, group_payment_ids=None, session=None):
+    """
+    Recount the given rows (None = all rows of that counter, empty = none)
+    
+    For bulk jobs that change students or payments with Core statements;
+    runs in the session's current transaction.
+    """
+    session = session or db.session
+    connection = session.connection()
+    for (column, count), ids in zip(COUNTERS, (family_ids, class_ids, group_payment_ids)):
+        if ids is None or ids:
+            _recount(column, count, ids, connection)
+    
+    # Cached class lists (ClassGrade.get_active) show active_students
+    if class_ids is None or class_ids:
+        mark_written(session, ['class_grade'])
+
+
+def repair_counters():
+    """
+    Recount every counter column and commit
+    
+    Returns:
+    Dictionary: {'family.students_count': rows fixed, ...}
+    """
+    connection = db.session.connection()
+    fixed = {
+        f'{column.table.name}.{column.name}': _recount(column, count, None, connection, only_wrong=True)
+        for column, count in COUNTERS
+    }
+    if fixed['class_grade.active_students']:
+        mark_written(db.session, ['class_grade'])
+    # The API's ETags must change for rows whose counts were wrong
+    changed = [name.split('.')[0] for name, count in fixed.items() if count]
+    if changed:
+        DataVersion.bump(changed, connection=connection)
+    db.session.commit()
+    return fixed
+
+
+# ========== EVENT LISTENERS ==========
+# Remember which rows' counts changed; recount them after the flush
+
+def _pending(session):
+    """Rows to recount after the current flush"""
+    return session.info.setdefault('counters_pending', {
+        'families': set(),
+        'classes': set(),
+        'group_payments': set()
+    })
+
+
+def _old_and_new(history, current):
+    """Values an attribute had before and after the flush (without None)"""
+    return {value for value in set(history.deleted) | {current} if value is not None}
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    """No-op 'set' listener; registered with active_history (see below)"""
+    return value
+
+
+# Load the old value when these are set on an expired object,
+# so the flush still knows which family / class / group the row left
+for _attribute in (Student.family_id, Student.class_grade_id, FeePayment.group_payment_id):
+    event.listen(_attribute, 'set', _keep_old_value, active_history=True, retval=True)
+
+
+@event.listens_for(Student, 'after_insert')
+@event.listens_for(Student, 'after_delete')
+def mark_counters_on_student_change(mapper, connection, target):
+    """A new or deleted student changes their family's and class's counts"""
+    session = Session.object_session(target)
+    if session is None:
+        return
+    pending = _pending(session)
+    if target.family_id is not None:
+        pending['families'].add(target.family_id)
+    if target.class_grade_id is not None:
+        pending['classes'].add(target.class_grade_id)
+
+
+@event.listens_for(Student, 'after_update')
+def mark_counters_on_student_update(mapper, connection, target):
+    """A student who changes family, class or active status moves between counts"""
+    session = Session.object_session(target)
+    if session is None:
+        return
+    state = inspect(target)
+    pending = _pending(session)
+    if state.attrs.family_id.history.has_changes():
+        pending['families'].update(_old_and_new(state.attrs.family_id.history, target.family_id))
+    if state.attrs.class_grade_id.history.has_changes() or state.attrs.is_active.history.has_changes():
+        pending['classes'].update(_old_and_new(state.attrs.class_grade_id.history, target.class_grade_id))
+
+
+@event.listens_for(FeePayment, 'after_insert')
+@event.listens_for(FeePayment, 'after_update')
+@event.listens_for(FeePayment, 'after_delete')
+def mark_counters_on_payment_change(mapper, connection, target):
+    """A payment added to / removed from a group payment changes its count"""
+    session = Session.object_session(target)
+    if session is None:
+        return
+    history = inspect(target).attrs.group_payment_id.history
+    _pending(session)['group_payments'].update(_old_and_new(history, target.group_payment_id))
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def refresh_pending_counters(session, flush_context):
+    """Recount the rows touched by this flush (same transaction)"""
+    pending = session.info.pop('counters_pending', None)
+    if not pending or not any(pending.values()):
+        return
+    refresh_counters(pending['families'], pending['classes'], pending['group_payments'], session=session)
+    
+    # Objects already loaded in the session still hold the old counts
+    for model, ids, attribute in (
+        (Family, pending['families'], 'students_count'),
+        (ClassGrade, pending['classes'], 'active_students'),
+        (GroupPayment, pending['group_payments'], 'students_count'),
+    ):
+        for id in ids:
+            obj = session.identity_map.get(session.identity_key(model, id))
+            if obj is not None:
+                session.expire(obj, [attribute])
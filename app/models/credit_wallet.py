@@ -0,0 +1,201 @@
+"""
+Credit Wallet Models
+
+These hold money paid in advance: the part of a payment that is more than
+the open fees, kept as credit until new fees are generated.
+
+Why these models?
+- Parents often pay several months ahead; without a credit balance staff
+  had to create the future FeePayment rows by hand to record the money
+- A payment allocated over the oldest dues (app/utils/allocation.py) now
+  puts whatever is left over into the payer's wallet
+- Bulk fee generation draws the wallets down in the same transaction
+  (app/utils/credit.py), so prepaid students are billed and settled at once
+
+Wallets:
+- One wallet per family (money paid for "all the children") and one per
+  student (money paid for one child); a fee is paid from the student's
+  wallet first, then from the family's
+- The balance is stored on the wallet (one read); every change is also
+  written as a CreditEntry, so the balance can always be explained
+
+Example:
+- Family Khan pays Rs. 20,000 with Rs. 5,000 of fees open
+- Rs. 5,000 pays the fees, Rs. 15,000 goes to the family wallet
+- August fees (2 x Rs. 5,000) are generated: both are paid from the
+  wallet, which keeps Rs. 5,000 for September
+"""
+
+from app import db
+from app.utils.money import Money, to_decimal
+from datetime import datetime
+
+
+class CreditWallet(db.Model):
+    """
+    Credit Wallet Model
+    
+    The advance-payment balance of one family or one student.
+    
+    Table name: credit_wallet
+    """
+    
+    __tablename__ = 'credit_wallet'
+    __table_args__ = (
+        db.CheckConstraint(
+            '(family_id IS NULL) <> (student_id IS NULL)',
+            name='ck_credit_wallet_one_owner'
+        ),
+    )
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Owner: a family or a student (exactly one of them)
+    family_id = db.Column(db.Integer, db.ForeignKey('family.id', ondelete='CASCADE'), nullable=True, unique=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), nullable=True, unique=True)
+    
+    # Credit left (integer paisa, read back as Decimal)
+    balance = db.Column(Money, nullable=False, default=0, server_default='0')
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # ========== RELATIONSHIPS ==========
+    family = db.relationship('Family')
+    student = db.relationship('Student')
+    
+    # Every deposit and draw-down, newest first
+    entries = db.relationship(
+        'CreditEntry',
+        backref='wallet',
+        lazy='dynamic',
+        order_by='CreditEntry.id.desc()',
+        cascade='all, delete-orphan'
+    )
+    
+    # ========== METHODS ==========
+    
+    @staticmethod
+    def get_or_create(student_id=None, family_id=None):
+        """Wallet of a student or a family (added to the session when new)"""
+        if family_id is not None:
+            wallet = CreditWallet.query.filter_by(family_id=family_id).first()
+        else:
+            wallet = CreditWallet.query.filter_by(student_id=student_id).first()
+        if wallet is None:
+            wallet = CreditWallet(family_id=family_id, student_id=None if family_id is not None else student_id,
+                                  balance=0)
+            db.session.add(wallet)
+        return wallet
+    
+    @staticmethod
+    def available_for_student(student_id, family_id=None):
+        """
+        Credit a student's fees can be paid from (Decimal)
+        
+        The student's own wallet plus the family wallet, one query.
+        """
+        owners = CreditWallet.student_id == student_id
+        if family_id is not None:
+            owners = db.or_(owners, CreditWallet.family_id == family_id)
+        total = db.session.execute(
+            db.select(db.func.coalesce(db.func.sum(CreditWallet.balance), 0)).where(owners)
+        ).scalar()
+        return to_decimal(total)
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        owner = f'family={self.family_id}' if self.family_id is not None else f'student={self.student_id}'
+        return f'<CreditWallet {owner} Rs. {self.balance}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'family_id': self.family_id,
+            'student_id': self.student_id,
+            'balance': to_decimal(self.balance),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class CreditEntry(db.Model):
+    """
+    Credit Entry Model
+    
+    One change of a wallet balance: a deposit (positive amount, from a
+    group payment) or a draw-down (negative amount, onto a fee payment).
+    
+    Table name: credit_entry
+    """
+    
+    __tablename__ = 'credit_entry'
+    
+    # ========== ENTRY KINDS ==========
+    KIND_DEPOSIT = 'DEPOSIT'
+    KIND_APPLIED = 'APPLIED'
+    
+    KINDS = [
+        (KIND_DEPOSIT, 'Advance payment'),
+        (KIND_APPLIED, 'Paid a fee')
+    ]
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Wallet (Foreign Key)
+    wallet_id = db.Column(db.Integer, db.ForeignKey('credit_wallet.id', ondelete='CASCADE'), nullable=False, index=True)
+    
+    # DEPOSIT or APPLIED (from choices above)
+    kind = db.Column(db.String(20), nullable=False)
+    
+    # Change of the balance (integer paisa): + deposit, - draw-down
+    amount = db.Column(Money, nullable=False)
+    
+    # Where the money came from (deposits) / went to (draw-downs)
+    # SET NULL: archiving a closed year removes old payments, the entry stays
+    group_payment_id = db.Column(db.Integer, db.ForeignKey('group_payment.id', ondelete='SET NULL'), nullable=True)
+    fee_payment_id = db.Column(db.Integer, db.ForeignKey('fee_payment.id', ondelete='SET NULL'), nullable=True)
+    
+    # How and when a deposit was received (the group payment's), so the
+    # revenue report counts advance payments when the cash comes in
+    # NULL for draw-downs: they are PaymentAllocation rows (method CREDIT)
+    payment_method = db.Column(db.String(20), nullable=True)
+    payment_date = db.Column(db.Date, nullable=True)
+    
+    # Who recorded it
+    created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Revenue reports: deposits in a date range
+    __table_args__ = (
+        db.Index('ix_credit_entry_kind_date', 'kind', 'payment_date'),
+    )
+    
+    # ========== METHODS ==========
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<CreditEntry wallet={self.wallet_id} {self.kind} Rs. {self.amount}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'wallet_id': self.wallet_id,
+            'kind': self.kind,
+            'amount': to_decimal(self.amount),
+            'group_payment_id': self.group_payment_id,
+            'fee_payment_id': self.fee_payment_id,
+            'payment_method': self.payment_method,
+            'payment_date': self.payment_date.isoformat() if self.payment_date else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
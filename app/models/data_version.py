@@ -0,0 +1,147 @@
+"""
+Data Version Model
+
+This keeps one counter per table that reports read from.
+The counter goes up by one in every transaction that changes the table.
+
+Why this model?
+- Cached reports (app/utils/report_cache.py) must know when their data
+  changed, without re-reading that data
+- A report's cache key includes the counters of the tables it reads:
+  as long as nobody writes, the key stays the same and the cached file
+  is served; the first write gives a new key
+- The counters live in the database (not in process memory), so every
+  worker process sees the same numbers
+- The JSON API (app/routes/api.py) builds its ETags from them the same way
+
+How is it kept up to date?
+- Every flush that inserts, updates or deletes a tracked row (payments,
+  students, families, receipts, credit entries, and the rarely changed fee structures,
+  classes and years that reports show names and amounts from) bumps
+  the counter inside the same transaction
+- Bulk jobs that bypass the ORM (rollover, archive-year, repair-counters) call
+  DataVersion.bump() themselves
+
+Example:
+- fee_payment: 4812, student: 97
+"""
+
+from app import db
+from app.models.academic_year import AcademicYear
+from app.models.class_grade import ClassGrade
+from app.models.credit_wallet import CreditEntry
+from app.models.family import Family
+from app.models.fee_payment import FeePayment
+from app.models.fee_structure import FeeStructure
+from app.models.group_payment import GroupPayment
+from app.models.payment_receipt import PaymentReceipt
+from app.models.student import Student
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class DataVersion(db.Model):
+    """
+    Data Version Model
+    
+    One row per tracked table: how many times it has been changed.
+    
+    Table name: data_version
+    """
+    
+    __tablename__ = 'data_version'
+    
+    # Tables whose writes are counted
+    FEE_PAYMENT = 'fee_payment'
+    STUDENT = 'student'
+    FEE_STRUCTURE = 'fee_structure'
+    CLASS_GRADE = 'class_grade'
+    ACADEMIC_YEAR = 'academic_year'
+    FAMILY = 'family'
+    GROUP_PAYMENT = 'group_payment'
+    PAYMENT_RECEIPT = 'payment_receipt'
+    CREDIT_ENTRY = 'credit_entry'
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Table name (Primary Key)
+    name = db.Column(db.String(50), primary_key=True)
+    
+    # Change counter
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # ========== METHODS ==========
+    
+    @staticmethod
+    def bump(names, connection=None):
+        """
+        Add one to the counters of the given tables
+        
+        Parameters:
+        names: Table names (e.g. ['fee_payment'])
+        connection: Connection to write on (defaults to the session's);
+                    pass the job's connection so the bump commits with the job
+        """
+        connection = connection or db.session.connection()
+        table = DataVersion.__table__
+        now = datetime.utcnow()
+        for name in sorted(set(names)):
+            updated = connection.execute(
+                table.update().where(table.c.name == name)
+                .values(version=table.c.version + 1, updated_at=now)
+            ).rowcount
+            if not updated:
+                connection.execute(table.insert().values(name=name, version=1, updated_at=now))
+    
+    @staticmethod
+    def current(names):
+        """
+        Current counters of the given tables
+        
+        Returns:
+        Dictionary: {table name: version} (0 for tables never changed)
+        """
+        versions = dict(db.session.execute(
+            db.select(DataVersion.name, DataVersion.version).where(DataVersion.name.in_(names))
+        ).all())
+        return {name: versions.get(name, 0) for name in names}
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<DataVersion {self.name}={self.version}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'name': self.name,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+# ========== EVENT LISTENERS ==========
+# Remember which tracked tables changed; bump their counters after the flush
+
+def _mark_changed(mapper, connection, target):
+    """Remember the table of a written row"""
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('data_versions_changed', set()).add(mapper.local_table.name)
+
+
+for _model in (FeePayment, Student, FeeStructure, ClassGrade, AcademicYear, Family, GroupPayment, PaymentReceipt,
+               CreditEntry):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _mark_changed)
+
+
+@event.listens_for(Session, 'after_flush')
+def bump_changed_versions(session, flush_context):
+    """Bump the counters of tables written by this flush (same transaction)"""
+    changed = session.info.pop('data_versions_changed', None)
+    if changed:
+        DataVersion.bump(changed, connection=session.connection())
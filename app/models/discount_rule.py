@@ -0,0 +1,105 @@
+"""
+Discount Rule Model
+
+This defines discounts on fees: sibling discounts, scholarships and the like.
+
+Why this model?
+- FeeStructure.amount is the same for every student of a class, but
+  families with several children and scholarship students pay less
+- A rule says how much (a percentage or a fixed amount) and for whom
+  (family size, class, fee type, one student); empty scopes match everyone
+- The rules are compiled once into an in-memory table (app/utils/discounts.py)
+  and applied when fees are generated and when payments are posted; the
+  result is stored on each FeePayment (discount, discount_rule_id)
+
+When several rules match a fee, the largest discount applies (they do not
+add up), and a discount never exceeds the fee.
+
+Example:
+- "Third child": 20%, family of 3 or more, Monthly fees
+- "Scholarship - Ahmed": 100%, student Ahmed, Monthly fees
+"""
+
+from app import db
+from app.utils.money import to_decimal
+from datetime import datetime
+
+
+class DiscountRule(db.Model):
+    """
+    Discount Rule Model
+    
+    One discount and the students / fees it applies to.
+    
+    Table name: discount_rule
+    """
+    
+    __tablename__ = 'discount_rule'
+    
+    # ========== RULE TYPES ==========
+    TYPE_PERCENT = 'PERCENT'
+    TYPE_FIXED = 'FIXED'
+    
+    RULE_TYPES = [
+        (TYPE_PERCENT, 'Percentage of the fee'),
+        (TYPE_FIXED, 'Fixed amount')
+    ]
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Name shown to staff (e.g. "Sibling discount", "Scholarship - Ahmed")
+    name = db.Column(db.String(100), nullable=False)
+    
+    # PERCENT or FIXED (from choices above)
+    rule_type = db.Column(db.String(20), nullable=False, default=TYPE_PERCENT)
+    
+    # Percentage (e.g. 10.00 = 10%) or amount in Rupees (e.g. 500.00)
+    value = db.Column(db.Numeric(10, 2), nullable=False)
+    
+    # ========== SCOPE (empty = any) ==========
+    
+    # Only students whose family has at least this many active students
+    min_family_size = db.Column(db.Integer, nullable=True)
+    
+    # Only students of this class
+    class_grade_id = db.Column(db.Integer, db.ForeignKey('class_grade.id', ondelete='CASCADE'), nullable=True)
+    
+    # Only fees of this type (FeeStructure.FEE_TYPES)
+    fee_type = db.Column(db.String(50), nullable=True)
+    
+    # Only this student (scholarships)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), nullable=True, index=True)
+    
+    # Active status
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # ========== RELATIONSHIPS ==========
+    class_grade = db.relationship('ClassGrade')
+    student = db.relationship('Student')
+    
+    # ========== METHODS ==========
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<DiscountRule {self.name} {self.rule_type} {self.value}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'rule_type': self.rule_type,
+            'value': to_decimal(self.value),
+            'min_family_size': self.min_family_size,
+            'class_grade_id': self.class_grade_id,
+            'fee_type': self.fee_type,
+            'student_id': self.student_id,
+            'is_active': self.is_active
+        }
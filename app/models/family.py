@@ -58,6 +58,9 @@ class Family(db.Model):
     # Family address
     address = db.Column(db.Text, nullable=True)
     
+    # Number of students in the family (counter cache, see app/models/counters.py)
+    students_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -126,5 +129,5 @@ class Family(db.Model):
             'father_contact': self.father_contact,
             'mother_name': self.mother_name,
             'address': self.address,
-            'students_count': self.students.count()
+            'students_count': self.students_count
         }
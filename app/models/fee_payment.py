@@ -14,6 +14,7 @@ This is the core payment tracking model.
 """
 
 from app import db
+from app.utils.money import paisa, to_decimal
 from datetime import datetime, date
 from sqlalchemy import event
 
@@ -35,12 +36,15 @@ class FeePayment(db.Model):
     PAYMENT_EASYPAISA = 'EASYPAISA'
     PAYMENT_JAZZCASH = 'JAZZCASH'
     PAYMENT_BANK_TRANSFER = 'BANK_TRANSFER'
+    # Paid from an advance-payment wallet (app/utils/credit.py), never entered by hand
+    PAYMENT_CREDIT = 'CREDIT'
     
     PAYMENT_METHODS = [
         (PAYMENT_CASH, 'Cash'),
         (PAYMENT_EASYPAISA, 'Easypaisa'),
         (PAYMENT_JAZZCASH, 'Jazzcash'),
-        (PAYMENT_BANK_TRANSFER, 'Bank Transfer')
+        (PAYMENT_BANK_TRANSFER, 'Bank Transfer'),
+        (PAYMENT_CREDIT, 'Advance credit')
     ]
     
     # ========== PAYMENT STATUS ==========
@@ -56,6 +60,15 @@ class FeePayment(db.Model):
         (STATUS_OVERDUE, 'Overdue')
     ]
     
+    # Statuses that still have money to collect
+    # Keep this order: SQLite only uses the partial index below when a
+    # query repeats the exact same IN (...) list
+    OPEN_STATUSES = [STATUS_PENDING, STATUS_OVERDUE, STATUS_PARTIAL]
+    
+    # ========== VERIFICATION (statement reconciliation) ==========
+    VERIFICATION_VERIFIED = 'VERIFIED'
+    VERIFICATION_MISMATCH = 'MISMATCH'
+    
     # ========== COLUMNS (Database Fields) ==========
     
     # Primary Key
@@ -63,27 +76,53 @@ class FeePayment(db.Model):
     
     # Student (Foreign Key)
     # Every payment is for a specific student
-    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), nullable=False, index=True)
+    # Indexed through the composite indexes below (student_id is their first column)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), nullable=False)
     
     # Fee Structure (Foreign Key)
     # Which fee is being paid
     # RESTRICT prevents deletion if payments exist (SQLite compatible)
     fee_structure_id = db.Column(db.Integer, db.ForeignKey('fee_structure.id', ondelete='RESTRICT'), nullable=False, index=True)
     
+    # Class the student was in when the fee was charged (filled in on insert)
+    # Reports and the collection cube group by it, so promoting the student
+    # at rollover does not move last year's fees into the new class
+    class_grade_id = db.Column(db.Integer, db.ForeignKey('class_grade.id', ondelete='SET NULL'), nullable=True)
+    
     # Payment amount
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     
+    # Part of amount recorded as PaymentAllocation rows (lump-sum payments),
+    # each with its own method and date; the rest was paid on this row
+    # (payment_method / payment_date below)
+    allocated = db.Column(db.Numeric(10, 2), nullable=False, default=0, server_default='0')
+    
+    # Installment (Foreign Key): set when this row is one dated part of a
+    # fee paid in installments (app/utils/installments.py); amount_due is
+    # then that part's share of the fee. NULL = the whole fee structure amount
+    installment_id = db.Column(db.Integer, db.ForeignKey('fee_installment.id', ondelete='RESTRICT'), nullable=True)
+    amount_due = db.Column(db.Numeric(10, 2), nullable=True)
+    
+    # Discount on the fee (sibling, scholarship...), set from the discount
+    # rules when the fee is generated (app/utils/discounts.py)
+    # The student owes (amount_due or fee_structure.amount) - discount
+    discount = db.Column(db.Numeric(10, 2), nullable=False, default=0, server_default='0')
+    discount_rule_id = db.Column(db.Integer, db.ForeignKey('discount_rule.id', ondelete='SET NULL'), nullable=True)
+    
     # Payment method
     payment_method = db.Column(db.String(20), nullable=False)
     
     # Payment date (when payment was made)
-    payment_date = db.Column(db.Date, nullable=False, default=date.today, index=True)
+    # Indexed through ix_fee_payment_collections (payment_date is its first column)
+    payment_date = db.Column(db.Date, nullable=False, default=date.today)
     
     # Due date (when payment was due)
     due_date = db.Column(db.Date, nullable=False, index=True)
     
     # Payment status
-    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING, index=True)
+    # No single-column index: only 4 values, and SQLite would prefer it over
+    # the partial index ix_fee_payment_open_due_date
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
     
     # Receipt number (auto-generated: RCP-YYYY-XXXXX)
     # Nullable for pending payments (no receipt yet)
@@ -94,11 +133,21 @@ class FeePayment(db.Model):
     transaction_id = db.Column(db.String(100), unique=True, nullable=True, index=True)
     account_name = db.Column(db.String(100), nullable=True)
     
+    # Checked against the provider's statement (app/utils/reconciliation.py)
+    # NULL = not checked yet, VERIFIED = on the statement with the same amount,
+    # MISMATCH = transaction ID on the statement but with a different amount
+    verification_status = db.Column(db.String(20), nullable=True)
+    verified_at = db.Column(db.DateTime, nullable=True)
+    
     # Group Payment (Foreign Key - for family payments)
     # If this payment is part of a family group payment
     # Nullable: Individual payments don't have group_payment_id
     group_payment_id = db.Column(db.Integer, db.ForeignKey('group_payment.id', ondelete='SET NULL'), nullable=True, index=True)
     
+    # Archived: settled payment of a closed academic year (set by year-end rollover)
+    # Archived rows stay in the table but current-year screens can skip them
+    is_archived = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    
     # Remarks/Notes
     remarks = db.Column(db.Text, nullable=True)
     
@@ -109,6 +158,27 @@ class FeePayment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # ========== COMPOSITE INDEXES ==========
+    # Tuned to the filters the pages actually run (see migration b7e3c1d94f20)
+    __table_args__ = (
+        # Student page: pending fees (student_id + status IN (...))
+        db.Index('ix_fee_payment_student_status', 'student_id', 'status'),
+        # Student page: latest payments (student_id ORDER BY payment_date DESC)
+        db.Index('ix_fee_payment_student_payment_date', 'student_id', 'payment_date'),
+        # Defaulters: open fees ordered by due date (partial index, open rows only)
+        db.Index(
+            'ix_fee_payment_open_due_date', 'due_date', 'student_id',
+            sqlite_where=db.text("status IN ('PENDING', 'OVERDUE', 'PARTIAL')"),
+            postgresql_where=db.text("status IN ('PENDING', 'OVERDUE', 'PARTIAL')")
+        ),
+        # Revenue reports: covering index, so a date range is summed from the
+        # index alone (no table lookups), see app/utils/reports.py
+        db.Index(
+            'ix_fee_payment_collections',
+            'payment_date', 'payment_method', 'class_grade_id', 'fee_structure_id', 'amount', 'allocated'
+        ),
+    )
+    
     # ========== RELATIONSHIPS ==========
     # One payment can have one receipt
     receipt = db.relationship('PaymentReceipt', backref='payment', uselist=False, cascade='all, delete-orphan')
@@ -150,14 +220,19 @@ class FeePayment(db.Model):
         """
         from datetime import date
         
+        # Amount charged: the installment's share or the whole fee (less the discount)
+        fee_amount = self.gross_amount() - (self.discount or 0)
+        
+        # Fully discounted (e.g. 100% scholarship): nothing to collect
+        if fee_amount <= 0:
+            self.status = self.STATUS_PAID
+            return
+        
         # If amount is 0 or negative, status is PENDING
         if self.amount <= 0:
             self.status = self.STATUS_PENDING
             return
         
-        # Get the fee structure to compare amounts
-        fee_amount = self.fee_structure.amount
-        
         # Check if payment is complete
         if self.amount >= fee_amount:
             self.status = self.STATUS_PAID
@@ -171,6 +246,53 @@ class FeePayment(db.Model):
             if date.today() > self.due_date:
                 self.status = self.STATUS_OVERDUE
     
+    @classmethod
+    def status_for(cls, paid, fee_amount, due_date, today):
+        """
+        Status of a fee after a bulk payment, as update_status() would set it
+        
+        For jobs that write payments with Core (allocation, credit draw-down).
+        paid and fee_amount are in the same unit (e.g. integer paisa).
+        """
+        if paid >= fee_amount:
+            return cls.STATUS_PAID
+        if today > due_date:
+            return cls.STATUS_OVERDUE
+        return cls.STATUS_PARTIAL if paid > 0 else cls.STATUS_PENDING
+    
+    def gross_amount(self):
+        """Amount this row charges before the discount (installment share or whole fee)"""
+        return self.amount_due if self.amount_due is not None else self.fee_structure.amount
+    
+    @classmethod
+    def due_amount(cls):
+        """
+        SQL expression: what this row charges before the discount
+        
+        The installment's share, or the fee structure amount. The query must join FeeStructure.
+        """
+        from app.models.fee_structure import FeeStructure
+        return db.func.coalesce(cls.amount_due, FeeStructure.amount)
+    
+    @classmethod
+    def charged_paisa(cls):
+        """
+        SQL expression: what the fee charges the student, as integer paisa
+        
+        due_amount() less the discount. The query must join FeeStructure.
+        """
+        return paisa(cls.due_amount()) - paisa(cls.discount)
+    
+    @classmethod
+    def open_status_filter(cls):
+        """
+        Filter for fees that still have money to collect
+        
+        The statuses are written into the SQL (not sent as parameters)
+        so SQLite can match the partial index ix_fee_payment_open_due_date.
+        """
+        return cls.status.in_([db.literal(s, literal_execute=True) for s in cls.OPEN_STATUSES])
+    
     def is_digital_payment(self):
         """Check if this is a digital payment (requires transaction ID)"""
         return self.payment_method in [self.PAYMENT_EASYPAISA, self.PAYMENT_JAZZCASH, self.PAYMENT_BANK_TRANSFER]
@@ -187,7 +309,12 @@ class FeePayment(db.Model):
             'student_name': self.student.get_full_name() if self.student else None,
             'fee_structure_id': self.fee_structure_id,
             'fee_name': self.fee_structure.fee_name if self.fee_structure else None,
-            'amount': float(self.amount),
+            'class_grade_id': self.class_grade_id,
+            'amount': to_decimal(self.amount),
+            'allocated': to_decimal(self.allocated),
+            'amount_due': to_decimal(self.amount_due),
+            'discount': to_decimal(self.discount),
+            'installment_id': self.installment_id,
             'payment_method': self.payment_method,
             'payment_date': self.payment_date.isoformat() if self.payment_date else None,
             'due_date': self.due_date.isoformat() if self.due_date else None,
@@ -201,7 +328,12 @@ class FeePayment(db.Model):
 # ========== EVENT LISTENER ==========
 @event.listens_for(FeePayment, 'before_insert')
 def generate_receipt_before_insert(mapper, connection, target):
-    """Automatically generate receipt number and update status before inserting"""
+    """Record the class, generate the receipt number and update the status before inserting"""
+    if target.class_grade_id is None and target.student_id is not None:
+        from app.models.student import Student
+        target.class_grade_id = connection.execute(
+            db.select(Student.class_grade_id).where(Student.id == target.student_id)
+        ).scalar()
     if target.status == FeePayment.STATUS_PAID and not target.receipt_number:
         target.generate_receipt_number()
     target.update_status()
@@ -16,6 +16,9 @@ Example:
 """
 
 from app import db
+from app.utils.money import to_decimal
+from app.models.academic_year import AcademicYear
+from app.utils.query_cache import cached_query
 from datetime import datetime
 
 # Junction table for Many-to-Many relationship
@@ -49,6 +52,9 @@ class FeeStructure(db.Model):
     FEE_TYPE_EXAM = 'EXAM'
     FEE_TYPE_RENEWAL = 'ADMISSION RENEWAL'
     FEE_TYPE_OTHER = 'OTHER'
+    # Late-fee surcharges (app/utils/late_fees.py): one structure per year,
+    # linked to no class, so fee generation never charges it by itself
+    FEE_TYPE_LATE = 'LATE FEE'
     
     FEE_TYPES = [
         (FEE_TYPE_ADMISSION, 'Admission Fee'),
@@ -56,7 +62,8 @@ class FeeStructure(db.Model):
         (FEE_TYPE_STATIONARY, 'Stationary/Books Fee'),
         (FEE_TYPE_EXAM, 'Exam Fee'),
         (FEE_TYPE_RENEWAL, 'Admission Renewal Fee'),
-        (FEE_TYPE_OTHER, 'Other Fee')
+        (FEE_TYPE_OTHER, 'Other Fee'),
+        (FEE_TYPE_LATE, 'Late Fee Surcharge')
     ]
     
     # ========== COLUMNS (Database Fields) ==========
@@ -108,6 +115,37 @@ class FeeStructure(db.Model):
     
     # ========== METHODS ==========
     
+    @staticmethod
+    def for_class(class_grade_id, academic_year_id=None):
+        """
+        Active fee structures that apply to a class
+        
+        Parameters:
+        class_grade_id: Class to look up
+        academic_year_id: Academic year (defaults to the current one)
+        
+        Returns:
+        List of FeeStructure, cached until a fee structure, its class links
+        or the current year change (see app/utils/query_cache.py)
+        """
+        if academic_year_id is None:
+            year = AcademicYear.get_current()
+            if not year:
+                return []
+            academic_year_id = year.id
+        
+        return cached_query(
+            f'fee_structure:class={class_grade_id}:year={academic_year_id}',
+            ['fee_structure', 'fee_structure_classes'],
+            lambda: FeeStructure.query.join(
+                fee_structure_classes, fee_structure_classes.c.fee_structure_id == FeeStructure.id
+            ).filter(
+                fee_structure_classes.c.class_grade_id == class_grade_id,
+                FeeStructure.academic_year_id == academic_year_id,
+                FeeStructure.is_active == True
+            ).order_by(FeeStructure.fee_type, FeeStructure.id).all()
+        )
+    
     def __repr__(self):
         """String representation for debugging"""
         return f'<FeeStructure {self.fee_name} - Rs. {self.amount}>'
@@ -118,7 +156,7 @@ class FeeStructure(db.Model):
             'id': self.id,
             'fee_type': self.fee_type,
             'fee_name': self.fee_name,
-            'amount': float(self.amount),
+            'amount': to_decimal(self.amount),
             'academic_year': self.academic_year.year_name if self.academic_year else None,
             'due_date_offset': self.due_date_offset,
             'is_recurring': self.is_recurring,
@@ -17,6 +17,7 @@ Example:
 """
 
 from app import db
+from app.utils.money import money_sum, to_decimal
 from datetime import datetime, date
 from sqlalchemy import event
 
@@ -51,6 +52,10 @@ class GroupPayment(db.Model):
     STATUS_PAID = 'PAID'
     STATUS_PARTIAL = 'PARTIAL'
     
+    # ========== VERIFICATION (statement reconciliation) ==========
+    VERIFICATION_VERIFIED = 'VERIFIED'
+    VERIFICATION_MISMATCH = 'MISMATCH'
+    
     # ========== COLUMNS (Database Fields) ==========
     
     # Primary Key
@@ -62,7 +67,9 @@ class GroupPayment(db.Model):
     
     # Family (Foreign Key)
     # Which family made this payment
-    family_id = db.Column(db.Integer, db.ForeignKey('family.id', ondelete='CASCADE'), nullable=False, index=True)
+    # Nullable: a lump sum allocated over one student's fees (app/utils/allocation.py)
+    # is also recorded as a group payment, and the student may have no family
+    family_id = db.Column(db.Integer, db.ForeignKey('family.id', ondelete='CASCADE'), nullable=True, index=True)
     
     # Total amount (sum of all individual payments)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
@@ -77,13 +84,20 @@ class GroupPayment(db.Model):
     transaction_id = db.Column(db.String(100), unique=True, nullable=True, index=True)
     account_name = db.Column(db.String(100), nullable=True)
     
+    # Checked against the provider's statement (app/utils/reconciliation.py)
+    # NULL = not checked yet, VERIFIED = on the statement with the same amount,
+    # MISMATCH = transaction ID on the statement but with a different amount
+    verification_status = db.Column(db.String(20), nullable=True)
+    verified_at = db.Column(db.DateTime, nullable=True)
+    
     # Receipt number (single receipt for all students)
     receipt_number = db.Column(db.String(50), unique=True, nullable=False, index=True)
     
     # Payment status
     status = db.Column(db.String(20), nullable=False, default=STATUS_PAID)
     
-    # Number of students in this payment
+    # Number of fee payments in this group payment
+    # (counter cache, kept exact by app/models/counters.py)
     students_count = db.Column(db.Integer, nullable=False, default=0)
     
     # Who created this payment record
@@ -172,10 +186,18 @@ class GroupPayment(db.Model):
         self.receipt_number = f'RCP-{current_year}-{new_num:05d}'
     
     def calculate_total(self):
-        """Calculate total amount from associated fee payments"""
-        total = sum(float(payment.amount) for payment in self.fee_payments.all())
+        """
+        Calculate total amount from associated fee payments
+        
+        One SQL query returns both the exact sum (as Decimal) and the count.
+        """
+        from app.models.fee_payment import FeePayment
+        total, count = self.fee_payments.with_entities(
+            money_sum(FeePayment.amount),
+            db.func.count(FeePayment.id)
+        ).one()
         self.total_amount = total
-        self.students_count = self.fee_payments.count()
+        self.students_count = count
         return total
     
     def __repr__(self):
@@ -184,18 +206,22 @@ class GroupPayment(db.Model):
     
     def to_dict(self):
         """Convert to dictionary"""
+        # Child payments are serialized as one batch (not one query per payment)
+        from app.utils.serializers import FeePaymentSerializer
         return {
             'id': self.id,
             'group_payment_number': self.group_payment_number,
             'family_code': self.family.family_code if self.family else None,
             'father_name': self.family.father_name if self.family else None,
-            'total_amount': float(self.total_amount),
+            'total_amount': to_decimal(self.total_amount),
             'payment_method': self.payment_method,
             'payment_date': self.payment_date.isoformat() if self.payment_date else None,
             'receipt_number': self.receipt_number,
             'status': self.status,
             'students_count': self.students_count,
-            'fee_payments': [fp.to_dict() for fp in self.fee_payments.all()]
+            'fee_payments': FeePaymentSerializer().dump(self.fee_payments.all()),
+            # What each fee received from this payment (allocate-payment)
+            'allocations': [allocation.to_dict() for allocation in self.allocations]
         }
 
 
@@ -0,0 +1,148 @@
+"""
+Installment Plan Models
+
+These split a one-time fee (Admission, Annual, Stationary...) into dated parts.
+
+Why these models?
+- FeeStructure has a single due date offset: the whole fee is due at once
+- Parents often pay admission and annual fees in two or three parts
+- A plan lists the parts (share of the fee + due date); every student then
+  gets one FeePayment row per part (app/utils/installments.py), so the
+  status, ledger and defaulter logic work on each installment by itself
+
+Example:
+- Admission Fee (Rs. 30,000), plan of 3 parts:
+  1/3: 50% due 10 April, 2/3: 25% due 10 July, 3/3: 25% due 10 October
+- Student Ahmed: three fees of Rs. 15,000, Rs. 7,500 and Rs. 7,500
+"""
+
+from app import db
+from app.utils.money import to_decimal, to_paisa
+from datetime import datetime
+
+
+class InstallmentPlan(db.Model):
+    """
+    Installment Plan Model
+    
+    The installment schedule of one fee structure (at most one plan each).
+    
+    Table name: installment_plan
+    """
+    
+    __tablename__ = 'installment_plan'
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Fee Structure (Foreign Key): the fee that is split
+    fee_structure_id = db.Column(db.Integer, db.ForeignKey('fee_structure.id', ondelete='CASCADE'),
+                                 nullable=False, unique=True)
+    
+    # Active status (inactive plans are not generated; fees already created stay)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # ========== RELATIONSHIPS ==========
+    # One fee structure has at most one plan (fee_structure.installment_plan)
+    fee_structure = db.relationship(
+        'FeeStructure',
+        backref=db.backref('installment_plan', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    )
+    
+    # The parts, in order
+    installments = db.relationship(
+        'FeeInstallment',
+        backref='plan',
+        order_by='FeeInstallment.number',
+        cascade='all, delete-orphan'
+    )
+    
+    # ========== METHODS ==========
+    
+    @staticmethod
+    def planned_fee_ids():
+        """Fee structures paid in installments (active plans), one query"""
+        return set(db.session.execute(
+            db.select(InstallmentPlan.fee_structure_id).where(InstallmentPlan.is_active == True)
+        ).scalars())
+    
+    def split_paisa(self, fee_paisa):
+        """
+        Amount of each part, in integer paisa (same order as installments)
+        
+        Every part but the last is rounded down; the last one takes the
+        rest, so the parts always add up to the fee exactly.
+        """
+        amounts = [fee_paisa * to_paisa(part.percentage) // 10000 for part in self.installments[:-1]]
+        amounts.append(fee_paisa - sum(amounts))
+        return amounts
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<InstallmentPlan fee={self.fee_structure_id} parts={len(self.installments)}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'fee_structure_id': self.fee_structure_id,
+            'is_active': self.is_active,
+            'installments': [part.to_dict() for part in self.installments]
+        }
+
+
+class FeeInstallment(db.Model):
+    """
+    Fee Installment Model
+    
+    One dated part of an installment plan.
+    
+    Table name: fee_installment
+    """
+    
+    __tablename__ = 'fee_installment'
+    __table_args__ = (
+        db.UniqueConstraint('plan_id', 'number', name='uq_fee_installment_plan_number'),
+    )
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Installment Plan (Foreign Key)
+    plan_id = db.Column(db.Integer, db.ForeignKey('installment_plan.id', ondelete='CASCADE'), nullable=False)
+    
+    # Position in the plan (1, 2, 3...)
+    number = db.Column(db.Integer, nullable=False)
+    
+    # Label shown next to the fee name (e.g. "Installment 2/3")
+    name = db.Column(db.String(50), nullable=False)
+    
+    # Share of the fee (e.g. 25.00 = 25%); the shares of a plan add up to 100
+    percentage = db.Column(db.Numeric(5, 2), nullable=False)
+    
+    # Due date of this part
+    due_date = db.Column(db.Date, nullable=False)
+    
+    # ========== METHODS ==========
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<FeeInstallment plan={self.plan_id} {self.number}: {self.percentage}% due {self.due_date}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'number': self.number,
+            'name': self.name,
+            'percentage': to_decimal(self.percentage),
+            'due_date': self.due_date.isoformat() if self.due_date else None
+        }
@@ -0,0 +1,198 @@
+"""
+Late Fee Models
+
+These hold the late-fee rules of fee structures and the surcharges
+charged under them.
+
+Why these models?
+- A fee paid after its due date can carry a penalty: either a percentage
+  of the fee after discounts (e.g. 5% of Rs. 5,000 = Rs. 250) or a fixed
+  amount (Rs. 200)
+- Working the penalty out on every page view would cost a query per fee
+  and could give different answers on different days
+- Instead `flask apply-late-fees` charges them in bulk (app/utils/late_fees.py):
+  one LateFeeCharge row per fee per period, and the surcharge itself as a
+  FeePayment of the year's "Late Fee" structure, so it is owed, paid and
+  reported like any other fee
+
+Example:
+- Monthly Fee (Rs. 5,000), rule: 5%, 5 grace days, every month
+- Fee due 10 August, still open on 20 August: Rs. 250 charged for 2025-08
+- Still open on 20 September: another Rs. 250 for 2025-09
+"""
+
+from app import db
+from app.utils.money import Money, from_paisa, paisa, to_decimal
+from datetime import datetime
+
+
+class LateFeeRule(db.Model):
+    """
+    Late Fee Rule Model
+    
+    How much is charged when a fee of one fee structure is paid late.
+    At most one rule per fee structure.
+    
+    Table name: late_fee_rule
+    """
+    
+    __tablename__ = 'late_fee_rule'
+    
+    # ========== RULE TYPES ==========
+    TYPE_PERCENT = 'PERCENT'
+    TYPE_FIXED = 'FIXED'
+    
+    RULE_TYPES = [
+        (TYPE_PERCENT, 'Percentage of the fee'),
+        (TYPE_FIXED, 'Fixed amount')
+    ]
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Fee Structure (Foreign Key): the fee this rule applies to
+    fee_structure_id = db.Column(db.Integer, db.ForeignKey('fee_structure.id', ondelete='CASCADE'),
+                                 nullable=False, unique=True)
+    
+    # PERCENT or FIXED (from choices above)
+    rule_type = db.Column(db.String(20), nullable=False, default=TYPE_FIXED)
+    
+    # Percentage (e.g. 5.00 = 5%) or amount in Rupees (e.g. 200.00)
+    value = db.Column(db.Numeric(10, 2), nullable=False)
+    
+    # Days after the due date before anything is charged
+    grace_days = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Charge again every month the fee stays open (False = charge once)
+    repeat_monthly = db.Column(db.Boolean, nullable=False, default=False)
+    
+    # Active status
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # ========== RELATIONSHIPS ==========
+    # One fee structure has at most one rule (fee_structure.late_fee_rule)
+    fee_structure = db.relationship(
+        'FeeStructure',
+        backref=db.backref('late_fee_rule', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    )
+    
+    # ========== METHODS ==========
+    
+    def surcharge_paisa(self, fee_amount_paisa):
+        """
+        Surcharge for one fee, in integer paisa
+        
+        Percentages are rounded half up to the paisa.
+        """
+        value_paisa = int(to_decimal(self.value) * 100)
+        if self.rule_type == self.TYPE_PERCENT:
+            return (fee_amount_paisa * value_paisa + 5000) // 10000
+        return value_paisa
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<LateFeeRule fee={self.fee_structure_id} {self.rule_type} {self.value}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'fee_structure_id': self.fee_structure_id,
+            'rule_type': self.rule_type,
+            'value': to_decimal(self.value),
+            'grace_days': self.grace_days,
+            'repeat_monthly': self.repeat_monthly,
+            'is_active': self.is_active
+        }
+
+
+class LateFeeCharge(db.Model):
+    """
+    Late Fee Charge Model
+    
+    One surcharge on one late fee payment for one period (month).
+    Written only by the bulk job; the unique (fee payment, period) key
+    makes running it twice in a month harmless.
+    
+    Table name: late_fee_charge
+    """
+    
+    __tablename__ = 'late_fee_charge'
+    __table_args__ = (
+        db.UniqueConstraint('fee_payment_id', 'period', name='uq_late_fee_charge_payment_period'),
+    )
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Fee Payment (Foreign Key): the late fee
+    fee_payment_id = db.Column(db.Integer, db.ForeignKey('fee_payment.id', ondelete='CASCADE'), nullable=False)
+    
+    # Student (Foreign Key): copied from the fee payment, so a student's
+    # late fees are one indexed read
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), nullable=False, index=True)
+    
+    # Rule the surcharge was worked out with
+    rule_id = db.Column(db.Integer, db.ForeignKey('late_fee_rule.id', ondelete='SET NULL'), nullable=True)
+    
+    # Month the surcharge was charged for, e.g. "2025-08"
+    period = db.Column(db.String(7), nullable=False)
+    
+    # Surcharge (integer paisa, read back as Decimal)
+    amount = db.Column(Money, nullable=False)
+    
+    # The FeePayment the surcharge is billed as (paid / open like any fee)
+    # NULL only for charges recorded before surcharges were fee rows: the
+    # next apply-late-fees run bills them
+    surcharge_payment_id = db.Column(db.Integer, db.ForeignKey('fee_payment.id', ondelete='CASCADE'), nullable=True)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # ========== METHODS ==========
+    
+    @staticmethod
+    def outstanding_for_student(student_id):
+        """
+        Late fees a student still owes (Decimal)
+        
+        What is left to pay on the student's open surcharge fees; settled
+        surcharges no longer count.
+        """
+        from app.models.fee_payment import FeePayment
+        from app.models.fee_structure import FeeStructure
+        owed = FeePayment.charged_paisa() - paisa(FeePayment.amount)
+        total = db.session.execute(
+            db.select(db.func.coalesce(db.func.sum(owed), 0)).join(
+                FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+            ).where(
+                FeePayment.student_id == student_id,
+                FeePayment.open_status_filter(),
+                FeeStructure.fee_type == FeeStructure.FEE_TYPE_LATE
+            )
+        ).scalar()
+        return from_paisa(total)
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<LateFeeCharge payment={self.fee_payment_id} {self.period} Rs. {self.amount}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'fee_payment_id': self.fee_payment_id,
+            'student_id': self.student_id,
+            'period': self.period,
+            'amount': to_decimal(self.amount),
+            'surcharge_payment_id': self.surcharge_payment_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
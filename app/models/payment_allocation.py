@@ -0,0 +1,99 @@
+"""
+Payment Allocation Model
+
+This records how much of one payment went to one fee.
+
+Why this model?
+- A lump-sum payment (app/utils/allocation.py) can top up a fee that is
+  already partly paid, e.g. Rs. 2,000 in cash in April and Rs. 3,000 by
+  Easypaisa in May
+- A FeePayment row has room for one method and one date only: writing the
+  second payment's method and date over the first moved the April cash
+  into May's Easypaisa revenue
+- Here every payment a fee receives through allocation is its own row,
+  with its own method and date; the fee row keeps the total paid
+
+How do the numbers add up?
+- fee_payment.amount: everything paid on the fee
+- fee_payment.allocated: the part of it recorded here
+- amount - allocated: paid directly on the fee row (with the row's own
+  payment method and date)
+
+Revenue reports and the collection cube read both, so each rupee is
+counted once, under the method and date it was actually received.
+
+Example:
+- April: Rs. 2,000 cash on the fee row (amount 2,000, allocated 0)
+- May: allocate-payment Rs. 3,000 Easypaisa -> one allocation row of
+  3,000 (amount 5,000, allocated 3,000); April cash stays April cash
+"""
+
+from app import db
+from app.utils.money import Money, to_decimal
+from datetime import datetime
+
+
+class PaymentAllocation(db.Model):
+    """
+    Payment Allocation Model
+    
+    One part of a payment applied to one fee.
+    
+    Table name: payment_allocation
+    """
+    
+    __tablename__ = 'payment_allocation'
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Fee that received the money (Foreign Key)
+    fee_payment_id = db.Column(db.Integer, db.ForeignKey('fee_payment.id', ondelete='CASCADE'), nullable=False, index=True)
+    
+    # Payment the money came from (Foreign Key)
+    # NULL for money drawn from an advance-credit wallet
+    group_payment_id = db.Column(db.Integer, db.ForeignKey('group_payment.id', ondelete='SET NULL'), nullable=True, index=True)
+    
+    # Amount applied to the fee (integer paisa, read back as Decimal)
+    amount = db.Column(Money, nullable=False)
+    
+    # How and when this money was received (as on FeePayment)
+    payment_method = db.Column(db.String(20), nullable=False)
+    payment_date = db.Column(db.Date, nullable=False)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Revenue reports: a date range per method
+    __table_args__ = (
+        db.Index('ix_payment_allocation_date_method', 'payment_date', 'payment_method'),
+    )
+    
+    # ========== RELATIONSHIPS ==========
+    fee_payment = db.relationship(
+        'FeePayment',
+        backref=db.backref('allocations', lazy='dynamic', passive_deletes=True)
+    )
+    group_payment = db.relationship(
+        'GroupPayment',
+        backref=db.backref('allocations', lazy='dynamic', passive_deletes=True)
+    )
+    
+    # ========== METHODS ==========
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<PaymentAllocation fee={self.fee_payment_id} Rs. {self.amount} {self.payment_method}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'fee_payment_id': self.fee_payment_id,
+            'group_payment_id': self.group_payment_id,
+            'amount': to_decimal(self.amount),
+            'payment_method': self.payment_method,
+            'payment_date': self.payment_date.isoformat() if self.payment_date else None
+        }
@@ -81,6 +81,12 @@ class Student(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # ========== COMPOSITE INDEXES ==========
+    # Student list: class filter + active filter, newest student_id first
+    __table_args__ = (
+        db.Index('ix_student_class_active', 'class_grade_id', 'is_active', 'student_id'),
+    )
+    
     # ========== RELATIONSHIPS ==========
     # One student can have many fee payments
     fee_payments = db.relationship('FeePayment', backref='student', lazy='dynamic', cascade='all, delete-orphan')
@@ -117,6 +123,36 @@ class Student(db.Model):
         # Format: SCH-YYYY-XXXX
         self.student_id = f'SCH-{current_year}-{new_num:04d}'
     
+    def generate_admission_number(self):
+        """
+        Generate unique admission number
+        
+        Format: ADM-YYYY-XXXX
+        Example: ADM-2024-0001
+        
+        This is called automatically when a student is created.
+        """
+        from datetime import datetime
+        current_year = datetime.now().year
+        
+        # Get the last admission number for this year
+        last_student = Student.query.filter(
+            Student.admission_number.like(f'ADM-{current_year}-%')
+        ).order_by(Student.admission_number.desc()).first()
+        
+        if last_student:
+            # Extract number from last admission number and increment
+            try:
+                last_num = int(last_student.admission_number.split('-')[-1])
+                new_num = last_num + 1
+            except:
+                new_num = 1
+        else:
+            new_num = 1
+        
+        # Format: ADM-YYYY-XXXX
+        self.admission_number = f'ADM-{current_year}-{new_num:04d}'
+    
     def get_full_name(self):
         """Get student's full name"""
         return f"{self.first_name} {self.last_name}"
@@ -0,0 +1,237 @@
+"""
+Student Ledger Model
+
+This keeps one running balance row per student.
+
+Why this model?
+- The student page, defaulter lists and reports all need a student's balance
+- Without it, every page re-adds all of the student's fee payments
+- With it, a balance lookup is a single primary-key read
+
+How is it kept up to date?
+- Every flush that inserts, updates or deletes a FeePayment marks the
+  student as "dirty"; after the flush the dirty students' rows are
+  recomputed inside the same transaction (so they can never disagree)
+- Bulk jobs that bypass the ORM call StudentLedger.refresh() themselves
+- `flask rebuild-ledger` rebuilds every row in one pass
+
+Example:
+- Ahmed: charged Rs. 15,000, paid Rs. 10,000, outstanding Rs. 5,000
+"""
+
+from app import db
+from app.models.fee_payment import FeePayment
+from app.models.fee_structure import FeeStructure
+from app.models.archived_year import ArchivedStudentYear
+from app.utils.money import Money, paisa, to_decimal
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+class StudentLedger(db.Model):
+    """
+    Student Ledger Model
+    
+    One row per student that has fee records.
+    All values are derived from fee_payment (plus the summaries of
+    archived years), never edited by hand.
+    
+    Table name: student_ledger
+    """
+    
+    __tablename__ = 'student_ledger'
+    
+    # ========== COLUMNS (Database Fields) ==========
+    
+    # Student (Primary Key + Foreign Key): one ledger row per student
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), primary_key=True)
+    
+    # Money columns are stored as integer paisa and read back as Decimal
+    # (exact sums, see app/utils/money.py)
+    
+    # Total of all fees charged to the student (fee structure amounts)
+    total_charged = db.Column(Money, nullable=False, default=0)
+    
+    # Total of all money received from the student
+    total_paid = db.Column(Money, nullable=False, default=0)
+    
+    # Money still to collect on open fees (pending, partial, overdue)
+    outstanding = db.Column(Money, nullable=False, default=0)
+    
+    # Number of open fees
+    open_fees_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Date of the latest payment (None if nothing has been paid yet)
+    last_payment_date = db.Column(db.Date, nullable=True)
+    
+    # Timestamps
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # ========== RELATIONSHIPS ==========
+    # One student has one ledger row (student.ledger)
+    student = db.relationship(
+        'Student',
+        backref=db.backref('ledger', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    )
+    
+    # ========== METHODS ==========
+    
+    @staticmethod
+    def _balances_select(student_ids=None):
+        """
+        Build the SELECT that computes ledger rows from fee_payment
+        
+        One grouped query for all requested students.
+        Amounts are added up as integer paisa, so the totals are exact.
+        Archived years (ArchivedStudentYear) are added in as already-summed
+        rows; they never have open fees.
+        """
+        charged = FeePayment.charged_paisa()
+        paid = db.case((FeePayment.amount > 0, paisa(FeePayment.amount)), else_=0)
+        is_open = FeePayment.open_status_filter()
+        
+        # One row per live fee payment
+        live = db.select(
+            FeePayment.student_id.label('student_id'),
+            charged.label('charged'),
+            paid.label('paid'),
+            db.case((is_open, charged - paid), else_=0).label('outstanding'),
+            db.case((is_open, 1), else_=0).label('open_fees'),
+            db.case((FeePayment.amount > 0, FeePayment.payment_date), else_=None).label('paid_on')
+        ).join(
+            FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+        )
+        
+        # One row per student per archived year (money columns are paisa already)
+        archived_table = ArchivedStudentYear.__table__
+        archived = db.select(
+            archived_table.c.student_id,
+            archived_table.c.total_charged,
+            archived_table.c.total_paid,
+            db.literal_column('0'),
+            db.literal_column('0'),
+            archived_table.c.last_payment_date
+        )
+        
+        if student_ids is not None:
+            live = live.where(FeePayment.student_id.in_(student_ids))
+            archived = archived.where(archived_table.c.student_id.in_(student_ids))
+        
+        rows = db.union_all(live, archived).subquery('ledger_rows')
+        return db.select(
+            rows.c.student_id,
+            db.func.coalesce(db.func.sum(rows.c.charged), 0),
+            db.func.coalesce(db.func.sum(rows.c.paid), 0),
+            db.func.coalesce(db.func.sum(rows.c.outstanding), 0),
+            db.func.coalesce(db.func.sum(rows.c.open_fees), 0),
+            db.func.max(rows.c.paid_on),
+            db.literal(datetime.utcnow())
+        ).group_by(rows.c.student_id)
+    
+    @staticmethod
+    def refresh(student_ids=None, connection=None):
+        """
+        Recompute ledger rows in one set-based pass
+        
+        Parameters:
+        student_ids: Students to recompute (None = every student)
+        connection: Connection to use (defaults to the current session's),
+                    so the ledger is written in the caller's transaction
+        
+        Returns:
+        Number of ledger rows written
+        """
+        if student_ids is not None:
+            student_ids = list(student_ids)
+            if not student_ids:
+                return 0
+        
+        if connection is None:
+            connection = db.session.connection()
+        
+        table = StudentLedger.__table__
+        delete = table.delete()
+        if student_ids is not None:
+            delete = delete.where(table.c.student_id.in_(student_ids))
+        connection.execute(delete)
+        
+        insert = table.insert().from_select(
+            ['student_id', 'total_charged', 'total_paid', 'outstanding',
+             'open_fees_count', 'last_payment_date', 'updated_at'],
+            StudentLedger._balances_select(student_ids)
+        )
+        return connection.execute(insert).rowcount
+    
+    @staticmethod
+    def rebuild():
+        """
+        Rebuild the whole ledger from fee_payment and commit
+        
+        Used by `flask rebuild-ledger` (reconciliation).
+        """
+        count = StudentLedger.refresh()
+        db.session.commit()
+        return count
+    
+    @staticmethod
+    def get_for_student(student_id):
+        """Get a student's ledger row, or None if the student has no fees yet"""
+        return db.session.get(StudentLedger, student_id)
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<StudentLedger student={self.student_id} outstanding=Rs. {self.outstanding}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'student_id': self.student_id,
+            'total_charged': to_decimal(self.total_charged),
+            'total_paid': to_decimal(self.total_paid),
+            'outstanding': to_decimal(self.outstanding),
+            'open_fees_count': self.open_fees_count,
+            'last_payment_date': self.last_payment_date.isoformat() if self.last_payment_date else None
+        }
+
+
+# ========== EVENT LISTENERS ==========
+# Mark students whose fee payments changed; recompute them after the flush
+
+def _dirty_students(target):
+    """The set of students to recompute after the current flush"""
+    session = Session.object_session(target)
+    if session is None:
+        return set()
+    return session.info.setdefault('ledger_dirty_students', set())
+
+
+@event.listens_for(FeePayment, 'after_insert')
+@event.listens_for(FeePayment, 'after_update')
+@event.listens_for(FeePayment, 'after_delete')
+def mark_ledger_dirty(mapper, connection, target):
+    """Remember which students need their ledger row recomputed"""
+    dirty = _dirty_students(target)
+    dirty.add(target.student_id)
+    # If a payment was moved to another student, refresh the old student too
+    history = inspect(target).attrs.student_id.history
+    dirty.update(student_id for student_id in history.deleted if student_id is not None)
+
+
+@event.listens_for(FeeStructure, 'after_update')
+def mark_ledger_dirty_on_fee_change(mapper, connection, target):
+    """A changed fee amount changes what every student with that fee owes"""
+    if not inspect(target).attrs.amount.history.has_changes():
+        return
+    student_ids = connection.execute(
+        db.select(FeePayment.student_id).where(FeePayment.fee_structure_id == target.id).distinct()
+    ).scalars()
+    _dirty_students(target).update(student_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def refresh_dirty_ledgers(session, flush_context):
+    """Recompute ledger rows for students touched by this flush (same transaction)"""
+    dirty = session.info.pop('ledger_dirty_students', None)
+    if dirty:
+        StudentLedger.refresh(dirty, connection=session.connection())
@@ -0,0 +1,372 @@
+"""
+JSON API Routes (read-only, version 1)
+
+This blueprint serves the school's data as JSON under /api/v1, for apps
+that must not scrape the HTML pages (a cashier app, a parent portal):
+- /api/v1/students, /api/v1/students/<id>
+- /api/v1/families, /api/v1/families/<id> (with the family's students)
+- /api/v1/fee-structures, /api/v1/fee-structures/<id>
+- /api/v1/payments, /api/v1/payments/<id>
+- /api/v1/receipts, /api/v1/receipts/<id>
+- /api/v1/export/<students|payments|receipts>.<ndjson|csv>: the whole
+  table, streamed (app/utils/bulk_export.py)
+- /api/v1/analytics/<query>: analytic queries run by DuckDB on the
+  Parquet mirror, not on the live database (app/utils/analytics.py)
+
+Lists use keyset pagination:
+- Rows are ordered by id; a page is "the next `limit` rows after id X"
+- The response holds `next_cursor` (null on the last page); pass it back
+  as ?cursor= to get the next page
+- Unlike ?page=N, this costs the same on page 1 and page 500, and rows
+  added meanwhile do not shift the pages
+
+Conditional GET:
+- Every response has a strong ETag made from the data versions of the
+  tables it shows (app/models/data_version.py) and the query parameters
+- A client that sends it back in If-None-Match gets 304 Not Modified
+  as long as none of those tables changed. That check is ONE small
+  query: no rows are loaded and nothing is serialized
+
+The JSON bodies are built by the batch serializers (app/utils/serializers.py).
+The API uses the same login session as the web pages.
+"""
+
+from flask import Blueprint, Response, current_app, request, stream_with_context
+from flask_login import current_user
+from app import db
+from app.models import (
+    AcademicYear, DataVersion, Family, FeePayment, FeeStructure, PaymentReceipt, Student,
+    fee_structure_classes
+)
+from app.utils.analytics import QUERIES, AnalyticsError, run_query
+from app.utils.bulk_export import EXPORTS, FORMATS, export_chunks
+from app.utils.serializers import (
+    FamilySerializer, FeePaymentSerializer, FeeStructureSerializer, PaymentReceiptSerializer,
+    StudentSerializer, to_json
+)
+from datetime import date
+import base64
+import binascii
+import hashlib
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Tables each resource shows data from (its ETag changes when one of them changes)
+STUDENT_TABLES = [DataVersion.STUDENT, DataVersion.CLASS_GRADE]
+FAMILY_TABLES = [DataVersion.FAMILY, DataVersion.STUDENT]
+FEE_STRUCTURE_TABLES = [DataVersion.FEE_STRUCTURE, DataVersion.CLASS_GRADE, DataVersion.ACADEMIC_YEAR]
+PAYMENT_TABLES = [DataVersion.FEE_PAYMENT, DataVersion.STUDENT, DataVersion.FEE_STRUCTURE]
+RECEIPT_TABLES = [
+    DataVersion.PAYMENT_RECEIPT, DataVersion.FEE_PAYMENT, DataVersion.GROUP_PAYMENT,
+    DataVersion.FAMILY, DataVersion.STUDENT, DataVersion.FEE_STRUCTURE
+]
+
+
+class ApiError(Exception):
+    """Error returned to the client as JSON: {"error": message}"""
+    
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@bp.errorhandler(ApiError)
+def api_error(error):
+    """Render an ApiError as JSON (the app's error pages are HTML)"""
+    return Response(to_json({'error': error.message}), status=error.status, mimetype='application/json')
+
+
+@bp.before_request
+def require_login():
+    """API clients get 401 instead of a redirect to the login page"""
+    # Same switch as @login_required (e.g. the test config turns logins off)
+    if current_app.config.get('LOGIN_DISABLED'):
+        return
+    if not current_user.is_authenticated:
+        raise ApiError('Authentication required', 401)
+
+
+# ========== HELPERS ==========
+
+def _conditional(tables, build, *extra):
+    """
+    JSON response with an ETag; 304 if the client already has this version
+    
+    Parameters:
+    tables: DataVersion names the response shows data from
+    build: Function without arguments returning the response data
+           (only called when the client's copy is out of date)
+    extra: Anything else the response depends on (e.g. today's date)
+    """
+    versions = sorted(DataVersion.current(tables).items())
+    arguments = sorted(request.args.items(multi=True))
+    etag = hashlib.sha256(repr((request.path, arguments, versions, extra)).encode()).hexdigest()
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(to_json(build()), mimetype='application/json')
+    response.set_etag(etag)
+    # Clients may keep the response but must revalidate before using it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _encode_cursor(last_id):
+    """Opaque cursor for "rows after this id" """
+    return base64.urlsafe_b64encode(f'id:{last_id}'.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """Id encoded in a cursor (None if there is no cursor)"""
+    if not cursor:
+        return None
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        prefix, last_id = text.split(':')
+        if prefix != 'id':
+            raise ValueError(text)
+        return int(last_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiError('Invalid cursor')
+
+
+def _page(query, model, serializer):
+    """
+    One page of a list (keyset pagination on id)
+    
+    Returns:
+    Dictionary: {'data': [...], 'next_cursor': cursor or None}
+    """
+    limit = request.args.get('limit', current_app.config['API_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+    
+    after = _decode_cursor(request.args.get('cursor'))
+    if after is not None:
+        query = query.filter(model.id > after)
+    
+    # One extra row tells whether there is a next page
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'data': serializer().dump(rows),
+        'next_cursor': _encode_cursor(rows[-1].id) if has_more else None
+    }
+
+
+def _one(model, id, serializer):
+    """One object as {'data': {...}} (404 if it does not exist)"""
+    obj = db.session.get(model, id)
+    if obj is None:
+        raise ApiError(f'{model.__name__} {id} not found', 404)
+    return {'data': serializer().dump_one(obj)}
+
+
+def _flag(name):
+    """Boolean query parameter: True for 1/true, False for 0/false, None if missing"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    if value.lower() in ('1', 'true'):
+        return True
+    if value.lower() in ('0', 'false'):
+        return False
+    raise ApiError(f'{name} must be 1 or 0')
+
+
+# ========== STUDENTS ==========
+
+@bp.route('/students')
+def list_students():
+    """
+    Students
+    
+    URL: /api/v1/students?class_id=3&family_id=7&active=1&limit=50&cursor=...
+    """
+    def build():
+        query = Student.query
+        class_id = request.args.get('class_id', type=int)
+        if class_id:
+            query = query.filter(Student.class_grade_id == class_id)
+        family_id = request.args.get('family_id', type=int)
+        if family_id:
+            query = query.filter(Student.family_id == family_id)
+        active = _flag('active')
+        if active is not None:
+            query = query.filter(Student.is_active == active)
+        return _page(query, Student, StudentSerializer)
+    
+    # Ages change with the date
+    return _conditional(STUDENT_TABLES, build, date.today())
+
+
+@bp.route('/students/<int:id>')
+def get_student(id):
+    """URL: /api/v1/students/<id>"""
+    return _conditional(STUDENT_TABLES, lambda: _one(Student, id, StudentSerializer), date.today())
+
+
+# ========== FAMILIES ==========
+
+@bp.route('/families')
+def list_families():
+    """
+    Families
+    
+    URL: /api/v1/families?limit=50&cursor=...
+    """
+    return _conditional(FAMILY_TABLES, lambda: _page(Family.query, Family, FamilySerializer))
+
+
+@bp.route('/families/<int:id>')
+def get_family(id):
+    """
+    One family with its students
+    
+    URL: /api/v1/families/<id>
+    """
+    def build():
+        result = _one(Family, id, FamilySerializer)
+        students = Student.query.filter(Student.family_id == id).order_by(Student.id).all()
+        result['data']['students'] = StudentSerializer().dump(students)
+        return result
+    
+    return _conditional(FAMILY_TABLES + [DataVersion.CLASS_GRADE], build, date.today())
+
+
+# ========== FEE STRUCTURES ==========
+
+@bp.route('/fee-structures')
+def list_fee_structures():
+    """
+    Fee structures of an academic year (default: the current year)
+    
+    URL: /api/v1/fee-structures?academic_year_id=2&class_id=3&active=1
+    """
+    def build():
+        year_id = request.args.get('academic_year_id', type=int)
+        if not year_id:
+            current_year = AcademicYear.get_current()
+            year_id = current_year.id if current_year else None
+        query = FeeStructure.query.filter(FeeStructure.academic_year_id == year_id)
+        
+        class_id = request.args.get('class_id', type=int)
+        if class_id:
+            query = query.filter(FeeStructure.id.in_(
+                db.select(fee_structure_classes.c.fee_structure_id)
+                .where(fee_structure_classes.c.class_grade_id == class_id)
+            ))
+        active = _flag('active')
+        if active is not None:
+            query = query.filter(FeeStructure.is_active == active)
+        return _page(query, FeeStructure, FeeStructureSerializer)
+    
+    return _conditional(FEE_STRUCTURE_TABLES, build)
+
+
+@bp.route('/fee-structures/<int:id>')
+def get_fee_structure(id):
+    """URL: /api/v1/fee-structures/<id>"""
+    return _conditional(FEE_STRUCTURE_TABLES, lambda: _one(FeeStructure, id, FeeStructureSerializer))
+
+
+# ========== PAYMENTS ==========
+
+@bp.route('/payments')
+def list_payments():
+    """
+    Fee payments (archived payments only with archived=1)
+    
+    URL: /api/v1/payments?student_id=12&status=PAID&fee_structure_id=3&archived=1
+    """
+    def build():
+        query = FeePayment.query
+        if not _flag('archived'):
+            query = query.filter(FeePayment.is_archived == False)
+        student_id = request.args.get('student_id', type=int)
+        if student_id:
+            query = query.filter(FeePayment.student_id == student_id)
+        fee_structure_id = request.args.get('fee_structure_id', type=int)
+        if fee_structure_id:
+            query = query.filter(FeePayment.fee_structure_id == fee_structure_id)
+        status = request.args.get('status')
+        if status:
+            query = query.filter(FeePayment.status == status.upper())
+        return _page(query, FeePayment, FeePaymentSerializer)
+    
+    return _conditional(PAYMENT_TABLES, build)
+
+
+@bp.route('/payments/<int:id>')
+def get_payment(id):
+    """URL: /api/v1/payments/<id>"""
+    return _conditional(PAYMENT_TABLES, lambda: _one(FeePayment, id, FeePaymentSerializer))
+
+
+# ========== RECEIPTS ==========
+
+@bp.route('/receipts')
+def list_receipts():
+    """
+    Payment receipts (individual and group)
+    
+    URL: /api/v1/receipts?receipt_number=RCP-2025-00012
+    """
+    def build():
+        query = PaymentReceipt.query
+        receipt_number = request.args.get('receipt_number')
+        if receipt_number:
+            query = query.filter(PaymentReceipt.receipt_number == receipt_number)
+        return _page(query, PaymentReceipt, PaymentReceiptSerializer)
+    
+    return _conditional(RECEIPT_TABLES, build)
+
+
+@bp.route('/receipts/<int:id>')
+def get_receipt(id):
+    """URL: /api/v1/receipts/<id>"""
+    return _conditional(RECEIPT_TABLES, lambda: _one(PaymentReceipt, id, PaymentReceiptSerializer))
+
+
+# ========== BULK EXPORT ==========
+
+@bp.route('/export/<name>.<fmt>')
+def export(name, fmt):
+    """
+    Whole table as NDJSON or CSV, streamed while it is read
+    
+    URL: /api/v1/export/payments.ndjson
+    Gzip-compressed on the fly when the client accepts gzip.
+    """
+    if name not in EXPORTS or fmt not in FORMATS:
+        raise ApiError(f'No export {name}.{fmt}', 404)
+    
+    compress = 'gzip' in request.accept_encodings
+    response = Response(stream_with_context(export_chunks(name, fmt, compress)), mimetype=FORMATS[fmt])
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Content-Disposition'] = f'attachment; filename={name}_{date.today():%Y%m%d}.{fmt}'
+    return response
+
+
+# ========== ANALYTICS ==========
+
+@bp.route('/analytics/<name>')
+def analytics(name):
+    """
+    Named analytic query on the Parquet mirror (collection_by_month, fee_type_trend, year_over_year)
+    
+    URL: /api/v1/analytics/fee_type_trend
+    The data is as fresh as the last `flask analytics-sync` (see 'synced').
+    """
+    if name not in QUERIES:
+        raise ApiError(f'No analytics query {name}', 404)
+    try:
+        result = run_query(name)
+    except AnalyticsError as e:
+        # Mirror not synced yet or optional package missing
+        raise ApiError(str(e), 503)
+    return Response(to_json(result), mimetype='application/json')
@@ -0,0 +1,52 @@
+"""
+Reconciliation Routes
+
+This blueprint handles checking digital payments against a provider's
+statement file:
+- Upload an Easypaisa / JazzCash / bank statement (CSV or XLSX)
+- See which lines matched, which did not, and which payments are missing
+- Optionally mark the matched payments as verified
+
+The matching itself is done in app/utils/reconciliation.py.
+"""
+
+from flask import Blueprint, render_template, request, flash
+from flask_login import login_required
+from flask_babel import gettext as _
+from app.utils.reconciliation import PROVIDERS, ReconciliationError, reconcile
+
+bp = Blueprint('reconciliation', __name__, url_prefix='/reconciliation')
+
+
+@bp.route('/', methods=['GET', 'POST'])
+@login_required
+def statement():
+    """
+    Upload a statement and show the reconciliation
+    
+    URL: /reconciliation/
+    POST fields: provider, statement (file), apply (checkbox)
+    """
+    report = None
+    provider = request.form.get('provider', 'easypaisa')
+    
+    if request.method == 'POST':
+        upload = request.files.get('statement')
+        if not upload or not upload.filename:
+            flash(_('Please choose a statement file.'), 'warning')
+        else:
+            try:
+                report = reconcile(upload.stream, upload.filename, provider, apply=request.form.get('apply') == '1')
+            except ReconciliationError as e:
+                flash(str(e), 'danger')
+            else:
+                if report['applied']:
+                    flash(_('Verification status saved for the matched payments.'), 'success')
+    
+    return render_template(
+        'reconciliation/statement.html',
+        report=report,
+        providers=PROVIDERS,
+        provider=provider,
+        title=_('Statement Reconciliation')
+    )
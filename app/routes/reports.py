@@ -0,0 +1,243 @@
+"""
+Report Routes
+
+This blueprint handles the report pages:
+- Revenue report (daily / monthly / yearly, by payment method, class or fee type)
+- Class-wise / month-wise collection (read from the collection cube)
+- Class fee matrix: students x months, paid / partial / overdue (+ Excel)
+- Cash-flow forecast: expected collections of the coming months
+
+The numbers are computed in app/utils/reports.py.
+"""
+
+from flask import Blueprint, render_template, request, send_file, redirect, url_for
+from flask_login import login_required
+from flask_babel import gettext as _
+from app import db
+from app.models import AcademicYear, ClassGrade, CollectionCube, DataVersion
+from app.utils.reports import revenue_report, PERIODS, GROUPINGS
+from app.utils.fee_matrix import class_fee_matrix, matrix_workbook
+from app.utils.defaulter_export import write_defaulter_workbook
+from app.utils.forecast import cash_flow_forecast
+from app.utils.report_cache import cached_file, cached_report
+from datetime import date, datetime
+
+bp = Blueprint('reports', __name__, url_prefix='/reports')
+
+# Tables every report here reads (cache keys include their data versions)
+# (credit_entry: the revenue report counts advance payments kept as credit)
+REPORT_TABLES = [
+    DataVersion.FEE_PAYMENT, DataVersion.STUDENT, DataVersion.FEE_STRUCTURE, DataVersion.CLASS_GRADE,
+    DataVersion.CREDIT_ENTRY
+]
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _date_arg(name, default):
+    """Read a YYYY-MM-DD query parameter (default if missing or invalid)"""
+    try:
+        return datetime.strptime(request.args.get(name, ''), '%Y-%m-%d').date()
+    except ValueError:
+        return default
+
+
+@bp.route('/revenue')
+@login_required
+def revenue():
+    """
+    Revenue report
+    
+    URL: /reports/revenue?start=2025-04-01&end=2026-03-31&period=month&by=method
+    Defaults to the current academic year, by month.
+    """
+    current_year = AcademicYear.get_current()
+    start = _date_arg('start', current_year.start_date if current_year else None)
+    end = _date_arg('end', current_year.end_date if current_year else None)
+    
+    period = request.args.get('period', 'month')
+    if period not in PERIODS:
+        period = 'month'
+    by = request.args.get('by') or None
+    if by not in GROUPINGS:
+        by = None
+    include_archived = request.args.get('archived') == '1'
+    
+    report = cached_report(
+        'revenue',
+        {'start': start, 'end': end, 'period': period, 'by': by, 'archived': include_archived},
+        REPORT_TABLES,
+        lambda: revenue_report(start, end, period=period, by=by, include_archived=include_archived)
+    )
+    
+    return render_template(
+        'reports/revenue.html',
+        report=report,
+        start=start,
+        end=end,
+        period=period,
+        by=by,
+        include_archived=include_archived,
+        title=_('Revenue Report')
+    )
+
+
+@bp.route('/collections')
+@login_required
+def collections():
+    """
+    Class x month collection report
+    
+    URL: /reports/collections?year=<academic_year_id>
+    Charged vs collected per class and month (the month the fee is due in).
+    Reads the collection cube: a few small rows, no fee_payment scan.
+    """
+    year_id = request.args.get('year', type=int)
+    year = db.session.get(AcademicYear, year_id) if year_id else AcademicYear.get_current()
+    years = AcademicYear.query.order_by(AcademicYear.start_date.desc()).all()
+    
+    cells = CollectionCube.totals(year.id, group_by=('class_grade_id', 'month')) if year else []
+    months = sorted({cell['month'] for cell in cells})
+    class_names = dict(db.session.execute(db.select(ClassGrade.id, ClassGrade.class_name)).all())
+    
+    # Pivot: one row per class, one {charged, collected} per month
+    rows = {}
+    for cell in cells:
+        row = rows.setdefault(cell['class_grade_id'], {
+            'class_name': class_names.get(cell['class_grade_id'], _('No class')),
+            'months': {},
+            'charged': 0,
+            'collected': 0
+        })
+        row['months'][cell['month']] = cell
+        row['charged'] += cell['charged']
+        row['collected'] += cell['collected']
+    
+    month_totals = {month: sum(cell['collected'] for cell in cells if cell['month'] == month) for month in months}
+    
+    return render_template(
+        'reports/collections.html',
+        year=year,
+        years=years,
+        months=months,
+        rows=sorted(rows.values(), key=lambda row: row['class_name']),
+        month_totals=month_totals,
+        total_charged=sum(cell['charged'] for cell in cells),
+        total_collected=sum(cell['collected'] for cell in cells),
+        title=_('Collection Report')
+    )
+
+
+def _matrix_class():
+    """Class chosen with ?class=<id> (defaults to the first active class)"""
+    classes = ClassGrade.get_active()
+    class_id = request.args.get('class', type=int)
+    selected = next((c for c in classes if c.id == class_id), classes[0] if classes else None)
+    return classes, selected
+
+
+@bp.route('/class-matrix')
+@login_required
+def class_matrix():
+    """
+    Class fee matrix
+    
+    URL: /reports/class-matrix?class=<class_grade_id>
+    Every active student of the class against each month of the current
+    academic year (paid / partial / pending / overdue).
+    """
+    classes, selected = _matrix_class()
+    matrix = class_fee_matrix(selected.id) if selected else {'months': [], 'students': [], 'paid_counts': []}
+    
+    return render_template(
+        'reports/class_matrix.html',
+        classes=classes,
+        selected=selected,
+        matrix=matrix,
+        year=AcademicYear.get_current(),
+        title=_('Class Fee Matrix')
+    )
+
+
+@bp.route('/class-matrix/export')
+@login_required
+def export_class_matrix():
+    """
+    Class fee matrix as Excel
+    
+    URL: /reports/class-matrix/export?class=<class_grade_id>
+    """
+    classes, selected = _matrix_class()
+    if not selected:
+        return redirect(url_for('reports.class_matrix'))
+    
+    year = AcademicYear.get_current()
+    output = cached_file(
+        'class_matrix',
+        {'class': selected.id, 'year': year.id if year else None, 'today': date.today()},
+        REPORT_TABLES,
+        lambda f: f.write(matrix_workbook(class_fee_matrix(selected.id, year), selected.class_name).getvalue())
+    )
+    filename = f"fee_matrix_{selected.class_code}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    
+    return send_file(
+        output,
+        mimetype=XLSX_MIMETYPE,
+        as_attachment=True,
+        download_name=filename
+    )
+
+
+@bp.route('/defaulters/export')
+@login_required
+def export_defaulters():
+    """
+    Defaulter list as Excel (one sheet per class + summary)
+    
+    URL: /reports/defaulters/export
+    The workbook is streamed into the report cache folder, not built in
+    memory, and reused until a payment or student changes (or the day ends).
+    """
+    today = date.today()
+    output = cached_file(
+        'defaulters',
+        {'today': today},
+        REPORT_TABLES,
+        lambda f: write_defaulter_workbook(f, today=today)
+    )
+    filename = f"defaulters_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    
+    return send_file(
+        output,
+        mimetype=XLSX_MIMETYPE,
+        as_attachment=True,
+        download_name=filename
+    )
+
+
+@bp.route('/forecast')
+@login_required
+def forecast():
+    """
+    Cash-flow forecast
+    
+    URL: /reports/forecast?months=6
+    Expected collections per class and month, from enrolment, fee amounts
+    and each class's payment history (see app/utils/forecast.py).
+    Cached per day, and rebuilt when a payment, student or fee changes.
+    """
+    months = min(max(request.args.get('months', 6, type=int), 1), 12)
+    today = date.today()
+    report = cached_report(
+        'cash_flow_forecast',
+        {'today': today, 'months': months},
+        REPORT_TABLES,
+        lambda: cash_flow_forecast(today, months=months)
+    )
+    
+    return render_template(
+        'reports/forecast.html',
+        report=report,
+        months=months,
+        title=_('Cash-Flow Forecast')
+    )
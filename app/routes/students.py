@@ -6,6 +6,7 @@ This blueprint handles all student-related routes:
 - Add student
 - Edit student
 - View student details
+- Full payment history (including archived years)
 - Delete/deactivate student
 - Search and filter
 - Export to Excel
@@ -15,7 +16,8 @@ from flask import Blueprint, render_template, request, flash, redirect, url_for,
 from flask_login import login_required, current_user
 from flask_babel import gettext as _
 from app import db
-from app.models import Student, ClassGrade, Family, FeePayment
+from app.models import Student, ClassGrade, Family, FeePayment, StudentLedger, LateFeeCharge, CreditWallet
+from app.utils.fee_resolver import FeeResolver
 from app.forms import StudentForm, StudentEditForm
 from sqlalchemy import or_
 from datetime import date
@@ -80,7 +82,7 @@ def list_students():
     students = pagination.items
     
     # Get all classes for filter dropdown
-    classes = ClassGrade.query.filter_by(is_active=True).order_by(ClassGrade.order).all()
+    classes = ClassGrade.get_active()
     
     # current_language is automatically injected by context processor
     return render_template(
@@ -109,7 +111,7 @@ def add_student():
     
     # Populate class dropdown
     form.class_grade_id.choices = [(0, _('-- Select Class --'))] + [
-        (c.id, c.class_name) for c in ClassGrade.query.filter_by(is_active=True).order_by(ClassGrade.order).all()
+        (c.id, c.class_name) for c in ClassGrade.get_active()
     ]
     
     # Populate family dropdown
@@ -170,14 +172,21 @@ def view_student(id):
     # Get student's payment history
     payments = FeePayment.query.filter_by(student_id=student.id).order_by(FeePayment.payment_date.desc()).limit(10).all()
     
-    # Get pending fees
-    pending_payments = FeePayment.query.filter(
-        FeePayment.student_id == student.id,
-        FeePayment.status.in_(['PENDING', 'OVERDUE', 'PARTIAL'])
-    ).all()
+    # Pending fees come from the student's ledger row (one primary-key read)
+    # No row yet means the student has no fees
+    ledger = StudentLedger.get_for_student(student.id)
+    total_pending = ledger.outstanding if ledger else 0
+    open_fees_count = ledger.open_fees_count if ledger else 0
     
-    # Calculate total pending
-    total_pending = sum(float(p.amount) for p in pending_payments)
+    # Late fees still owed (open surcharge fees, already part of total_pending): one indexed sum
+    late_fees = LateFeeCharge.outstanding_for_student(student.id)
+    
+    # Advance credit (student and family wallets): one query
+    credit = CreditWallet.available_for_student(student.id, student.family_id)
+    
+    # Fees of the student's class this year (from the cached fee resolver, no query)
+    resolver = FeeResolver.current()
+    class_fees = resolver.fees_for_student(student) if resolver else ()
     
     # Get family members (siblings) if student has family
     siblings = []
@@ -191,13 +200,38 @@ def view_student(id):
         'students/view.html',
         student=student,
         payments=payments,
-        pending_payments=pending_payments,
         total_pending=total_pending,
+        open_fees_count=open_fees_count,
+        late_fees=late_fees,
+        credit=credit,
+        class_fees=class_fees,
         siblings=siblings,
         title=_('Student Details')
     )
 
 
+@bp.route('/<int:id>/payments')
+@login_required
+def payment_history(id):
+    """
+    Full payment history of a student
+    
+    URL: /students/<id>/payments
+    Includes payments of archived years (read from their archive files).
+    """
+    from app.utils.archive import student_payment_history
+    
+    student = Student.query.get_or_404(id)
+    payments = student_payment_history(student.id)
+    
+    return render_template(
+        'students/payments.html',
+        student=student,
+        payments=payments,
+        title=_('Payment History')
+    )
+
+
 @bp.route('/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_student(id):
@@ -213,7 +247,7 @@ def edit_student(id):
     
     # Populate dropdowns
     form.class_grade_id.choices = [(0, _('-- Select Class --'))] + [
-        (c.id, c.class_name) for c in ClassGrade.query.filter_by(is_active=True).order_by(ClassGrade.order).all()
+        (c.id, c.class_name) for c in ClassGrade.get_active()
     ]
     
     form.family_id.choices = [(0, _('-- No Family --'))] + [
@@ -0,0 +1,11 @@
+"""
+Utilities Package
+
+This package contains helper modules that are used by routes,
+models and CLI commands but are not routes or models themselves.
+
+Why separate utilities?
+- Keeps routes short (they only handle the request/response)
+- The same logic can be used from a route and from a CLI command
+- Easier to test on their own
+"""
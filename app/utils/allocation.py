@@ -0,0 +1,348 @@
+"""
+Payment Allocation (oldest dues first)
+
+This takes one lump sum from a parent and spreads it over a student's
+(or a whole family's) open fees, oldest due date first.
+
+Why an allocation service?
+- FeePayment.update_status() only looks at one row: paying three months
+  at once meant creating / editing three payments by hand, with three
+  receipts
+- Here the open dues are loaded ONCE (one query, ordered by due date),
+  the amount is allocated in memory (FIFO), and all rows are written with
+  executemany statements (the fee UPDATEs and one allocation INSERT)
+
+Example: dues of 5,000 (April, 2,000 already paid), 5,000 (May), 5,000 (June)
+    allocate 9,000 -> April +3,000 (PAID), May +5,000 (PAID), June +1,000 (PARTIAL)
+
+The payment itself is recorded as one GroupPayment (total amount, method,
+transaction ID) with a single receipt. What each fee received is one
+PaymentAllocation row (with the payment's method and date), so a fee that
+was already partly paid keeps its own method and date: only its amount,
+status and allocated total change. A fee without any money yet also takes
+the payment's method, date and group, for the student page.
+
+Whatever is left once every open fee is paid (an advance payment) goes to
+the payer's credit wallet: the family's when paying for a family, the
+student's when paying for one student (app/utils/credit.py). The next fee
+generation run pays the new fees from it.
+
+Fees that carry no discount and no money yet (e.g. created before the
+rule existed) are priced with the current discount rules (app/utils/discounts.py) first, so
+a sibling discount or scholarship is never missed at the cash counter.
+An installment is priced like generate-installments does: the discount of
+the whole fee, split over the parts.
+
+Amounts are added up as integer paisa, so no rounding drift.
+"""
+
+from app import db
+from app.models import (
+    CollectionCube, DataVersion, FeeInstallment, FeePayment, FeeStructure, GroupPayment, InstallmentPlan,
+    PaymentAllocation, PaymentReceipt, Student, StudentLedger
+)
+from app.models.counters import refresh_counters
+from app.utils.credit import deposit
+from app.utils.discounts import DiscountTable, family_sizes
+from app.utils.money import from_paisa, to_paisa
+from datetime import date, datetime
+from decimal import InvalidOperation
+from sqlalchemy.orm import selectinload
+
+
+class AllocationError(Exception):
+    """Raised when an amount cannot be allocated (nothing is changed)"""
+
+
+def open_dues(student_id=None, family_id=None):
+    """
+    Open fees of a student or of every student in a family, oldest first
+    
+    One query. Amounts are integer paisa; fee_amount is net of the discount.
+    
+    Returns:
+    List of dictionaries: id, student_id, class_grade_id, family_id, fee_type,
+    due_date, paid, gross_amount, discount, discount_rule_id, fee_amount,
+    installment_id, structure_amount (the whole fee, for installments)
+    """
+    statement = db.select(
+        FeePayment.id,
+        FeePayment.student_id,
+        FeePayment.class_grade_id,  # the class charged, as at generation
+        Student.family_id,
+        FeeStructure.fee_type,
+        FeePayment.due_date,
+        FeePayment.amount,
+        FeePayment.due_amount(),
+        FeePayment.discount,
+        FeePayment.discount_rule_id,
+        FeePayment.installment_id,
+        FeeStructure.amount
+    ).join(
+        FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+    ).join(
+        Student, Student.id == FeePayment.student_id
+    ).where(
+        FeePayment.open_status_filter(),
+        FeePayment.is_archived == False
+    ).order_by(FeePayment.due_date, FeePayment.id)
+    
+    if student_id is not None:
+        statement = statement.where(FeePayment.student_id == student_id)
+    else:
+        statement = statement.where(Student.family_id == family_id)
+    
+    dues = []
+    for (id, student, class_id, family, fee_type, due_date, paid, gross, discount, rule_id,
+         installment_id, structure_amount) in db.session.execute(statement):
+        gross, discount = to_paisa(gross), to_paisa(discount) or 0
+        dues.append({
+            'id': id, 'student_id': student, 'class_grade_id': class_id, 'family_id': family,
+            'fee_type': fee_type, 'due_date': due_date, 'paid': to_paisa(paid), 'gross_amount': gross,
+            'discount': discount, 'discount_rule_id': rule_id, 'fee_amount': gross - discount,
+            'installment_id': installment_id, 'structure_amount': to_paisa(structure_amount)
+        })
+    return dues
+
+
+def _installment_parts(installment_ids):
+    """
+    Plan of each installment and the part's position in it
+    
+    Returns:
+    {installment_id: (InstallmentPlan, index)}
+    """
+    if not installment_ids:
+        return {}
+    plan_ids = db.session.execute(
+        db.select(FeeInstallment.plan_id).where(FeeInstallment.id.in_(list(installment_ids))).distinct()
+    ).scalars().all()
+    plans = InstallmentPlan.query.options(selectinload(InstallmentPlan.installments)).filter(
+        InstallmentPlan.id.in_(plan_ids)
+    )
+    return {
+        part.id: (plan, index)
+        for plan in plans
+        for index, part in enumerate(plan.installments)
+        if part.id in installment_ids
+    }
+
+
+def apply_discounts(dues):
+    """
+    Price the unpaid dues that carry no discount yet with the current rules (in place)
+    
+    One grouped query for the family sizes (plus two for the installment
+    plans, when installments are due), the rest from the compiled
+    DiscountTable. Dues that get a discount are marked 'repriced'.
+    
+    An installment gets its share of the whole fee's discount, split like
+    the fee (InstallmentPlan.split_paisa), never the discount of a fee the
+    size of the part: a FIXED rule applies once per fee.
+    
+    Dues that already received money are left as they are: a discount
+    could bring the fee below what was paid, and the excess would be lost.
+    """
+    table = DiscountTable.current()
+    # Late-fee surcharges are penalties: discount rules never reprice them
+    pending = [
+        due for due in dues
+        if not due['discount'] and due['discount_rule_id'] is None and not due['paid']
+        and due['fee_type'] != FeeStructure.FEE_TYPE_LATE
+    ]
+    if not table or not pending:
+        return dues
+    sizes = family_sizes({due['family_id'] for due in pending})
+    parts = _installment_parts({due['installment_id'] for due in pending if due.get('installment_id')})
+    for due in pending:
+        part = parts.get(due.get('installment_id'))
+        discount, rule_id = table.discount_for(
+            due['student_id'], due['class_grade_id'], due['fee_type'],
+            sizes.get(due['family_id'], 0), due['structure_amount'] if part else due['gross_amount']
+        )
+        if part and discount:
+            plan, index = part
+            discount = min(plan.split_paisa(discount)[index], due['gross_amount'])
+        if discount:
+            due.update(discount=discount, discount_rule_id=rule_id,
+                       fee_amount=due['gross_amount'] - discount, repriced=True)
+    return dues
+
+
+def plan_allocation(dues, amount, today=None):
+    """
+    Spread an amount (paisa) over dues, oldest first (no database access)
+    
+    Status follows FeePayment.update_status(): PAID when the fee is covered,
+    otherwise PARTIAL, or OVERDUE once the due date has passed.
+    
+    Returns:
+    (allocations, unallocated paisa): allocations are the dues that receive
+    money (or were repriced by apply_discounts()), with 'allocated',
+    'new_paid' and 'new_status' added
+    """
+    today = today or date.today()
+    remaining = amount
+    allocations = []
+    for due in dues:
+        outstanding = due['fee_amount'] - due['paid']
+        allocated = min(remaining, outstanding) if outstanding > 0 else 0
+        if not allocated and not due.get('repriced'):
+            continue
+        remaining -= allocated
+        new_paid = due['paid'] + allocated
+        status = FeePayment.status_for(new_paid, due['fee_amount'], due['due_date'], today)
+        allocations.append(dict(due, allocated=allocated, new_paid=new_paid, new_status=status))
+    return allocations, remaining
+
+
+def allocate_payment(amount, created_by_id, student_id=None, family_id=None,
+                     payment_method=FeePayment.PAYMENT_CASH, payment_date=None,
+                     transaction_id=None, account_name=None, dry_run=False):
+    """
+    Record one payment and allocate it over the open dues, oldest first
+    
+    Parameters:
+    amount: Amount received (Decimal / number)
+    created_by_id: User recording the payment
+    student_id / family_id: Whose dues to pay (exactly one of them)
+    payment_method, payment_date, transaction_id, account_name: As on FeePayment
+    dry_run: Compute the allocation, then roll back
+    
+    Returns:
+    Report dictionary: group_payment_number, receipt_number, allocations, amount,
+    credited (the part kept as advance credit), dry_run
+    """
+    if (student_id is None) == (family_id is None):
+        raise AllocationError('Give either a student or a family.')
+    try:
+        amount_paisa = to_paisa(amount)
+    except (InvalidOperation, TypeError):
+        raise AllocationError(f'Not an amount: {amount}')
+    if not amount_paisa or amount_paisa <= 0:
+        raise AllocationError('The amount must be greater than zero.')
+    
+    dues = apply_discounts(open_dues(student_id=student_id, family_id=family_id))
+    allocations, unallocated = plan_allocation(dues, amount_paisa)
+    
+    # The rest is advance credit of whoever paid (the family, or the one student)
+    wallet_owner = {'family_id': family_id} if family_id is not None else {'student_id': student_id}
+    if family_id is None:
+        family_id = db.session.execute(db.select(Student.family_id).where(Student.id == student_id)).scalar()
+    
+    try:
+        # One payment record and one receipt for the whole amount
+        group = GroupPayment(
+            family_id=family_id,
+            total_amount=from_paisa(amount_paisa),
+            payment_method=payment_method,
+            payment_date=payment_date or date.today(),
+            transaction_id=transaction_id,
+            account_name=account_name,
+            status=GroupPayment.STATUS_PAID,
+            created_by_id=created_by_id
+        )
+        db.session.add(group)
+        db.session.flush()
+        db.session.add(PaymentReceipt(group_payment_id=group.id, receipt_number=group.receipt_number,
+                                      receipt_date=group.payment_date))
+        
+        # Allocated fees: one executemany UPDATE for the fees without money
+        # yet (they take this payment's method, date and group) and one for
+        # the fees already partly paid (they keep theirs)
+        table = FeePayment.__table__
+        now = datetime.utcnow()
+        by_id = table.c.id == db.bindparam('b_id')
+        paid_rows = [row for row in allocations if row['allocated']]
+        paid_values = dict(
+            amount=db.bindparam('b_amount'),
+            allocated=table.c.allocated + db.bindparam('b_allocated', type_=table.c.allocated.type),
+            status=db.bindparam('b_status'),
+            discount=db.bindparam('b_discount'),
+            discount_rule_id=db.bindparam('b_rule_id'),
+            updated_at=now
+        )
+        first_payment = {'payment_method': payment_method, 'payment_date': group.payment_date,
+                         'group_payment_id': group.id}
+        for rows, extra in (([row for row in paid_rows if not row['paid']], first_payment),
+                            ([row for row in paid_rows if row['paid']], {})):
+            if not rows:
+                continue
+            db.session.execute(
+                table.update().where(by_id).values(**paid_values, **extra),
+                [
+                    {'b_id': row['id'], 'b_amount': from_paisa(row['new_paid']),
+                     'b_allocated': from_paisa(row['allocated']), 'b_status': row['new_status'],
+                     'b_discount': from_paisa(row['discount']), 'b_rule_id': row['discount_rule_id']}
+                    for row in rows
+                ]
+            )
+        
+        # What each fee received from this payment
+        if paid_rows:
+            db.session.execute(PaymentAllocation.__table__.insert(), [
+                {'fee_payment_id': row['id'], 'group_payment_id': group.id, 'amount': from_paisa(row['allocated']),
+                 'payment_method': payment_method, 'payment_date': group.payment_date, 'created_at': now}
+                for row in paid_rows
+            ])
+        
+        # Repriced fees that received no money: only the discount (and status) change
+        repriced_rows = [row for row in allocations if not row['allocated']]
+        if repriced_rows:
+            db.session.execute(
+                table.update().where(by_id).values(
+                    status=db.bindparam('b_status'),
+                    discount=db.bindparam('b_discount'),
+                    discount_rule_id=db.bindparam('b_rule_id'),
+                    updated_at=now
+                ),
+                [
+                    {'b_id': row['id'], 'b_status': row['new_status'],
+                     'b_discount': from_paisa(row['discount']), 'b_rule_id': row['discount_rule_id']}
+                    for row in repriced_rows
+                ]
+            )
+        
+        # More than the open fees: keep the rest as advance credit
+        if unallocated:
+            deposit(unallocated, created_by_id, group_payment_id=group.id,
+                    payment_method=payment_method, payment_date=group.payment_date, **wallet_owner)
+        
+        # Core UPDATEs skip the ORM events: refresh the derived tables here
+        connection = db.session.connection()
+        if allocations:
+            payment_ids = [row['id'] for row in allocations]
+            StudentLedger.refresh({row['student_id'] for row in allocations}, connection=connection)
+            CollectionCube.refresh_where(FeePayment.id.in_(payment_ids), connection=connection)
+            DataVersion.bump([DataVersion.FEE_PAYMENT], connection=connection)
+        refresh_counters(family_ids=[], class_ids=[], group_payment_ids=[group.id])
+        
+        report = {
+            'group_payment_number': group.group_payment_number,
+            'receipt_number': group.receipt_number,
+            'amount': from_paisa(amount_paisa),
+            'allocations': [
+                {
+                    'id': row['id'],
+                    'student_id': row['student_id'],
+                    'due_date': row['due_date'],
+                    'allocated': from_paisa(row['allocated']),
+                    'paid': from_paisa(row['new_paid']),
+                    'fee_amount': from_paisa(row['fee_amount']),
+                    'discount': from_paisa(row['discount']),
+                    'status': row['new_status']
+                }
+                for row in allocations
+            ],
+            'credited': from_paisa(unallocated),
+            'dry_run': dry_run
+        }
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return report
@@ -0,0 +1,338 @@
+"""
+Analytics Mirror (Parquet + DuckDB)
+
+This keeps a read-only copy of the fee data as Parquet files, and runs
+analytic queries (year-over-year collection, fee-type trends) on that copy
+with DuckDB instead of on the live database.
+
+Why a mirror?
+- Analytic queries scan every payment of several years; on the live SQLite
+  file they compete with the cashiers' writes (SQLite has one writer and
+  long reads keep the WAL from being checkpointed)
+- Parquet is columnar and compressed: a scan reads only the columns it
+  needs, and DuckDB aggregates millions of rows in well under a second
+
+How is it refreshed? (`flask analytics-sync`)
+- For each mirrored table, rows changed since the last sync
+  (updated_at, or created_at for rows never updated, after the table's
+  high-water mark) are read in batches and written as new Parquet files
+- Files are partitioned by academic year and month, e.g.
+  fee_payment/academic_year=2025-2026/month=2025-08/part-<sync>-<n>.parquet
+- The high-water marks are kept in _state.json in the mirror folder.
+  A row changed again later is simply written again; the DuckDB views keep
+  the newest copy of each id
+- Every sync also writes the list of ids that still exist (_ids/), so rows
+  deleted from the live database (e.g. by archive-year) drop out of the views
+- `flask analytics-sync --full` rewrites the mirror from scratch (also
+  merges the many small files written by incremental syncs)
+
+The rows are read a little before the high-water mark (SYNC_OVERLAP),
+so a transaction that committed late with an older timestamp is not missed.
+
+pyarrow and duckdb are only needed for this feature; they are imported
+when it is used.
+"""
+
+from app import db
+from app.models import AcademicYear, FeePayment, FeeStructure, GroupPayment, Student
+from flask import current_app
+from datetime import datetime, timedelta
+import glob
+import importlib
+import json
+import os
+import shutil
+import tempfile
+
+# Rows read from the database (and written per Parquet file) at a time
+BATCH_SIZE = 50000
+
+# Rows changed up to this long before the high-water mark are read again
+SYNC_OVERLAP = timedelta(minutes=10)
+
+# Partition value for rows without a year / month
+NO_PARTITION = 'none'
+
+
+class AnalyticsError(Exception):
+    """Raised when the mirror cannot be used (missing package, never synced, unknown query)"""
+
+
+def _require(module_name):
+    """Import an optional package, with a clear message if it is missing"""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        package = module_name.split('.')[0]
+        raise AnalyticsError(f'The analytics mirror needs the {package} package (pip install {package}).')
+
+
+def mirror_dir():
+    """Folder of the Parquet mirror (ANALYTICS_DIR)"""
+    return current_app.config['ANALYTICS_DIR']
+
+
+# ========== MIRRORED TABLES ==========
+
+def _year_of_fee():
+    """Academic year name of a fee structure"""
+    return db.select(AcademicYear.year_name).where(
+        AcademicYear.id == FeeStructure.academic_year_id
+    ).scalar_subquery()
+
+
+def _year_of_payment():
+    """Academic year name of a fee payment (the year of its fee structure)"""
+    return db.select(AcademicYear.year_name).join(
+        FeeStructure, FeeStructure.academic_year_id == AcademicYear.id
+    ).where(
+        FeeStructure.id == FeePayment.fee_structure_id
+    ).scalar_subquery()
+
+
+def _year_of_date(column):
+    """Academic year name whose dates contain the given date"""
+    return db.select(AcademicYear.year_name).where(
+        AcademicYear.start_date <= column,
+        AcademicYear.end_date >= column
+    ).limit(1).scalar_subquery()
+
+
+# Table name -> (model, extra partition columns, column whose month is the month partition)
+MIRRORED = {
+    'fee_payment': (FeePayment, lambda: [_year_of_payment().label('academic_year')], 'due_date'),
+    'fee_structure': (FeeStructure, lambda: [_year_of_fee().label('academic_year')], None),
+    'group_payment': (GroupPayment, lambda: [
+        _year_of_date(GroupPayment.payment_date).label('academic_year')
+    ], 'payment_date'),
+    'student': (Student, lambda: [], None),
+}
+
+
+def _arrow_type(pa, column):
+    """pyarrow type of a SQLAlchemy column"""
+    column_type = column.type
+    if isinstance(column_type, db.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, db.Integer):
+        return pa.int64()
+    if isinstance(column_type, db.Numeric):
+        return pa.decimal128(column_type.precision or 18, column_type.scale or 0)
+    if isinstance(column_type, db.DateTime):
+        return pa.timestamp('us')
+    if isinstance(column_type, db.Date):
+        return pa.date32()
+    return pa.string()
+
+
+def _schema(pa, model):
+    """Parquet schema: the table's columns + the sync stamp (partition columns live in the path)"""
+    fields = [pa.field(column.name, _arrow_type(pa, column)) for column in model.__table__.columns]
+    fields.append(pa.field('_synced_at', pa.timestamp('us')))
+    return pa.schema(fields)
+
+
+def _changed_at(model):
+    """When a row last changed"""
+    return db.func.coalesce(model.updated_at, model.created_at)
+
+
+# ========== SYNC ==========
+
+def _load_state(folder):
+    """High-water marks of the last sync: {table: ISO datetime}"""
+    try:
+        with open(os.path.join(folder, '_state.json')) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_state(folder, state):
+    """Write the high-water marks atomically"""
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(state, file, indent=2)
+    os.replace(temp_path, os.path.join(folder, '_state.json'))
+
+
+def _sync_table(name, folder, since, synced_at):
+    """
+    Write the rows of one table changed since `since` (None = all rows)
+    
+    Returns:
+    (rows written, newest change time seen or None)
+    """
+    pa = _require('pyarrow')
+    parquet = _require('pyarrow.parquet')
+    model, partition_columns, month_column = MIRRORED[name]
+    schema = _schema(pa, model)
+    changed_at = _changed_at(model)
+    
+    statement = db.select(model.__table__, *partition_columns(), changed_at.label('_changed_at'))
+    if since is not None:
+        statement = statement.where(changed_at > since)
+    result = db.session.execute(statement.order_by(model.id).execution_options(yield_per=BATCH_SIZE))
+    
+    written, newest = 0, None
+    stamp = synced_at.strftime('%Y%m%d%H%M%S%f')
+    for number, batch in enumerate(result.partitions()):
+        partitions = {}
+        for row in batch:
+            row = row._asdict()
+            changed = row.pop('_changed_at')
+            newest = changed if newest is None or changed > newest else newest
+            path = []
+            if 'academic_year' in row:
+                path.append(f"academic_year={row.pop('academic_year') or NO_PARTITION}")
+            if month_column:
+                month = row[month_column]
+                path.append(f"month={month.strftime('%Y-%m') if month else NO_PARTITION}")
+            row['_synced_at'] = synced_at
+            partitions.setdefault(os.path.join(folder, name, *path), []).append(row)
+        
+        for partition_dir, rows in partitions.items():
+            os.makedirs(partition_dir, exist_ok=True)
+            parquet.write_table(
+                pa.Table.from_pylist(rows, schema=schema),
+                os.path.join(partition_dir, f'part-{stamp}-{number:05d}.parquet')
+            )
+            written += len(rows)
+    return written, newest
+
+
+def _write_ids(name, folder):
+    """List of ids that still exist in the live table (deleted rows drop out of the views)"""
+    pa = _require('pyarrow')
+    parquet = _require('pyarrow.parquet')
+    model = MIRRORED[name][0]
+    ids = db.session.execute(db.select(model.id)).scalars().all()
+    os.makedirs(os.path.join(folder, '_ids'), exist_ok=True)
+    temp_path = os.path.join(folder, '_ids', f'{name}.parquet.tmp')
+    parquet.write_table(pa.table({'id': pa.array(ids, pa.int64())}), temp_path)
+    os.replace(temp_path, os.path.join(folder, '_ids', f'{name}.parquet'))
+
+
+def sync(full=False):
+    """
+    Bring the Parquet mirror up to date
+    
+    Parameters:
+    full: Rewrite every table from scratch instead of adding changed rows
+    
+    Returns:
+    Dictionary: {table: rows written}
+    """
+    _require('pyarrow.parquet')
+    folder = mirror_dir()
+    os.makedirs(folder, exist_ok=True)
+    state = {} if full else _load_state(folder)
+    synced_at = datetime.utcnow()
+    
+    report = {}
+    for name in MIRRORED:
+        mark = datetime.fromisoformat(state[name]) if name in state else None
+        since = mark - SYNC_OVERLAP if mark else None
+        
+        if since is None:
+            # Write the new copy next to the old one, then swap
+            target = os.path.join(folder, name)
+            build_folder = tempfile.mkdtemp(dir=folder, prefix=f'.{name}-')
+            try:
+                report[name], newest = _sync_table(name, build_folder, None, synced_at)
+                shutil.rmtree(target, ignore_errors=True)
+                built = os.path.join(build_folder, name)
+                if os.path.isdir(built):
+                    os.replace(built, target)
+            finally:
+                shutil.rmtree(build_folder, ignore_errors=True)
+        else:
+            report[name], newest = _sync_table(name, folder, since, synced_at)
+        
+        _write_ids(name, folder)
+        marks = [value for value in (mark, newest) if value is not None]
+        state[name] = max(marks).isoformat() if marks else datetime(1970, 1, 1).isoformat()
+    
+    _save_state(folder, state)
+    return report
+
+
+# ========== DUCKDB QUERIES ==========
+
+# Named analytic queries over the views fee_payment, fee_structure, group_payment, student
+QUERIES = {
+    # Money collected per academic year and fee month
+    'collection_by_month': """
+        SELECT academic_year, month, COUNT(*) AS fees, SUM(amount) AS collected
+        FROM fee_payment
+        WHERE amount > 0
+        GROUP BY academic_year, month
+        ORDER BY academic_year, month
+    """,
+    # Charged vs collected per fee type, year after year
+    'fee_type_trend': """
+        SELECT p.academic_year, f.fee_type, COUNT(*) AS fees,
+               SUM(f.amount) AS charged, SUM(p.amount) AS collected
+        FROM fee_payment p JOIN fee_structure f ON f.id = p.fee_structure_id
+        GROUP BY p.academic_year, f.fee_type
+        ORDER BY p.academic_year, f.fee_type
+    """,
+    # Collection of each calendar month, one column per academic year
+    'year_over_year': """
+        PIVOT (
+            SELECT academic_year, substr(month, 6, 2) AS month_number, amount
+            FROM fee_payment WHERE amount > 0 AND month != 'none'
+        )
+        ON academic_year USING SUM(amount)
+        GROUP BY month_number
+        ORDER BY month_number
+    """,
+}
+
+
+def _views_sql(folder):
+    """CREATE VIEW statements: newest copy of each row that still exists"""
+    statements = []
+    for name in MIRRORED:
+        files = os.path.join(folder, name, '**', '*.parquet')
+        ids = os.path.join(folder, '_ids', f'{name}.parquet')
+        if not glob.glob(files, recursive=True):
+            continue  # Empty table: queries reading it fail with "table does not exist"
+        statements.append(f"""
+            CREATE VIEW {name} AS
+            SELECT * EXCLUDE (_copy, _synced_at) FROM (
+                SELECT *, row_number() OVER (PARTITION BY id ORDER BY _synced_at DESC) AS _copy
+                FROM read_parquet('{files}', hive_partitioning = true, union_by_name = true)
+            )
+            WHERE _copy = 1 AND id IN (SELECT id FROM read_parquet('{ids}'))
+        """)
+    return statements
+
+
+def run_query(name):
+    """
+    Run a named analytic query on the mirror
+    
+    Returns:
+    Dictionary: {'columns': [...], 'rows': [[...], ...], 'synced': {table: high-water mark}}
+    """
+    if name not in QUERIES:
+        raise AnalyticsError(f'Unknown analytics query: {name}')
+    duckdb = _require('duckdb')
+    folder = mirror_dir()
+    state = _load_state(folder)
+    if not state:
+        raise AnalyticsError('The analytics mirror is empty: run flask analytics-sync first.')
+    
+    connection = duckdb.connect()
+    try:
+        for statement in _views_sql(folder):
+            connection.execute(statement)
+        cursor = connection.execute(QUERIES[name])
+        columns = [column[0] for column in cursor.description]
+        rows = [list(row) for row in cursor.fetchall()]
+    except duckdb.Error as e:
+        raise AnalyticsError(f'Analytics query {name} failed: {e}')
+    finally:
+        connection.close()
+    return {'columns': columns, 'rows': rows, 'synced': state}
@@ -0,0 +1,381 @@
+"""
+Cold-Storage Archive for Closed Academic Years
+
+This moves a closed academic year's payments out of the live database
+into its own SQLite file: instance/archive/fms_<year>.db
+
+What is moved:
+- fee_payment rows of the year's fee structures
+- group_payment rows whose fee payments are all in that year
+- payment_receipt rows of the moved payments
+- payment_allocation and late_fee_charge rows of the moved payments
+What is left behind:
+- One ArchivedYear row (counts and total collected)
+- One ArchivedStudentYear row per student (charged / paid in that year)
+- credit_entry rows (advance credit history), with their links to the
+  moved payments cleared
+
+Why?
+- fms.db, its indexes and its backups otherwise grow forever
+- Current-year pages never need old payments, so they get faster
+- Old payments are still one click away: the archive file is ATTACHed
+  only while a student history or a historical report reads it
+
+SQLite only (it uses ATTACH DATABASE).
+
+Run it with: flask archive-year 2024-2025
+"""
+
+from app import db
+from app.models import (
+    AcademicYear, FeeStructure, FeePayment, GroupPayment, PaymentReceipt, PaymentAllocation, LateFeeCharge,
+    CreditEntry, ArchivedYear, ArchivedStudentYear, StudentLedger, DataVersion
+)
+from app.utils.money import paisa, from_paisa
+from contextlib import contextmanager
+from flask import current_app
+import os
+import re
+
+# Tables moved to the archive file (parents first)
+ARCHIVED_TABLES = [
+    GroupPayment.__table__, FeePayment.__table__, PaymentReceipt.__table__, PaymentAllocation.__table__,
+    LateFeeCharge.__table__
+]
+
+
+class ArchiveError(Exception):
+    """Raised when a year cannot be archived (nothing is changed)"""
+
+
+def archive_dir():
+    """Folder that holds the archive files (created if missing)"""
+    folder = current_app.config['ARCHIVE_DIR']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def archive_file_name(year_name):
+    """Archive file name for a year, e.g. fms_2024-2025.db"""
+    return 'fms_' + re.sub(r'[^0-9A-Za-z_-]', '_', year_name) + '.db'
+
+
+def _schema_name(academic_year_id):
+    """Name the archive file is ATTACHed under"""
+    return f'archive_{academic_year_id}'
+
+
+def archived_table(table, schema):
+    """The same table, but inside an attached archive schema"""
+    return db.Table(table.name, db.MetaData(), *[db.Column(c.name, c.type) for c in table.c], schema=schema)
+
+
+def _create_archive_file(path):
+    """Create the archive file with the same tables as the live database"""
+    engine = db.create_engine('sqlite:///' + path)
+    try:
+        db.metadata.create_all(engine, tables=ARCHIVED_TABLES)
+    finally:
+        engine.dispose()
+
+
+def _charged_class(payments):
+    """
+    Best guess of the class an archived fee was charged to (files written
+    before fee_payment.class_grade_id existed): the student's current class
+    when the fee applies to it, otherwise the fee's only class
+    """
+    from app.models import Student, fee_structure_classes
+    links = fee_structure_classes
+    return db.func.coalesce(
+        db.select(Student.class_grade_id).join(links, links.c.class_grade_id == Student.class_grade_id).where(
+            Student.id == payments.c.student_id, links.c.fee_structure_id == payments.c.fee_structure_id
+        ).scalar_subquery(),
+        db.select(db.func.min(links.c.class_grade_id)).where(
+            links.c.fee_structure_id == payments.c.fee_structure_id
+        ).having(db.func.count() == 1).scalar_subquery(),
+        db.select(Student.class_grade_id).where(Student.id == payments.c.student_id).scalar_subquery()
+    )
+
+
+# Values for columns added to archive files by _upgrade_archive(): (table, column) -> expression
+ARCHIVE_BACKFILLS = {
+    ('fee_payment', 'class_grade_id'): _charged_class,
+}
+
+
+def _upgrade_archive(connection, schema):
+    """
+    Bring an archive file written by an older version up to the live tables
+    
+    Missing tables are created and missing columns added, so every archive
+    can be read with the same SELECT as the live tables. Committed at once
+    (the caller's reads are rolled back afterwards).
+    """
+    for table in ARCHIVED_TABLES:
+        target = archived_table(table, schema)
+        existing = {row[1] for row in connection.exec_driver_sql(f'PRAGMA {schema}.table_info("{table.name}")')}
+        if not existing:
+            target.create(connection)
+            continue
+        for column in table.c:
+            if column.name in existing:
+                continue
+            definition = f'"{column.name}" {column.type.compile(connection.dialect)}'
+            if column.server_default is not None:
+                default = column.server_default.arg
+                if not isinstance(default, str):
+                    default = default.compile(dialect=connection.dialect)
+                definition += f' DEFAULT {default}'
+            connection.exec_driver_sql(f'ALTER TABLE {schema}."{table.name}" ADD COLUMN {definition}')
+            backfill = ARCHIVE_BACKFILLS.get((table.name, column.name))
+            if backfill is not None:
+                connection.execute(target.update().values({column.name: backfill(target)}))
+    connection.commit()
+
+
+@contextmanager
+def attached_archives(academic_year_ids=None):
+    """
+    Open a connection with archive files ATTACHed
+    
+    Parameters:
+    academic_year_ids: Years to attach (None = every archived year)
+    
+    Yields:
+    (connection, {academic_year_id: schema name})
+    Archives written by an older version are upgraded first (_upgrade_archive).
+    The archives are DETACHed and the connection is closed afterwards.
+    """
+    query = ArchivedYear.query
+    if academic_year_ids is not None:
+        query = query.filter(ArchivedYear.academic_year_id.in_(list(academic_year_ids)))
+    archives = query.all()
+    
+    connection = db.engine.connect()
+    schemas = {}
+    try:
+        for archive in archives:
+            schema = _schema_name(archive.academic_year_id)
+            connection.exec_driver_sql(
+                f"ATTACH DATABASE ? AS {schema}", (archive.file_path(archive_dir()),)
+            )
+            schemas[archive.academic_year_id] = schema
+            _upgrade_archive(connection, schema)
+        yield connection, schemas
+    finally:
+        connection.rollback()
+        for schema in schemas.values():
+            connection.exec_driver_sql(f"DETACH DATABASE {schema}")
+        connection.close()
+
+
+def archive_year(year_name):
+    """
+    Move a closed academic year's payments into its archive file
+    
+    Parameters:
+    year_name: Academic year to archive (e.g. "2024-2025")
+    
+    Returns:
+    The ArchivedYear row
+    
+    Everything runs in one transaction on one connection: the rows are
+    copied into the attached file, summarised, then deleted from fms.db.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        raise ArchiveError('Archiving uses ATTACH DATABASE and needs SQLite.')
+    
+    year = AcademicYear.query.filter_by(year_name=year_name).first()
+    if not year:
+        raise ArchiveError(f'Academic year {year_name} does not exist.')
+    if year.is_current:
+        raise ArchiveError(f'{year_name} is the current academic year; only closed years can be archived.')
+    if year.archive:
+        raise ArchiveError(f'{year_name} is already archived ({year.archive.file_name}).')
+    
+    year_fee_ids = db.select(FeeStructure.id).where(FeeStructure.academic_year_id == year.id)
+    in_year = FeePayment.fee_structure_id.in_(year_fee_ids)
+    
+    open_fees = db.session.scalar(
+        db.select(db.func.count(FeePayment.id)).where(in_year, FeePayment.open_status_filter())
+    )
+    if open_fees:
+        raise ArchiveError(f'{year_name} still has {open_fees} open fee(s); collect or settle them first.')
+    
+    file_name = archive_file_name(year_name)
+    path = os.path.join(archive_dir(), file_name)
+    if os.path.exists(path):
+        raise ArchiveError(f'Archive file {path} already exists; move it away first.')
+    _create_archive_file(path)
+    
+    # The session must not hold a write transaction while we work on another connection
+    db.session.commit()
+    
+    schema = _schema_name(year.id)
+    connection = db.engine.connect()
+    try:
+        # ATTACH is not allowed inside a transaction, so do it first
+        connection.exec_driver_sql(f"ATTACH DATABASE ? AS {schema}", (path,))
+        connection.commit()
+        try:
+            with connection.begin():
+                _move_year(connection, year, in_year, schema, file_name)
+        finally:
+            connection.exec_driver_sql(f"DETACH DATABASE {schema}")
+            connection.commit()
+    except Exception:
+        os.remove(path)
+        raise
+    finally:
+        connection.close()
+    
+    return db.session.get(ArchivedYear, year.id)
+
+
+def _move_year(connection, year, in_year, schema, file_name):
+    """Copy, summarise and delete one year's rows (the caller holds the transaction)"""
+    payments = FeePayment.__table__
+    groups = GroupPayment.__table__
+    receipts = PaymentReceipt.__table__
+    late_fees = LateFeeCharge.__table__
+    allocations = PaymentAllocation.__table__
+    credit_entries = CreditEntry.__table__
+    
+    payment_ids = db.select(payments.c.id).where(in_year)
+    # Group payments move only when none of their fee payments stay behind
+    # (linked to the group, or paid by one of its allocations)
+    allocated_in_year = allocations.c.fee_payment_id.in_(payment_ids)
+    group_ids = connection.execute(
+        db.select(groups.c.id).where(
+            db.or_(
+                groups.c.id.in_(db.select(payments.c.group_payment_id).where(in_year)),
+                groups.c.id.in_(db.select(allocations.c.group_payment_id).where(allocated_in_year))
+            ),
+            ~groups.c.id.in_(
+                db.select(payments.c.group_payment_id).where(
+                    payments.c.group_payment_id.isnot(None), ~in_year
+                )
+            ),
+            ~groups.c.id.in_(
+                db.select(allocations.c.group_payment_id).where(
+                    allocations.c.group_payment_id.isnot(None), ~allocated_in_year
+                )
+            )
+        )
+    ).scalars().all()
+    receipt_filter = db.or_(
+        receipts.c.payment_id.in_(payment_ids),
+        receipts.c.group_payment_id.in_(group_ids)
+    )
+    
+    # ========== 1. COPY INTO THE ARCHIVE FILE ==========
+    moved = {}
+    for table, where in [(groups, groups.c.id.in_(group_ids)),
+                         (payments, in_year),
+                         (receipts, receipt_filter),
+                         (allocations, allocated_in_year),
+                         (late_fees, late_fees.c.fee_payment_id.in_(payment_ids))]:
+        columns = [c.name for c in table.c]
+        target = archived_table(table, schema)
+        moved[table.name] = connection.execute(
+            target.insert().from_select(columns, db.select(*table.c).where(where))
+        ).rowcount
+    
+    # ========== 2. LEAVE SUMMARIES BEHIND ==========
+    paid = db.case((FeePayment.amount > 0, paisa(FeePayment.amount)), else_=0)
+    total_collected = connection.execute(
+        db.select(db.func.coalesce(db.func.sum(paid), 0)).where(in_year)
+    ).scalar()
+    
+    connection.execute(ArchivedYear.__table__.insert().values(
+        academic_year_id=year.id,
+        file_name=file_name,
+        payments_count=moved[payments.name],
+        group_payments_count=moved[groups.name],
+        receipts_count=moved[receipts.name],
+        total_collected=from_paisa(total_collected)
+    ))
+    
+    per_student = db.select(
+        FeePayment.student_id,
+        db.literal(year.id),
+        db.func.count(FeePayment.id),
+        db.func.sum(FeePayment.charged_paisa()),
+        db.func.sum(paid),
+        db.func.max(db.case((FeePayment.amount > 0, FeePayment.payment_date), else_=None))
+    ).join(
+        FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+    ).where(in_year).group_by(FeePayment.student_id)
+    
+    connection.execute(ArchivedStudentYear.__table__.insert().from_select(
+        ['student_id', 'academic_year_id', 'fees_count', 'total_charged', 'total_paid', 'last_payment_date'],
+        per_student
+    ))
+    student_ids = connection.execute(
+        db.select(ArchivedStudentYear.student_id).where(ArchivedStudentYear.academic_year_id == year.id)
+    ).scalars().all()
+    
+    # ========== 3. DELETE FROM THE LIVE DATABASE ==========
+    # Children first (receipts, allocations, late fees -> payments -> group payments)
+    connection.execute(receipts.delete().where(receipt_filter))
+    connection.execute(allocations.delete().where(allocated_in_year))
+    connection.execute(late_fees.delete().where(late_fees.c.fee_payment_id.in_(payment_ids)))
+    # Credit entries stay (they explain the wallet balances); only their links go
+    connection.execute(credit_entries.update().where(
+        credit_entries.c.fee_payment_id.in_(payment_ids)
+    ).values(fee_payment_id=None))
+    if group_ids:
+        connection.execute(credit_entries.update().where(
+            credit_entries.c.group_payment_id.in_(group_ids)
+        ).values(group_payment_id=None))
+    connection.execute(payments.delete().where(in_year))
+    if group_ids:
+        connection.execute(groups.delete().where(groups.c.id.in_(group_ids)))
+    
+    # The ledger now reads these students' archived totals from the summaries
+    StudentLedger.refresh(student_ids, connection=connection)
+    DataVersion.bump([DataVersion.FEE_PAYMENT, DataVersion.PAYMENT_RECEIPT, DataVersion.GROUP_PAYMENT],
+                     connection=connection)
+
+
+
+def student_payment_history(student_id):
+    """
+    Every payment of a student, live and archived, newest first
+    
+    Only the archive files of years this student has payments in are
+    ATTACHed (see ArchivedStudentYear).
+    
+    Returns:
+    List of dictionaries (fee name, amount, dates, status, receipt, year, archived)
+    """
+    payments = FeePayment.__table__
+    
+    def history_select(table, archived):
+        return db.select(
+            table.c.id,
+            FeeStructure.fee_name,
+            AcademicYear.year_name,
+            table.c.amount,
+            table.c.payment_date,
+            table.c.due_date,
+            table.c.status,
+            table.c.receipt_number,
+            db.literal(archived).label('archived')
+        ).join(
+            FeeStructure, FeeStructure.id == table.c.fee_structure_id
+        ).join(
+            AcademicYear, AcademicYear.id == FeeStructure.academic_year_id
+        ).where(table.c.student_id == student_id)
+    
+    year_ids = ArchivedStudentYear.years_for_student(student_id)
+    with attached_archives(year_ids) as (connection, schemas):
+        selects = [history_select(payments, False)]
+        selects.extend(history_select(archived_table(payments, schema), True) for schema in schemas.values())
+        history = db.union_all(*selects).subquery('history')
+        rows = connection.execute(
+            db.select(history).order_by(history.c.payment_date.desc(), history.c.id.desc())
+        ).mappings().all()
+    
+    return [dict(row) for row in rows]
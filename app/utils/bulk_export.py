@@ -0,0 +1,236 @@
+"""
+Streaming Bulk Export
+
+This writes a whole table (students, payments, receipts) as NDJSON or CSV,
+row by row, optionally gzip-compressed on the fly.
+
+Why streaming?
+- The Excel export builds the whole workbook in memory first; a dump of
+  several years of payments would hold every row at once and send nothing
+  until the end
+- Here the rows are read with yield_per (the database cursor is consumed
+  in batches of BATCH_SIZE) and every batch is encoded, compressed and
+  handed to the HTTP response or the file straight away
+- Memory stays the same for 1,000 or 1,000,000 rows, and the first bytes
+  leave before the query has finished
+
+Why flat Core queries instead of ORM objects + serializers?
+- An export row is a fixed set of columns; loading ORM objects would fill
+  the session's identity map with every row of the dump
+- One SELECT with its joins gives the names (class, fee, family) directly
+
+Formats:
+- ndjson: one JSON object per line (dates as ISO strings, money as strings)
+- csv: header line, then one line per row
+
+Used by the /api/v1/export/<name>.<format> endpoints and `flask export-data`.
+"""
+
+from app import db
+from app.models import (
+    ClassGrade, Family, FeePayment, FeeStructure, GroupPayment, PaymentReceipt, Student
+)
+from app.utils.serializers import to_json
+import csv
+import io
+import zlib
+
+# Rows fetched from the database cursor at a time
+BATCH_SIZE = 1000
+
+# Compressed bytes are collected up to this size before being handed on
+GZIP_CHUNK_SIZE = 64 * 1024
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+# ========== EXPORT QUERIES ==========
+# Each returns a SELECT whose column labels are the export's field names
+
+def _students_select():
+    """Every student with class name and family code"""
+    return db.select(
+        Student.id,
+        Student.student_id,
+        Student.first_name,
+        Student.last_name,
+        Student.father_name,
+        Student.gender,
+        Student.date_of_birth,
+        ClassGrade.class_name,
+        Family.family_code,
+        Student.admission_number,
+        Student.admission_date,
+        Student.parent_guardian_name,
+        Student.parent_primary_contact,
+        Student.parent_secondary_contact,
+        Student.address,
+        Student.is_active
+    ).outerjoin(
+        ClassGrade, ClassGrade.id == Student.class_grade_id
+    ).outerjoin(
+        Family, Family.id == Student.family_id
+    ).order_by(Student.id)
+
+
+def _payments_select():
+    """Every fee payment (archived ones too) with student, class and fee names"""
+    return db.select(
+        FeePayment.id,
+        Student.student_id,
+        (Student.first_name + ' ' + Student.last_name).label('student_name'),
+        ClassGrade.class_name,
+        FeeStructure.fee_type,
+        FeeStructure.fee_name,
+        FeePayment.due_amount().label('fee_amount'),
+        FeePayment.discount,
+        FeePayment.amount,
+        FeePayment.payment_method,
+        FeePayment.payment_date,
+        FeePayment.due_date,
+        FeePayment.status,
+        FeePayment.receipt_number,
+        FeePayment.transaction_id,
+        FeePayment.account_name,
+        GroupPayment.group_payment_number,
+        FeePayment.is_archived
+    ).join(
+        Student, Student.id == FeePayment.student_id
+    ).join(
+        FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+    ).outerjoin(
+        ClassGrade, ClassGrade.id == Student.class_grade_id
+    ).outerjoin(
+        GroupPayment, GroupPayment.id == FeePayment.group_payment_id
+    ).order_by(FeePayment.id)
+
+
+def _receipts_select():
+    """Every receipt: for one payment (student) or one group payment (family)"""
+    group_family = db.aliased(Family)
+    is_group = PaymentReceipt.group_payment_id.is_not(None)
+    return db.select(
+        PaymentReceipt.id,
+        PaymentReceipt.receipt_number,
+        PaymentReceipt.receipt_date,
+        db.case((is_group, 'GROUP'), else_='INDIVIDUAL').label('receipt_type'),
+        Student.student_id,
+        group_family.family_code,
+        db.case((is_group, GroupPayment.total_amount), else_=FeePayment.amount).label('amount'),
+        db.func.coalesce(GroupPayment.payment_method, FeePayment.payment_method).label('payment_method'),
+        db.func.coalesce(GroupPayment.payment_date, FeePayment.payment_date).label('payment_date'),
+        GroupPayment.group_payment_number
+    ).outerjoin(
+        FeePayment, FeePayment.id == PaymentReceipt.payment_id
+    ).outerjoin(
+        Student, Student.id == FeePayment.student_id
+    ).outerjoin(
+        GroupPayment, GroupPayment.id == PaymentReceipt.group_payment_id
+    ).outerjoin(
+        group_family, group_family.id == GroupPayment.family_id
+    ).order_by(PaymentReceipt.id)
+
+
+EXPORTS = {
+    'students': _students_select,
+    'payments': _payments_select,
+    'receipts': _receipts_select
+}
+
+
+# ========== ROWS ==========
+
+def iter_batches(name):
+    """
+    Rows of an export in batches of BATCH_SIZE (lists of Row tuples)
+    
+    The first item is the list of column names. Only one batch is in
+    memory at a time.
+    """
+    statement = EXPORTS[name]()
+    result = db.session.execute(statement.execution_options(yield_per=BATCH_SIZE))
+    yield list(result.keys())
+    for batch in result.partitions():
+        yield batch
+
+
+def _ndjson_chunks(batches):
+    """One bytes chunk per batch: a JSON object per line"""
+    columns = next(batches)
+    for batch in batches:
+        yield b''.join(to_json(dict(zip(columns, row))) + b'\n' for row in batch)
+
+
+def _csv_chunks(batches):
+    """One bytes chunk for the header, then one per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    def take():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+    
+    writer.writerow(next(batches))
+    yield take()
+    for batch in batches:
+        writer.writerows(batch)
+        yield take()
+
+
+def gzip_chunks(chunks, level=6):
+    """
+    Compress a stream of bytes chunks into a gzip stream, on the fly
+    
+    Compressed output is handed on in pieces of about GZIP_CHUNK_SIZE.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    pending = []
+    size = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            pending.append(data)
+            size += len(data)
+        if size >= GZIP_CHUNK_SIZE:
+            yield b''.join(pending)
+            pending, size = [], 0
+    pending.append(compressor.flush())
+    yield b''.join(pending)
+
+
+def export_chunks(name, fmt, compress=False):
+    """
+    Bytes chunks of an export, ready to be streamed
+    
+    Parameters:
+    name: 'students', 'payments' or 'receipts'
+    fmt: 'ndjson' or 'csv'
+    compress: gzip the stream
+    """
+    if name not in EXPORTS:
+        raise ValueError(f'Unknown export: {name}')
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown format: {fmt}')
+    
+    encode = _ndjson_chunks if fmt == 'ndjson' else _csv_chunks
+    chunks = encode(iter_batches(name))
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def write_export(name, fmt, output, compress=False):
+    """
+    Write an export to a binary file object
+    
+    Returns:
+    Number of bytes written
+    """
+    written = 0
+    for chunk in export_chunks(name, fmt, compress):
+        output.write(chunk)
+        written += len(chunk)
+    return written
@@ -0,0 +1,233 @@
+"""
+Advance-Payment Credit
+
+This puts money into the credit wallets (CreditWallet) and draws them
+down against open fees.
+
+Why a set-based draw-down?
+- After a monthly run, every prepaid student has a new fee to settle;
+  paying them one by one through the ORM would cost a flush, status and
+  ledger events per fee
+- Here: one query for the wallets that hold credit, one for the open fees
+  of their students (oldest due date first), the credit is spread in
+  memory (integer paisa), then executemany statements: the fees, the
+  wallet balances, the CreditEntry rows and the PaymentAllocation rows;
+  the ledger and the collection cube are refreshed once
+- apply_credit() never commits: generate_fees() and generate_installments()
+  call it inside their own transaction, so new fees and their settlement
+  are saved (or rolled back) together
+
+A fee is paid from the student's own wallet first, then from the family
+wallet. What a fee draws from the wallets is a PaymentAllocation row
+(payment method CREDIT, today's date, no group payment), like the part
+of a lump-sum payment; a fee that was partly paid keeps its own method
+and date, only one without any money yet takes CREDIT and today.
+
+Revenue counts the cash once, when it is received: a deposit keeps the
+method and date of the payment it came from, and CREDIT allocations are
+left out of the revenue report (app/utils/reports.py). The collection
+cube counts them, as the fee is paid.
+
+Run it by hand (e.g. after adding a fee manually): flask apply-credit
+"""
+
+from app import db
+from app.models import (
+    CollectionCube, CreditEntry, CreditWallet, DataVersion, FeePayment, FeeStructure, PaymentAllocation, Student,
+    StudentLedger
+)
+from app.utils.money import from_paisa, to_paisa
+from datetime import date, datetime
+
+
+def deposit(amount_paisa, created_by_id, student_id=None, family_id=None, group_payment_id=None,
+            payment_method=None, payment_date=None):
+    """
+    Add money to the wallet of a family (or of a student without one)
+    
+    payment_method / payment_date: How and when the money was received
+    (the group payment's), for the revenue report
+    
+    Does not commit: the caller's transaction also holds the payment.
+    The CreditEntry is written through the ORM, so the flush bumps the
+    credit_entry data version (cached revenue reports count deposits).
+    
+    Returns:
+    The CreditWallet
+    """
+    wallet = CreditWallet.get_or_create(student_id=student_id, family_id=family_id)
+    db.session.flush()
+    
+    # Relative UPDATE: a draw-down running at the same time is not overwritten
+    table = CreditWallet.__table__
+    db.session.execute(
+        table.update().where(table.c.id == wallet.id).values(
+            balance=table.c.balance + from_paisa(amount_paisa),
+            updated_at=datetime.utcnow()
+        )
+    )
+    db.session.add(CreditEntry(
+        wallet_id=wallet.id,
+        kind=CreditEntry.KIND_DEPOSIT,
+        amount=from_paisa(amount_paisa),
+        group_payment_id=group_payment_id,
+        payment_method=payment_method,
+        payment_date=payment_date,
+        created_by_id=created_by_id
+    ))
+    db.session.expire(wallet, ['balance'])
+    return wallet
+
+
+def _open_fees(student_wallets, family_wallets, student_ids=None):
+    """
+    Open fees of the wallet owners, oldest first (one query, paisa amounts)
+    
+    Returns:
+    List of tuples: (id, student_id, family_id, due_date, paid, charged)
+    """
+    owners = []
+    if student_wallets:
+        owners.append(FeePayment.student_id.in_(list(student_wallets)))
+    if family_wallets:
+        owners.append(Student.family_id.in_(list(family_wallets)))
+    statement = db.select(
+        FeePayment.id,
+        FeePayment.student_id,
+        Student.family_id,
+        FeePayment.due_date,
+        FeePayment.amount,
+        FeePayment.charged_paisa()
+    ).join(
+        FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+    ).join(
+        Student, Student.id == FeePayment.student_id
+    ).where(
+        FeePayment.open_status_filter(),
+        FeePayment.is_archived == False,
+        db.or_(*owners)
+    ).order_by(FeePayment.due_date, FeePayment.id)
+    if student_ids is not None:
+        statement = statement.where(FeePayment.student_id.in_(list(student_ids)))
+    return [
+        (id, student_id, family_id, due_date, to_paisa(paid), charged)
+        for id, student_id, family_id, due_date, paid, charged in db.session.execute(statement)
+    ]
+
+
+def apply_credit(created_by_id=None, student_ids=None, today=None):
+    """
+    Pay open fees from the credit wallets, oldest due date first
+    
+    Parameters:
+    created_by_id: User recorded on the CreditEntry rows (None = automatic)
+    student_ids: Only the fees of these students (None = every wallet owner)
+    today: Payment date / status date (defaults to today)
+    
+    Does not commit (see the module docstring).
+    
+    Returns:
+    Report dictionary: fees_paid, students, amount, wallets
+    """
+    today = today or date.today()
+    report = {'fees_paid': 0, 'students': 0, 'amount': from_paisa(0), 'wallets': 0}
+    
+    wallets = db.session.execute(
+        db.select(CreditWallet.id, CreditWallet.student_id, CreditWallet.family_id, CreditWallet.balance)
+        .where(CreditWallet.balance > 0)
+    ).all()
+    if not wallets:
+        return report
+    
+    balances = {wallet_id: to_paisa(balance) for wallet_id, _, _, balance in wallets}
+    student_wallets = {student_id: wallet_id for wallet_id, student_id, _, _ in wallets if student_id is not None}
+    family_wallets = {family_id: wallet_id for wallet_id, _, family_id, _ in wallets if family_id is not None}
+    
+    now = datetime.utcnow()
+    fee_rows, entries, allocations, used = [], [], [], {}
+    for id, student_id, family_id, due_date, paid, charged in _open_fees(student_wallets, family_wallets, student_ids):
+        outstanding = charged - paid
+        applied = 0
+        for wallet_id in (student_wallets.get(student_id), family_wallets.get(family_id)):
+            if outstanding <= 0 or wallet_id is None or balances[wallet_id] <= 0:
+                continue
+            amount = min(outstanding, balances[wallet_id])
+            balances[wallet_id] -= amount
+            used[wallet_id] = used.get(wallet_id, 0) + amount
+            outstanding -= amount
+            applied += amount
+            entries.append({
+                'wallet_id': wallet_id,
+                'kind': CreditEntry.KIND_APPLIED,
+                'amount': from_paisa(-amount),
+                'fee_payment_id': id,
+                'created_by_id': created_by_id,
+                'created_at': now
+            })
+        if applied:
+            fee_rows.append({
+                'b_id': id,
+                'b_student_id': student_id,
+                'b_paid': paid,
+                'b_amount': from_paisa(paid + applied),
+                'b_allocated': from_paisa(applied),
+                'b_status': FeePayment.status_for(paid + applied, charged, due_date, today)
+            })
+            allocations.append({
+                'fee_payment_id': id,
+                'group_payment_id': None,
+                'amount': from_paisa(applied),
+                'payment_method': FeePayment.PAYMENT_CREDIT,
+                'payment_date': today,
+                'created_at': now
+            })
+    
+    if not fee_rows:
+        return report
+    
+    # ========== WRITE (executemany statements) ==========
+    # Fees without any money yet also take CREDIT and today as their method
+    # and date; partly paid fees keep theirs (the draw-down is an allocation)
+    fees = FeePayment.__table__
+    fee_values = dict(
+        amount=db.bindparam('b_amount'),
+        allocated=fees.c.allocated + db.bindparam('b_allocated', type_=fees.c.allocated.type),
+        status=db.bindparam('b_status'),
+        updated_at=now
+    )
+    first_payment = {'payment_method': FeePayment.PAYMENT_CREDIT, 'payment_date': today}
+    for rows, extra in (([row for row in fee_rows if not row['b_paid']], first_payment),
+                        ([row for row in fee_rows if row['b_paid']], {})):
+        if not rows:
+            continue
+        db.session.execute(
+            fees.update().where(fees.c.id == db.bindparam('b_id')).values(**fee_values, **extra),
+            [{key: value for key, value in row.items() if key not in ('b_student_id', 'b_paid')} for row in rows]
+        )
+    
+    # Relative UPDATE, like deposit(): balance - used
+    table = CreditWallet.__table__
+    db.session.execute(
+        table.update().where(table.c.id == db.bindparam('b_id')).values(
+            balance=table.c.balance - db.bindparam('b_used', type_=table.c.balance.type),
+            updated_at=now
+        ),
+        [{'b_id': wallet_id, 'b_used': from_paisa(amount)} for wallet_id, amount in used.items()]
+    )
+    db.session.execute(CreditEntry.__table__.insert(), entries)
+    db.session.execute(PaymentAllocation.__table__.insert(), allocations)
+    
+    # Core statements skip the ORM events: refresh the derived tables here
+    connection = db.session.connection()
+    student_ids = {row['b_student_id'] for row in fee_rows}
+    StudentLedger.refresh(student_ids, connection=connection)
+    CollectionCube.refresh_where(FeePayment.id.in_([row['b_id'] for row in fee_rows]), connection=connection)
+    DataVersion.bump([DataVersion.FEE_PAYMENT, DataVersion.CREDIT_ENTRY], connection=connection)
+    
+    report.update(
+        fees_paid=len(fee_rows),
+        students=len(student_ids),
+        amount=from_paisa(sum(used.values())),
+        wallets=len(used)
+    )
+    return report
@@ -0,0 +1,200 @@
+"""
+Defaulter Excel Export
+
+This writes the defaulter workbook: one sheet per class plus a summary
+sheet. Every defaulter gets one row with contact details, the list of
+unpaid fees, the amount due and a colour for how late they are.
+
+Why a streaming export?
+- Building a normal openpyxl workbook keeps every cell in memory, and
+  export_students() also lazy-loads each student's class and family
+- Here ONE query returns the overdue fees already ordered by class and
+  student; rows are grouped in Python while they are read
+  (itertools.groupby) and written straight into a write-only workbook
+- Colours come from a few named styles registered once on the workbook,
+  not a style object per cell
+Memory stays flat no matter how many defaulters there are.
+
+A defaulter is an active student with at least one open fee
+(pending / partial / overdue) whose due date has passed. A fee paid in
+installments counts part by part: only the installments already due.
+"""
+
+from app import db
+from app.models import ClassGrade, FeeInstallment, FeePayment, FeeStructure, Student
+from app.utils.money import from_paisa, paisa
+from datetime import date
+from itertools import groupby
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+import re
+
+# Lateness bands: (days overdue up to, named style)
+LATENESS_STYLES = [
+    (30, 'late_under_30'),
+    (90, 'late_under_90'),
+    (None, 'late_over_90'),
+]
+
+HEADERS = [
+    'Student ID', 'Student Name', 'Father Name', 'Parent/Guardian', 'Primary Contact',
+    'Secondary Contact', 'Unpaid Fees', 'Unpaid Fee List', 'Oldest Due Date', 'Days Overdue', 'Amount Due'
+]
+
+
+def _register_styles(wb):
+    """Named styles shared by every cell that uses them"""
+    header = NamedStyle(name='defaulter_header')
+    header.font = Font(bold=True, color='FFFFFF')
+    header.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+    header.alignment = Alignment(horizontal='center')
+    wb.add_named_style(header)
+    
+    wb.add_named_style(NamedStyle(name='money', number_format='#,##0.00'))
+    wb.add_named_style(NamedStyle(name='day', number_format='yyyy-mm-dd'))
+    
+    for name, colour in [('late_under_30', 'FFEB9C'), ('late_under_90', 'F4B183'), ('late_over_90', 'FFC7CE')]:
+        style = NamedStyle(name=name)
+        style.fill = PatternFill(start_color=colour, end_color=colour, fill_type='solid')
+        wb.add_named_style(style)
+
+
+def _lateness_style(days_overdue):
+    """Named style for how many days the oldest fee is overdue"""
+    for limit, style in LATENESS_STYLES:
+        if limit is None or days_overdue <= limit:
+            return style
+
+
+def _sheet_title(name, used):
+    """Valid, unique Excel sheet title (max 31 characters, no []:*?/\\)"""
+    title = re.sub(r'[\[\]:*?/\\]', '-', name)[:31] or 'Sheet'
+    base, n = title, 2
+    while title in used:
+        suffix = f' ({n})'
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(title)
+    return title
+
+
+def _styled_cell(ws, value, style):
+    """Write-only cell with a named style"""
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def defaulters_select(today):
+    """
+    One query: every overdue open fee of active students, ordered by class,
+    student and due date (the order the workbook is written in)
+    """
+    paid = db.case((FeePayment.amount > 0, paisa(FeePayment.amount)), else_=0)
+    return db.select(
+        ClassGrade.id,
+        ClassGrade.class_name,
+        Student.id,
+        Student.student_id,
+        Student.first_name,
+        Student.last_name,
+        Student.father_name,
+        Student.parent_guardian_name,
+        Student.parent_primary_contact,
+        Student.parent_secondary_contact,
+        # "Admission Fee - Installment 2/3" for installments
+        db.func.coalesce(FeeStructure.fee_name + ' - ' + FeeInstallment.name, FeeStructure.fee_name),
+        FeePayment.due_date,
+        FeePayment.charged_paisa() - paid
+    ).join(
+        Student, Student.id == FeePayment.student_id
+    ).join(
+        FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+    ).outerjoin(
+        FeeInstallment, FeeInstallment.id == FeePayment.installment_id
+    ).outerjoin(
+        ClassGrade, ClassGrade.id == Student.class_grade_id
+    ).where(
+        FeePayment.open_status_filter(),
+        FeePayment.due_date < today,
+        Student.is_active == True
+    ).order_by(
+        ClassGrade.order, ClassGrade.id, Student.first_name, Student.last_name, Student.id, FeePayment.due_date
+    )
+
+
+def write_defaulter_workbook(output, today=None):
+    """
+    Write the defaulter workbook to a file (path or file object)
+    
+    Parameters:
+    output: Where to save the .xlsx
+    today: Date to measure lateness from (defaults to today)
+    
+    Returns:
+    Summary list: one dictionary per class (class_name, defaulters, fees, amount_due)
+    """
+    today = today or date.today()
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+    
+    # Created first so it is the first tab; filled in at the end
+    summary_ws = wb.create_sheet('Summary')
+    used_titles = {'Summary'}
+    summary = []
+    
+    rows = db.session.execute(
+        defaulters_select(today), execution_options={'yield_per': 1000}
+    )
+    
+    for (class_id, class_name), class_rows in groupby(rows, key=lambda row: (row[0], row[1])):
+        class_name = class_name or 'No Class'
+        ws = wb.create_sheet(_sheet_title(class_name, used_titles))
+        ws.append([_styled_cell(ws, header, 'defaulter_header') for header in HEADERS])
+        class_total = {'class_name': class_name, 'defaulters': 0, 'fees': 0, 'amount_due': 0}
+        
+        for _, fee_rows in groupby(class_rows, key=lambda row: row[2]):
+            fee_rows = list(fee_rows)
+            first = fee_rows[0]
+            oldest_due = fee_rows[0][11]
+            days_overdue = (today - oldest_due).days
+            amount_due = sum(row[12] for row in fee_rows)
+            style = _lateness_style(days_overdue)
+            
+            fee_list = ', '.join(f'{row[10]} ({row[11].isoformat()})' for row in fee_rows)
+            ws.append([
+                _styled_cell(ws, first[3], style),
+                f'{first[4]} {first[5]}',
+                first[6],
+                first[7],
+                first[8],
+                first[9] or '',
+                len(fee_rows),
+                fee_list,
+                _styled_cell(ws, oldest_due, 'day'),
+                days_overdue,
+                _styled_cell(ws, from_paisa(amount_due), 'money')
+            ])
+            
+            class_total['defaulters'] += 1
+            class_total['fees'] += len(fee_rows)
+            class_total['amount_due'] += amount_due
+        
+        summary.append(class_total)
+    
+    summary_ws.append([_styled_cell(summary_ws, header, 'defaulter_header')
+                       for header in ['Class', 'Defaulters', 'Unpaid Fees', 'Amount Due']])
+    for row in summary:
+        row['amount_due'] = from_paisa(row['amount_due'])
+        summary_ws.append([row['class_name'], row['defaulters'], row['fees'],
+                           _styled_cell(summary_ws, row['amount_due'], 'money')])
+    summary_ws.append([
+        'Total',
+        sum(row['defaulters'] for row in summary),
+        sum(row['fees'] for row in summary),
+        _styled_cell(summary_ws, sum(row['amount_due'] for row in summary), 'money')
+    ])
+    
+    wb.save(output)
+    return summary
@@ -0,0 +1,141 @@
+"""
+Discount Table
+
+This answers "how much discount does this student get on this fee?" from
+an in-memory table compiled from the active DiscountRule rows.
+
+Why a compiled table?
+- Bulk fee generation prices thousands of fees; looking rules up per
+  student would cost a query each
+- Here ONE query reads the active rules, and each rule is filed under its
+  (student, class, fee type) scope, with None meaning "any"
+- A lookup tries the 8 combinations of (this value / any) for the three
+  scopes: a few dictionary reads, no SQL
+- The table is cached (app/utils/query_cache.py) and rebuilt after a
+  discount rule changes
+- Family sizes are not part of the table: callers read them together with
+  the students (family_sizes(), one grouped query)
+
+Amounts are integer paisa. When several rules match, the largest discount
+applies; a discount never exceeds the fee.
+
+Example:
+    table = DiscountTable.current()
+    table.discount_for(student_id=7, class_grade_id=3, fee_type='MONTHLY',
+                       family_size=3, fee_paisa=500000)   -> (100000, 2)
+"""
+
+from app import db
+from app.models import DiscountRule, Student
+from app.utils.money import to_paisa
+from app.utils.query_cache import cached_query
+from collections import namedtuple
+from itertools import product
+from types import MappingProxyType
+
+# One compiled rule: percentages in hundredths of a percent, fixed amounts in paisa
+CompiledRule = namedtuple('CompiledRule', ['id', 'min_family_size', 'is_percent', 'value'])
+
+
+class DiscountTable:
+    """
+    Immutable (student, class, fee type) -> rules table
+    
+    Build it with DiscountTable.current() (cached) or DiscountTable.load().
+    """
+    
+    def __init__(self, rules_by_scope):
+        self._rules_by_scope = MappingProxyType(
+            {scope: tuple(rules) for scope, rules in rules_by_scope.items()}
+        )
+    
+    def __reduce__(self):
+        """Pickle support (the query cache stores a copy)"""
+        return DiscountTable, (dict(self._rules_by_scope),)
+    
+    @staticmethod
+    def load():
+        """Compile the active rules with one query"""
+        rows = db.session.execute(
+            db.select(
+                DiscountRule.id,
+                DiscountRule.student_id,
+                DiscountRule.class_grade_id,
+                DiscountRule.fee_type,
+                DiscountRule.min_family_size,
+                DiscountRule.rule_type,
+                DiscountRule.value
+            ).where(DiscountRule.is_active == True).order_by(DiscountRule.id)
+        ).all()
+        
+        rules_by_scope = {}
+        for rule_id, student_id, class_id, fee_type, min_family_size, rule_type, value in rows:
+            rules_by_scope.setdefault((student_id, class_id, fee_type), []).append(CompiledRule(
+                rule_id,
+                min_family_size or 0,
+                rule_type == DiscountRule.TYPE_PERCENT,
+                to_paisa(value)
+            ))
+        return DiscountTable(rules_by_scope)
+    
+    @staticmethod
+    def current():
+        """Table of the active rules, cached until a discount rule changes"""
+        return cached_query('discount_table', ['discount_rule'], DiscountTable.load)
+    
+    # ========== LOOKUPS ==========
+    
+    def discount_for(self, student_id, class_grade_id, fee_type, family_size, fee_paisa):
+        """
+        Best discount on one fee
+        
+        Parameters:
+        family_size: Active students in the student's family (0 = no family)
+        fee_paisa: Fee amount in paisa
+        
+        Returns:
+        (discount paisa, rule id), or (0, None) when no rule matches
+        """
+        best, best_rule = 0, None
+        for scope in product((student_id, None), (class_grade_id, None), (fee_type, None)):
+            for rule in self._rules_by_scope.get(scope, ()):
+                if family_size < rule.min_family_size:
+                    continue
+                if rule.is_percent:
+                    amount = (fee_paisa * rule.value + 5000) // 10000
+                else:
+                    amount = rule.value
+                amount = min(amount, fee_paisa)
+                if amount > best:
+                    best, best_rule = amount, rule.id
+        return best, best_rule
+    
+    def __bool__(self):
+        """False when there are no active rules (callers can skip the lookups)"""
+        return bool(self._rules_by_scope)
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<DiscountTable rules={sum(len(rules) for rules in self._rules_by_scope.values())}>'
+
+
+def family_sizes(family_ids=None):
+    """
+    Active students per family, in one grouped query
+    
+    Parameters:
+    family_ids: Families to count (None = every family)
+    
+    Returns:
+    Dictionary: {family_id: number of active students}
+    """
+    statement = db.select(Student.family_id, db.func.count(Student.id)).where(
+        Student.is_active == True,
+        Student.family_id.is_not(None)
+    ).group_by(Student.family_id)
+    if family_ids is not None:
+        family_ids = [family_id for family_id in family_ids if family_id is not None]
+        if not family_ids:
+            return {}
+        statement = statement.where(Student.family_id.in_(family_ids))
+    return dict(db.session.execute(statement).all())
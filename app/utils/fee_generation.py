@@ -0,0 +1,188 @@
+"""
+Bulk Fee Generation
+
+This creates the fee records (pending FeePayment rows) of one month for
+every active student, using the FeeResolver for "which fees apply".
+
+What is generated for a month:
+- Every recurring fee of the student's class (e.g. Monthly Fee), due
+  `due_date_offset` days after the first of the month
+- Every one-time fee of the class (Admission, Exam, Annual...) that the
+  student does not have yet this year, unless the fee is paid in
+  installments (those rows come from app/utils/installments.py)
+
+Why a bulk job?
+- Creating fees student by student through the ORM costs several queries
+  per student (class fees, year, duplicates check) plus one INSERT each
+- Here: one query for the students, one for the fees that already exist,
+  then INSERTs in chunks with executemany; the ledger and the collection
+  cube are refreshed once for the whole batch
+- Running it twice for the same month creates nothing new
+- Discounts (sibling, scholarship...) come from the compiled DiscountTable:
+  family sizes are read with one grouped query, the rest is in memory
+- Students with advance credit get their new fees paid from their wallet
+  in the same transaction (app/utils/credit.py)
+
+Run it with: flask generate-fees --month 2025-08 --user admin
+"""
+
+from app import db
+from app.models import (
+    AcademicYear, CollectionCube, DataVersion, FeePayment, InstallmentPlan, Student, StudentLedger
+)
+from app.utils.credit import apply_credit
+from app.utils.discounts import DiscountTable, family_sizes
+from app.utils.fee_resolver import FeeResolver
+from app.utils.money import from_paisa, to_paisa
+from datetime import date, datetime, timedelta
+
+# Rows per executemany INSERT
+CHUNK_SIZE = 1000
+
+
+class FeeGenerationError(Exception):
+    """Raised when fees cannot be generated (nothing is changed)"""
+
+
+def _existing_fees(resolver, month_start):
+    """
+    (student_id, fee_structure_id) pairs that already have this month's fee
+    
+    One query: recurring fees are matched on their due date for the month,
+    one-time fees on any date in the year.
+    """
+    recurring, one_time = [], []
+    for fee in resolver.all_fees():
+        if fee.is_recurring:
+            recurring.append(db.and_(
+                FeePayment.fee_structure_id == fee.id,
+                FeePayment.due_date == month_start + timedelta(days=fee.due_date_offset)
+            ))
+        else:
+            one_time.append(fee.id)
+    
+    conditions = recurring + ([FeePayment.fee_structure_id.in_(one_time)] if one_time else [])
+    if not conditions:
+        return set()
+    return set(db.session.execute(
+        db.select(FeePayment.student_id, FeePayment.fee_structure_id).where(db.or_(*conditions))
+    ).all())
+
+
+def generate_fees(month, created_by_id, class_ids=None, dry_run=False):
+    """
+    Generate one month's fees for all active students
+    
+    Parameters:
+    month: Any date in the month (e.g. date(2025, 8, 1))
+    created_by_id: User recorded as the creator of the fee records
+    class_ids: Only these classes (None = every class)
+    dry_run: Count what would be created, then roll back
+    
+    Returns:
+    Report dictionary: month, students, fees_created, skipped_existing, discounted, per_class,
+    credit_fees / credit_amount (new fees paid from credit wallets)
+    """
+    month_start = date(month.year, month.month, 1)
+    year = AcademicYear.get_current()
+    if not year:
+        raise FeeGenerationError('There is no current academic year.')
+    if not (year.start_date <= month_start <= year.end_date):
+        raise FeeGenerationError(f'{month_start:%Y-%m} is outside the current academic year {year.year_name}.')
+    
+    resolver = FeeResolver.current()
+    wanted_classes = resolver.class_ids() if class_ids is None else [c for c in class_ids if resolver.fees_for_class(c)]
+    
+    students = db.session.execute(
+        db.select(Student.id, Student.class_grade_id, Student.family_id).where(
+            Student.is_active == True,
+            Student.class_grade_id.in_(wanted_classes)
+        )
+    ).all()
+    existing = _existing_fees(resolver, month_start)
+    planned = InstallmentPlan.planned_fee_ids()
+    discounts = DiscountTable.current()
+    sizes = family_sizes({family_id for _, _, family_id in students}) if discounts else {}
+    
+    today = date.today()
+    now = datetime.utcnow()
+    rows, skipped, discounted, per_class = [], 0, 0, {}
+    for student_id, class_id, family_id in students:
+        for fee in resolver.fees_for_class(class_id):
+            if fee.id in planned and not fee.is_recurring:
+                continue
+            if (student_id, fee.id) in existing:
+                skipped += 1
+                continue
+            due_date = month_start + timedelta(days=fee.due_date_offset)
+            fee_paisa = to_paisa(fee.amount)
+            discount, rule_id = discounts.discount_for(
+                student_id, class_id, fee.fee_type, sizes.get(family_id, 0), fee_paisa
+            ) if discounts else (0, None)
+            if discount:
+                discounted += 1
+            if discount >= fee_paisa:
+                status = FeePayment.STATUS_PAID  # Fully discounted: nothing to collect
+            elif due_date < today:
+                status = FeePayment.STATUS_OVERDUE
+            else:
+                status = FeePayment.STATUS_PENDING
+            rows.append({
+                'student_id': student_id,
+                'fee_structure_id': fee.id,
+                'class_grade_id': class_id,
+                'amount': 0,
+                'discount': from_paisa(discount),
+                'discount_rule_id': rule_id,
+                'payment_method': FeePayment.PAYMENT_CASH,
+                'payment_date': month_start,
+                'due_date': due_date,
+                'status': status,
+                'is_archived': False,
+                'created_by_id': created_by_id,
+                'created_at': now,
+                'updated_at': now
+            })
+            per_class[class_id] = per_class.get(class_id, 0) + 1
+    
+    report = {
+        'month': month_start.strftime('%Y-%m'),
+        'students': len(students),
+        'fees_created': len(rows),
+        'skipped_existing': skipped,
+        'discounted': discounted,
+        'per_class': per_class,
+        'credit_fees': 0,
+        'credit_amount': from_paisa(0),
+        'dry_run': dry_run
+    }
+    if not rows:
+        return report
+    
+    try:
+        table = FeePayment.__table__
+        for start in range(0, len(rows), CHUNK_SIZE):
+            db.session.execute(table.insert(), rows[start:start + CHUNK_SIZE])
+        
+        # Core INSERTs skip the ORM events: refresh the derived tables here
+        connection = db.session.connection()
+        StudentLedger.refresh({row['student_id'] for row in rows}, connection=connection)
+        CollectionCube.refresh_where(db.and_(
+            FeePayment.created_at == now,
+            FeePayment.fee_structure_id.in_({row['fee_structure_id'] for row in rows})
+        ), connection=connection)
+        DataVersion.bump([DataVersion.FEE_PAYMENT], connection=connection)
+        
+        # Prepaid students: settle the new fees from their credit wallets
+        credit = apply_credit(created_by_id, student_ids={row['student_id'] for row in rows}, today=today)
+        report.update(credit_fees=credit['fees_paid'], credit_amount=credit['amount'])
+        
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return report
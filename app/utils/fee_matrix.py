@@ -0,0 +1,195 @@
+"""
+Class Fee Matrix
+
+This builds the "who paid which month" grid for one class:
+one row per active student, one column per month of the academic year.
+
+Each cell is one of:
+- PAID: every fee due that month is paid
+- PARTIAL: something was paid, but not everything
+- PENDING: nothing paid yet, not due yet
+- OVERDUE: an unpaid fee whose due date has passed
+- '' (empty): no fee due that month
+
+Why this module?
+- Without it, the only way to check a class is opening every student's
+  page, which shows just the last 10 payments
+- Here ONE grouped query returns (student, month) totals for the whole
+  class; numpy places them into student x month arrays and picks each
+  cell's status with array operations (no query per student or per cell)
+"""
+
+from app import db
+from app.models import AcademicYear, FeePayment, FeeStructure, Student
+from app.utils.money import from_paisa, paisa
+from datetime import date
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Font, PatternFill
+import io
+import numpy as np
+
+STATUS_PAID = FeePayment.STATUS_PAID
+STATUS_PARTIAL = FeePayment.STATUS_PARTIAL
+STATUS_PENDING = FeePayment.STATUS_PENDING
+STATUS_OVERDUE = FeePayment.STATUS_OVERDUE
+
+# Excel fill colour per status (one shared fill object per status)
+STATUS_FILLS = {
+    STATUS_PAID: PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid'),
+    STATUS_PARTIAL: PatternFill(start_color='FFEB9C', end_color='FFEB9C', fill_type='solid'),
+    STATUS_OVERDUE: PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid'),
+}
+
+
+def academic_months(year):
+    """Months of an academic year as "YYYY-MM" strings, in order"""
+    months = []
+    current = date(year.start_date.year, year.start_date.month, 1)
+    while current <= year.end_date:
+        months.append(current.strftime('%Y-%m'))
+        current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+    return months
+
+
+def _matrix_select(class_grade_id, academic_year_id, today):
+    """
+    One grouped query: every active student of the class, with per-month totals
+    
+    Students without fees still get one row (month is NULL), so they
+    show up in the grid.
+    """
+    is_open = FeePayment.open_status_filter()
+    year_fees = db.select(
+        FeePayment.student_id,
+        db.func.substr(db.cast(FeePayment.due_date, db.String), 1, 7).label('month'),
+        FeePayment.due_date,
+        FeePayment.amount,
+        is_open.label('is_open'),
+        (FeePayment.due_amount() - FeePayment.discount).label('fee_amount')
+    ).join(
+        FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+    ).where(FeeStructure.academic_year_id == academic_year_id).subquery('year_fees')
+    
+    paid = db.case((year_fees.c.amount > 0, paisa(year_fees.c.amount)), else_=0)
+    return db.select(
+        Student.id,
+        Student.student_id,
+        Student.first_name,
+        Student.last_name,
+        year_fees.c.month,
+        db.func.count(year_fees.c.student_id),
+        db.func.coalesce(db.func.sum(paisa(year_fees.c.fee_amount)), 0),
+        db.func.coalesce(db.func.sum(paid), 0),
+        db.func.coalesce(db.func.sum(db.case((year_fees.c.is_open, 1), else_=0)), 0),
+        db.func.coalesce(db.func.sum(db.case(
+            (db.and_(year_fees.c.is_open, year_fees.c.due_date < today), 1), else_=0
+        )), 0)
+    ).outerjoin(
+        year_fees, year_fees.c.student_id == Student.id
+    ).where(
+        Student.class_grade_id == class_grade_id,
+        Student.is_active == True
+    ).group_by(
+        Student.id, year_fees.c.month
+    ).order_by(
+        Student.first_name, Student.last_name, Student.id
+    )
+
+
+def class_fee_matrix(class_grade_id, academic_year=None):
+    """
+    Build the paid / unpaid grid of a class for an academic year
+    
+    Parameters:
+    class_grade_id: Class to show
+    academic_year: AcademicYear (defaults to the current one)
+    
+    Returns:
+    Dictionary:
+    {
+        'months': ['2025-04', ...],
+        'students': [{'id', 'student_id', 'name', 'statuses': [...], 'outstanding': Decimal}, ...],
+        'paid_counts': [students fully paid per month]
+    }
+    """
+    year = academic_year or AcademicYear.get_current()
+    if not year:
+        return {'months': [], 'students': [], 'paid_counts': []}
+    
+    months = academic_months(year)
+    rows = db.session.execute(_matrix_select(class_grade_id, year.id, date.today())).all()
+    
+    # Row and column position of every result row
+    students = {}
+    for row in rows:
+        students.setdefault(row[0], (row[1], f'{row[2]} {row[3]}'))
+    student_position = {student_id: i for i, student_id in enumerate(students)}
+    month_position = {month: j for j, month in enumerate(months)}
+    
+    with_fees = [row for row in rows if row[4] in month_position]
+    r = np.array([student_position[row[0]] for row in with_fees], dtype=np.int64)
+    c = np.array([month_position[row[4]] for row in with_fees], dtype=np.int64)
+    
+    shape = (len(students), len(months))
+    fees, charged, paid, open_fees, overdue = (np.zeros(shape, dtype=np.int64) for _ in range(5))
+    for grid, column in zip((fees, charged, paid, open_fees, overdue), range(5, 10)):
+        grid[r, c] = [row[column] for row in with_fees]
+    
+    statuses = np.select(
+        [fees == 0, overdue > 0, open_fees == 0, paid > 0],
+        ['', STATUS_OVERDUE, STATUS_PAID, STATUS_PARTIAL],
+        default=STATUS_PENDING
+    )
+    # What is still owed on open fees
+    outstanding = np.where(open_fees > 0, np.maximum(charged - paid, 0), 0).sum(axis=1)
+    
+    return {
+        'months': months,
+        'students': [
+            {
+                'id': student_id,
+                'student_id': code,
+                'name': name,
+                'statuses': statuses[i].tolist(),
+                'outstanding': from_paisa(outstanding[i])
+            }
+            for i, (student_id, (code, name)) in enumerate(students.items())
+        ],
+        'paid_counts': (statuses == STATUS_PAID).sum(axis=0).tolist()
+    }
+
+
+def matrix_workbook(matrix, title):
+    """
+    Excel file of a class fee matrix
+    
+    Returns:
+    BytesIO with the .xlsx content
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = title[:31]
+    
+    ws.append(['Student ID', 'Name'] + matrix['months'] + ['Outstanding'])
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    for cell in ws[1]:
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center')
+    
+    for student in matrix['students']:
+        ws.append([student['student_id'], student['name']] + student['statuses'] + [student['outstanding']])
+        for cell, status in zip(ws[ws.max_row][2:], student['statuses']):
+            if status in STATUS_FILLS:
+                cell.fill = STATUS_FILLS[status]
+    
+    ws.append(['', 'Paid'] + matrix['paid_counts'])
+    
+    ws.column_dimensions['A'].width = 16
+    ws.column_dimensions['B'].width = 28
+    
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
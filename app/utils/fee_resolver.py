@@ -0,0 +1,138 @@
+"""
+Fee Resolver
+
+This answers "which fees apply to this class?" for the current academic
+year from an in-memory map, instead of walking relationships.
+
+Why a resolver?
+- Without it, every student costs several queries: ClassGrade.fee_structures
+  (dynamic relationship), the academic year filter and, for each fee,
+  FeeStructure.applicable_classes
+- Here ONE query reads fee_structure_classes joined to the current year's
+  active fee structures and builds an immutable map:
+  class_id -> (Fee, Fee, ...)
+- The map is cached (app/utils/query_cache.py) and rebuilt after a fee
+  structure, a class link or the current year changes
+
+Fee values are plain named tuples (not ORM objects), so one resolver can
+be shared by every request and thread without touching a session.
+
+Example:
+    resolver = FeeResolver.current()
+    resolver.fees_for_class(5)    -> (Fee(id=3, fee_name='Monthly Fee', amount=Decimal('5500.00'), ...), ...)
+    resolver.total_for_class(5)   -> Decimal('7500.00')
+"""
+
+from app import db
+from app.models import AcademicYear, FeeStructure, fee_structure_classes
+from app.utils.money import from_paisa, to_decimal, to_paisa
+from app.utils.query_cache import cached_query
+from collections import namedtuple
+from types import MappingProxyType
+
+# One applicable fee (amount is a Decimal)
+Fee = namedtuple('Fee', ['id', 'fee_type', 'fee_name', 'amount', 'due_date_offset', 'is_recurring'])
+
+
+class FeeResolver:
+    """
+    Immutable class -> fees map of one academic year
+    
+    Build it with FeeResolver.current() (cached) or FeeResolver.load(year_id).
+    """
+    
+    def __init__(self, academic_year_id, fees_by_class):
+        self.academic_year_id = academic_year_id
+        self._fees_by_class = MappingProxyType(
+            {class_id: tuple(fees) for class_id, fees in fees_by_class.items()}
+        )
+        self._fees_by_id = MappingProxyType(
+            {fee.id: fee for fees in self._fees_by_class.values() for fee in fees}
+        )
+    
+    def __reduce__(self):
+        """Pickle support (the query cache stores a copy)"""
+        return FeeResolver, (self.academic_year_id, dict(self._fees_by_class))
+    
+    @staticmethod
+    def load(academic_year_id):
+        """Build the resolver of an academic year with one query"""
+        rows = db.session.execute(
+            db.select(
+                fee_structure_classes.c.class_grade_id,
+                FeeStructure.id,
+                FeeStructure.fee_type,
+                FeeStructure.fee_name,
+                FeeStructure.amount,
+                FeeStructure.due_date_offset,
+                FeeStructure.is_recurring
+            ).join(
+                FeeStructure, FeeStructure.id == fee_structure_classes.c.fee_structure_id
+            ).where(
+                FeeStructure.academic_year_id == academic_year_id,
+                FeeStructure.is_active == True
+            ).order_by(
+                fee_structure_classes.c.class_grade_id, FeeStructure.fee_type, FeeStructure.id
+            )
+        ).all()
+        
+        fees_by_class = {}
+        for class_id, *fee in rows:
+            fee[3] = to_decimal(fee[3])
+            fees_by_class.setdefault(class_id, []).append(Fee(*fee))
+        return FeeResolver(academic_year_id, fees_by_class)
+    
+    @staticmethod
+    def current():
+        """
+        Resolver of the current academic year (None if no year is current)
+        
+        Cached until a fee structure, a class link or the current year changes.
+        """
+        year = AcademicYear.get_current()
+        if not year:
+            return None
+        return cached_query(
+            f'fee_resolver:year={year.id}',
+            ['fee_structure', 'fee_structure_classes'],
+            lambda: FeeResolver.load(year.id)
+        )
+    
+    # ========== LOOKUPS ==========
+    
+    def fees_for_class(self, class_grade_id):
+        """Fees that apply to a class (empty tuple if none)"""
+        return self._fees_by_class.get(class_grade_id, ())
+    
+    def fees_for_student(self, student):
+        """Fees that apply to a student (by the student's class)"""
+        return self.fees_for_class(student.class_grade_id)
+    
+    def total_for_class(self, class_grade_id, recurring=None):
+        """
+        Sum of the fees of a class
+        
+        Parameters:
+        recurring: True = only recurring fees, False = only one-time fees, None = all
+        """
+        total = sum(
+            to_paisa(fee.amount) for fee in self.fees_for_class(class_grade_id)
+            if recurring is None or fee.is_recurring == recurring
+        )
+        return from_paisa(total)
+    
+    def fee(self, fee_structure_id):
+        """One fee by id (None if it does not apply to any class this year)"""
+        return self._fees_by_id.get(fee_structure_id)
+    
+    def all_fees(self):
+        """Every fee that applies to at least one class"""
+        return list(self._fees_by_id.values())
+    
+    def class_ids(self):
+        """Classes that have at least one fee"""
+        return list(self._fees_by_class)
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<FeeResolver year={self.academic_year_id} classes={len(self._fees_by_class)}>'
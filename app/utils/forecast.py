@@ -0,0 +1,242 @@
+"""
+Cash-Flow Forecast
+
+This projects the collections expected in the coming months, per class:
+what will be charged (enrolment x fee amounts) times how likely each
+class is to pay (its collection history).
+
+Why from the cube?
+- The history is already added up per (class, month) in the collection
+  cube: a few hundred small rows, no fee_payment scan
+- Enrolment comes from the class counter cache (ClassGrade.active_students)
+  and the fee amounts from the cached FeeResolver
+- Everything else is NumPy: the history is aggregated per class with
+  np.bincount, and the forecast is computed as one (classes x months)
+  array, so the whole report takes a few milliseconds plus four small queries
+
+How is it worked out?
+- Payment probability of a class = collected / charged over every month
+  before the current one (classes without history use the school-wide rate)
+- On-time rate = fees paid in full by their due date / fees
+- Charges per month: every recurring fee of the class x active students;
+  one-time fees not charged yet to everyone fall in the first month,
+  or in the month of each part when the fee is paid in installments
+- Expected = charges x payment probability (on time = charges x on-time rate)
+
+Limits: discounts, future late fees and advance credit are not projected
+(late fees already billed are fee rows, so they are in the history), and
+only the months of the current academic year are forecast (next year's
+fees do not exist yet).
+
+The report page caches the result per day (app/utils/report_cache.py):
+the run date is part of the cache key, and any payment or fee change
+rebuilds it.
+
+Example:
+    cash_flow_forecast(date(2025, 8, 15), months=3)
+    -> months ['2025-09', '2025-10', '2025-11'], one row per class, totals
+"""
+
+from app import db
+from app.models import AcademicYear, ClassGrade, CollectionCube, FeePayment, InstallmentPlan, Student
+from app.utils.fee_resolver import FeeResolver
+from app.utils.money import from_paisa, to_paisa
+from datetime import date
+from sqlalchemy.orm import selectinload
+import numpy as np
+
+
+def _month_index(day, first_month):
+    """Months between the first forecast month and a date (0 = first month)"""
+    return (day.year - first_month.year) * 12 + day.month - first_month.month
+
+
+def _forecast_months(as_of, months, year):
+    """First days of the forecast months: after `as_of`, within the academic year"""
+    result = []
+    year_number, month = as_of.year, as_of.month
+    for _ in range(months):
+        year_number, month = year_number + month // 12, month % 12 + 1
+        first_day = date(year_number, month, 1)
+        if first_day > year.end_date:
+            break
+        result.append(first_day)
+    return result
+
+
+def payment_rates(class_ids, before_month):
+    """
+    Payment probability and on-time rate per class, from the collection cube
+    
+    Parameters:
+    class_ids: Classes, in the order of the returned arrays
+    before_month: Only cube months before this one ("YYYY-MM")
+    
+    Returns:
+    (collection rates, on-time rates): NumPy float arrays, one value per class
+    """
+    table = CollectionCube.__table__
+    rows = db.session.execute(
+        db.select(
+            table.c.class_grade_id,
+            db.type_coerce(table.c.charged, db.BigInteger),
+            db.type_coerce(table.c.collected, db.BigInteger),
+            table.c.fees_count,
+            table.c.on_time_count
+        ).where(table.c.month < before_month, table.c.class_grade_id.is_not(None))
+    ).all()
+    
+    classes = np.asarray(class_ids, dtype=np.int64)
+    if not rows or not len(classes):
+        return np.ones(len(classes)), np.ones(len(classes))
+    
+    history = np.asarray(rows, dtype=np.float64)
+    # Position of each cube row's class in `classes` (rows of other classes are dropped)
+    order = np.argsort(classes)
+    found = np.searchsorted(classes, history[:, 0].astype(np.int64), sorter=order)
+    found = np.minimum(found, len(classes) - 1)
+    index = order[found]
+    known = classes[index] == history[:, 0]
+    index, history = index[known], history[known]
+    
+    def per_class(column):
+        return np.bincount(index, weights=history[:, column], minlength=len(classes))
+    
+    charged, collected, fees, on_time = per_class(1), per_class(2), per_class(3), per_class(4)
+    
+    # School-wide rates for classes without history
+    overall_rate = collected.sum() / charged.sum() if charged.sum() > 0 else 1.0
+    overall_on_time = on_time.sum() / fees.sum() if fees.sum() > 0 else 1.0
+    rates = np.divide(collected, charged, out=np.full(len(classes), overall_rate), where=charged > 0)
+    on_time_rates = np.divide(on_time, fees, out=np.full(len(classes), overall_on_time), where=fees > 0)
+    return np.clip(rates, 0, 1), np.clip(on_time_rates, 0, 1)
+
+
+def _one_time_charges(resolver, class_index, enrolment, month_starts):
+    """
+    (classes x months) paisa matrix of the one-time fees still to be charged
+    
+    One grouped query for the students already charged each fee, one
+    (plus its selectinload) for the installment plans.
+    """
+    charges = np.zeros((len(class_index), len(month_starts)), dtype=np.float64)
+    one_time = {fee.id: fee for fee in resolver.all_fees() if not fee.is_recurring}
+    if not one_time or not month_starts:
+        return charges
+    
+    charged = dict(((class_id, fee_id), count) for class_id, fee_id, count in db.session.execute(
+        db.select(Student.class_grade_id, FeePayment.fee_structure_id, db.func.count(db.distinct(FeePayment.student_id)))
+        .join(Student, Student.id == FeePayment.student_id)
+        .where(FeePayment.fee_structure_id.in_(list(one_time)), Student.is_active == True)
+        .group_by(Student.class_grade_id, FeePayment.fee_structure_id)
+    ))
+    plans = {
+        plan.fee_structure_id: plan
+        for plan in InstallmentPlan.query.options(selectinload(InstallmentPlan.installments)).filter(
+            InstallmentPlan.is_active == True,
+            InstallmentPlan.fee_structure_id.in_(list(one_time))
+        )
+        if plan.installments
+    }
+    
+    last = len(month_starts) - 1
+    for class_id, row in class_index.items():
+        for fee in resolver.fees_for_class(class_id):
+            if fee.is_recurring:
+                continue
+            remaining = max(int(enrolment[row]) - charged.get((class_id, fee.id), 0), 0)
+            if not remaining:
+                continue
+            fee_paisa = to_paisa(fee.amount)
+            plan = plans.get(fee.id)
+            if plan is None:
+                charges[row, 0] += remaining * fee_paisa
+                continue
+            for part, part_paisa in zip(plan.installments, plan.split_paisa(fee_paisa)):
+                month = _month_index(part.due_date, month_starts[0])
+                if month <= last:
+                    charges[row, max(month, 0)] += remaining * part_paisa
+    return charges
+
+
+def cash_flow_forecast(as_of=None, months=6):
+    """
+    Expected collections of the coming months, per class
+    
+    Parameters:
+    as_of: Run date (defaults to today); the forecast starts the month after
+    months: How many months to forecast (at most until the academic year ends)
+    
+    Returns:
+    Dictionary ready for a template:
+    {
+        'months': ['2025-09', ...],
+        'rows': [{'class_grade_id', 'class_name', 'students', 'payment_rate', 'on_time_rate',
+                  'charges': [Decimal, ...], 'expected': [Decimal, ...], 'total': Decimal}, ...],
+        'charges': [Decimal, ...], 'expected': [Decimal, ...], 'on_time': [Decimal, ...],  # per month
+        'total_charges': Decimal, 'total_expected': Decimal
+    }
+    """
+    as_of = as_of or date.today()
+    year = AcademicYear.get_current()
+    resolver = FeeResolver.current()
+    month_starts = _forecast_months(as_of, months, year) if year else []
+    report = {
+        'as_of': as_of,
+        'months': [month.strftime('%Y-%m') for month in month_starts],
+        'rows': [],
+        'charges': [],
+        'expected': [],
+        'on_time': [],
+        'total_charges': from_paisa(0),
+        'total_expected': from_paisa(0)
+    }
+    if not month_starts or resolver is None or not resolver.class_ids():
+        return report
+    
+    # ========== INPUTS (one query each) ==========
+    classes = db.session.execute(
+        db.select(ClassGrade.id, ClassGrade.class_name, ClassGrade.active_students)
+        .where(ClassGrade.id.in_(resolver.class_ids()))
+        .order_by(ClassGrade.order, ClassGrade.id)
+    ).all()
+    class_index = {class_id: row for row, (class_id, _, _) in enumerate(classes)}
+    enrolment = np.array([students for _, _, students in classes], dtype=np.float64)
+    recurring = np.array([
+        sum(to_paisa(fee.amount) for fee in resolver.fees_for_class(class_id) if fee.is_recurring)
+        for class_id, _, _ in classes
+    ], dtype=np.float64)
+    rates, on_time_rates = payment_rates(list(class_index), as_of.strftime('%Y-%m'))
+    
+    # ========== PROJECTION (classes x months) ==========
+    charges = np.outer(enrolment * recurring, np.ones(len(month_starts)))
+    charges += _one_time_charges(resolver, class_index, enrolment, month_starts)
+    expected = np.rint(charges * rates[:, None]).astype(np.int64)
+    on_time = np.rint(charges * on_time_rates[:, None]).astype(np.int64)
+    charges = np.rint(charges).astype(np.int64)
+    
+    def rupees(values):
+        return [from_paisa(value) for value in values.tolist()]
+    
+    report['rows'] = [
+        {
+            'class_grade_id': class_id,
+            'class_name': class_name,
+            'students': students,
+            'payment_rate': round(float(rates[row]), 4),
+            'on_time_rate': round(float(on_time_rates[row]), 4),
+            'charges': rupees(charges[row]),
+            'expected': rupees(expected[row]),
+            'total': from_paisa(int(expected[row].sum()))
+        }
+        for row, (class_id, class_name, students) in enumerate(classes)
+    ]
+    report.update(
+        charges=rupees(charges.sum(axis=0)),
+        expected=rupees(expected.sum(axis=0)),
+        on_time=rupees(on_time.sum(axis=0)),
+        total_charges=from_paisa(int(charges.sum())),
+        total_expected=from_paisa(int(expected.sum()))
+    )
+    return report
+
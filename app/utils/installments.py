@@ -0,0 +1,263 @@
+"""
+Bulk Installment Schedules
+
+This creates the installment fee records (one FeePayment row per part of
+an InstallmentPlan) for every active student whose class has the fee.
+
+Why a bulk job?
+- A plan of 3 parts for 2,000 students is 6,000 rows; creating them through
+  the ORM would cost a flush (plus receipt / status events) per row
+- Here: one query for the plans and their parts, one for the students,
+  one for the installments that already exist, then INSERTs in chunks
+  with executemany; the ledger and the collection cube are refreshed once
+- Discounts come from the compiled DiscountTable, priced once on the whole
+  fee and spread over the parts like the fee itself (a FIXED Rs. 500 off
+  is Rs. 500 off the fee, not Rs. 500 off every part)
+- Advance credit pays the new installments in the same transaction
+  (app/utils/credit.py)
+- Running it again creates only what is missing (a new student, a new plan)
+
+Each row carries its share of the fee in amount_due and its own due date,
+so FeePayment.update_status(), the ledger and the defaulter list treat every
+installment as a fee of its own: only the parts whose date has passed are late.
+
+Students who were already charged the whole fee (before the plan existed)
+are left alone.
+
+Run it with: flask generate-installments --user admin
+"""
+
+from app import db
+from app.models import (
+    CollectionCube, DataVersion, FeeInstallment, FeePayment, InstallmentPlan, Student, StudentLedger
+)
+from app.utils.credit import apply_credit
+from app.utils.discounts import DiscountTable, family_sizes
+from app.utils.fee_resolver import FeeResolver
+from app.utils.money import from_paisa, to_paisa
+from datetime import date, datetime
+from sqlalchemy.orm import selectinload
+
+# Rows per executemany INSERT
+CHUNK_SIZE = 1000
+
+
+class InstallmentError(Exception):
+    """Raised when installments cannot be generated (nothing is changed)"""
+
+
+def _existing(fee_ids):
+    """
+    What students already have for the planned fees, in one query
+    
+    Returns:
+    (set of (student_id, installment_id), set of (student_id, fee_structure_id) charged as a whole)
+    """
+    installments, whole = set(), set()
+    rows = db.session.execute(
+        db.select(FeePayment.student_id, FeePayment.fee_structure_id, FeePayment.installment_id)
+        .where(FeePayment.fee_structure_id.in_(fee_ids))
+    )
+    for student_id, fee_id, installment_id in rows:
+        if installment_id is None:
+            whole.add((student_id, fee_id))
+        else:
+            installments.add((student_id, installment_id))
+    return installments, whole
+
+
+def generate_installments(created_by_id, fee_structure_ids=None, dry_run=False):
+    """
+    Create the missing installment fee records of the current year's plans
+    
+    Parameters:
+    created_by_id: User recorded as the creator of the fee records
+    fee_structure_ids: Only the plans of these fees (None = every active plan)
+    dry_run: Count what would be created, then roll back
+    
+    Returns:
+    Report dictionary: plans, students, installments_created, skipped_existing, discounted,
+    credit_fees / credit_amount (installments paid from credit wallets), dry_run
+    """
+    resolver = FeeResolver.current()
+    if resolver is None:
+        raise InstallmentError('There is no current academic year.')
+    
+    query = InstallmentPlan.query.options(selectinload(InstallmentPlan.installments)).filter(
+        InstallmentPlan.is_active == True,
+        InstallmentPlan.fee_structure_id.in_([fee.id for fee in resolver.all_fees()])
+    )
+    if fee_structure_ids is not None:
+        query = query.filter(InstallmentPlan.fee_structure_id.in_(list(fee_structure_ids)))
+    plans = [plan for plan in query.all() if plan.installments]
+    
+    report = {
+        'plans': len(plans),
+        'students': 0,
+        'installments_created': 0,
+        'skipped_existing': 0,
+        'discounted': 0,
+        'credit_fees': 0,
+        'credit_amount': from_paisa(0),
+        'dry_run': dry_run
+    }
+    if not plans:
+        return report
+    
+    # Classes of every planned fee (from the resolver, no query)
+    plans_by_class = {}
+    for class_id in resolver.class_ids():
+        for fee in resolver.fees_for_class(class_id):
+            for plan in plans:
+                if plan.fee_structure_id == fee.id:
+                    plans_by_class.setdefault(class_id, []).append((plan, fee))
+    
+    students = db.session.execute(
+        db.select(Student.id, Student.class_grade_id, Student.family_id).where(
+            Student.is_active == True,
+            Student.class_grade_id.in_(list(plans_by_class))
+        )
+    ).all()
+    existing, whole = _existing([plan.fee_structure_id for plan in plans])
+    discounts = DiscountTable.current()
+    sizes = family_sizes({family_id for _, _, family_id in students}) if discounts else {}
+    
+    # Split every fee once
+    splits = {plan.id: plan.split_paisa(to_paisa(fee.amount)) for plans_and_fees in plans_by_class.values()
+              for plan, fee in plans_and_fees}
+    
+    today = date.today()
+    now = datetime.utcnow()
+    rows, skipped, discounted = [], 0, 0
+    for student_id, class_id, family_id in students:
+        for plan, fee in plans_by_class[class_id]:
+            if (student_id, fee.id) in whole:
+                skipped += len(plan.installments)
+                continue
+            fee_discount, rule_id = discounts.discount_for(
+                student_id, class_id, fee.fee_type, sizes.get(family_id, 0), to_paisa(fee.amount)
+            ) if discounts else (0, None)
+            part_discounts = plan.split_paisa(fee_discount)
+            for part, part_paisa, discount in zip(plan.installments, splits[plan.id], part_discounts):
+                if (student_id, part.id) in existing:
+                    skipped += 1
+                    continue
+                discount = min(discount, part_paisa)
+                if discount:
+                    discounted += 1
+                if discount >= part_paisa:
+                    status = FeePayment.STATUS_PAID  # Fully discounted: nothing to collect
+                elif part.due_date < today:
+                    status = FeePayment.STATUS_OVERDUE
+                else:
+                    status = FeePayment.STATUS_PENDING
+                rows.append({
+                    'student_id': student_id,
+                    'fee_structure_id': fee.id,
+                    'class_grade_id': class_id,
+                    'installment_id': part.id,
+                    'amount_due': from_paisa(part_paisa),
+                    'amount': 0,
+                    'discount': from_paisa(discount),
+                    'discount_rule_id': rule_id,
+                    'payment_method': FeePayment.PAYMENT_CASH,
+                    'payment_date': part.due_date,
+                    'due_date': part.due_date,
+                    'status': status,
+                    'is_archived': False,
+                    'created_by_id': created_by_id,
+                    'created_at': now,
+                    'updated_at': now
+                })
+    
+    report.update(
+        students=len({row['student_id'] for row in rows}),
+        installments_created=len(rows),
+        skipped_existing=skipped,
+        discounted=discounted
+    )
+    if not rows:
+        return report
+    
+    try:
+        table = FeePayment.__table__
+        for start in range(0, len(rows), CHUNK_SIZE):
+            db.session.execute(table.insert(), rows[start:start + CHUNK_SIZE])
+        
+        # Core INSERTs skip the ORM events: refresh the derived tables here
+        connection = db.session.connection()
+        StudentLedger.refresh({row['student_id'] for row in rows}, connection=connection)
+        CollectionCube.refresh_where(db.and_(
+            FeePayment.created_at == now,
+            FeePayment.installment_id.in_({row['installment_id'] for row in rows})
+        ), connection=connection)
+        DataVersion.bump([DataVersion.FEE_PAYMENT], connection=connection)
+        
+        # Prepaid students: settle the new fees from their credit wallets
+        credit = apply_credit(created_by_id, student_ids={row['student_id'] for row in rows}, today=today)
+        report.update(credit_fees=credit['fees_paid'], credit_amount=credit['amount'])
+        
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return report
+
+
+def set_plan(fee_structure_id, parts):
+    """
+    Create or replace the installment plan of a fee structure
+    
+    Parameters:
+    parts: List of (due date, percentage) in order; percentages add up to 100
+    
+    Returns:
+    The InstallmentPlan (committed)
+    
+    Parts cannot be replaced once installment fees were created from them.
+    """
+    from app.models import FeeStructure
+    from decimal import Decimal
+    
+    fee = db.session.get(FeeStructure, fee_structure_id)
+    if not fee:
+        raise InstallmentError(f'No fee structure with id {fee_structure_id}.')
+    if fee.is_recurring:
+        raise InstallmentError(f'{fee.fee_name} is a recurring fee; only one-time fees can be paid in installments.')
+    if len(parts) < 2:
+        raise InstallmentError('A plan needs at least two parts.')
+    if sum(Decimal(str(percentage)) for _, percentage in parts) != 100:
+        raise InstallmentError('The parts must add up to 100%.')
+    if any(Decimal(str(percentage)) <= 0 for _, percentage in parts):
+        raise InstallmentError('Every part must be more than 0%.')
+    dates = [due_date for due_date, _ in parts]
+    if dates != sorted(dates):
+        raise InstallmentError('The due dates must be in order.')
+    
+    plan = fee.installment_plan
+    if plan:
+        used = db.session.scalar(
+            db.select(db.func.count(FeePayment.id)).join(
+                FeeInstallment, FeeInstallment.id == FeePayment.installment_id
+            ).where(FeeInstallment.plan_id == plan.id)
+        )
+        if used:
+            raise InstallmentError(f'{used} installment fee(s) were already created from this plan.')
+        plan.installments = []
+        db.session.flush()
+    else:
+        plan = InstallmentPlan(fee_structure_id=fee.id)
+        db.session.add(plan)
+    
+    plan.is_active = True
+    plan.installments = [
+        FeeInstallment(number=number, name=f'Installment {number}/{len(parts)}',
+                       percentage=percentage, due_date=due_date)
+        for number, (due_date, percentage) in enumerate(parts, start=1)
+    ]
+    db.session.commit()
+    return plan
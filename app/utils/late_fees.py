@@ -0,0 +1,242 @@
+"""
+Bulk Late-Fee Surcharges
+
+This charges the late fees (LateFeeRule) of every open fee whose due date
+(plus the rule's grace days) has passed, in one pass.
+
+Why a bulk job?
+- Penalties worked out when a cashier opens a student would cost queries
+  on every page view, and two cashiers could see different amounts
+- Here: one query finds every late fee that has not been charged for the
+  period yet, the surcharges are worked out in memory (integer paisa), and
+  they are INSERTed in chunks with executemany
+
+Every surcharge is a FeePayment of the year's "Late Fee" structure
+(fee type LATE FEE, created when first needed), due on the run date, plus
+a LateFeeCharge row that records which fee and period it was for. So the
+surcharge is an ordinary due: it shows in the student ledger, the
+defaulter list, the collection cube and the forecast history, it is paid
+by allocate-payment (oldest due first) and it is settled when its
+FeePayment is PAID.
+
+Periods:
+- The period is the month of the run date, e.g. "2025-08"
+- A rule that repeats monthly charges once per period; other rules charge
+  once per fee, ever
+- Running the job again in the same month charges nothing new (and the
+  unique (fee payment, period) key refuses duplicates anyway)
+
+Charges recorded before surcharges were FeePayment rows get theirs on the
+next run.
+
+Run it daily from cron: flask apply-late-fees --user admin
+"""
+
+from app import db
+from app.models import (
+    CollectionCube, DataVersion, FeePayment, FeeStructure, LateFeeCharge, LateFeeRule, StudentLedger
+)
+from app.utils.money import from_paisa, to_paisa
+from datetime import date, datetime, timedelta
+
+# Rows per executemany INSERT
+CHUNK_SIZE = 1000
+
+
+def period_of(day):
+    """Late-fee period of a date, e.g. "2025-08" """
+    return day.strftime('%Y-%m')
+
+
+def _late_fees_select(as_of, period):
+    """
+    Open fees with an active rule, due before `as_of`, not yet charged
+    
+    One query. "Not yet charged" means no charge for this period, or no
+    charge at all for rules that do not repeat. The grace days are checked
+    in Python (date arithmetic differs between databases).
+    """
+    charges = LateFeeCharge.__table__
+    already_charged = db.exists().where(
+        charges.c.fee_payment_id == FeePayment.id,
+        db.or_(charges.c.period == period, LateFeeRule.repeat_monthly == False)
+    )
+    return db.select(
+        FeePayment.id,
+        FeePayment.student_id,
+        FeePayment.class_grade_id,
+        FeeStructure.academic_year_id,
+        FeePayment.due_date,
+        FeePayment.due_amount() - FeePayment.discount,
+        LateFeeRule.id
+    ).join(
+        FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+    ).join(
+        LateFeeRule, LateFeeRule.fee_structure_id == FeeStructure.id
+    ).where(
+        LateFeeRule.is_active == True,
+        FeePayment.open_status_filter(),
+        FeePayment.is_archived == False,
+        FeePayment.due_date < as_of,
+        ~already_charged
+    ).order_by(FeePayment.id)
+
+
+def _unbilled_charges_select():
+    """Charges recorded without a surcharge FeePayment (before surcharges were fee rows)"""
+    return db.select(
+        LateFeeCharge.id,
+        LateFeeCharge.student_id,
+        FeePayment.class_grade_id,
+        FeeStructure.academic_year_id,
+        LateFeeCharge.period,
+        LateFeeCharge.amount
+    ).join(
+        FeePayment, FeePayment.id == LateFeeCharge.fee_payment_id
+    ).join(
+        FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+    ).where(LateFeeCharge.surcharge_payment_id.is_(None)).order_by(LateFeeCharge.id)
+
+
+def late_fee_structures(academic_year_ids):
+    """
+    The "Late Fee" fee structure of each academic year, created when missing
+    
+    Returns:
+    {academic_year_id: fee_structure_id}
+    """
+    academic_year_ids = set(academic_year_ids)
+    structures = dict(db.session.execute(
+        db.select(FeeStructure.academic_year_id, db.func.min(FeeStructure.id)).where(
+            FeeStructure.fee_type == FeeStructure.FEE_TYPE_LATE,
+            FeeStructure.academic_year_id.in_(academic_year_ids)
+        ).group_by(FeeStructure.academic_year_id)
+    ).all())
+    for year_id in academic_year_ids - set(structures):
+        fee = FeeStructure(fee_type=FeeStructure.FEE_TYPE_LATE, fee_name='Late Fee', amount=0,
+                           academic_year_id=year_id, due_date_offset=0, is_recurring=False)
+        db.session.add(fee)
+        db.session.flush()
+        structures[year_id] = fee.id
+    return structures
+
+
+def _insert_surcharges(rows):
+    """INSERT surcharge FeePayment rows in chunks; their ids, in the order of `rows`"""
+    table = FeePayment.__table__
+    statement = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+    ids = []
+    for start in range(0, len(rows), CHUNK_SIZE):
+        ids += db.session.execute(statement, rows[start:start + CHUNK_SIZE]).scalars().all()
+    return ids
+
+
+def apply_late_fees(created_by_id, as_of=None, dry_run=False):
+    """
+    Charge the late fees of one period
+    
+    Parameters:
+    created_by_id: User recorded as creator of the surcharge fee records
+    as_of: Run date (defaults to today); its month is the period
+    dry_run: Work out the charges, then roll back
+    
+    Returns:
+    Report dictionary: period, charges, total, students, dry_run
+    """
+    as_of = as_of or date.today()
+    period = period_of(as_of)
+    rules = {rule.id: rule for rule in LateFeeRule.query.filter_by(is_active=True).all()}
+    
+    # (student, class, year, surcharge paisa, LateFeeCharge values or the id of an unbilled charge)
+    surcharges = []
+    for payment_id, student_id, class_id, year_id, due_date, fee_amount, rule_id in db.session.execute(
+            _late_fees_select(as_of, period)):
+        rule = rules[rule_id]
+        if as_of <= due_date + timedelta(days=rule.grace_days):
+            continue
+        surcharge = rule.surcharge_paisa(to_paisa(fee_amount))
+        if surcharge <= 0:
+            continue
+        surcharges.append((student_id, class_id, year_id, surcharge, {
+            'fee_payment_id': payment_id,
+            'student_id': student_id,
+            'rule_id': rule_id,
+            'period': period
+        }))
+    new_charges = len(surcharges)
+    for charge_id, student_id, class_id, year_id, _, amount in db.session.execute(
+            _unbilled_charges_select()):
+        surcharges.append((student_id, class_id, year_id, to_paisa(amount), charge_id))
+    
+    report = {
+        'period': period,
+        'charges': new_charges,
+        'total': from_paisa(sum(surcharge for _, _, _, surcharge, _ in surcharges[:new_charges])),
+        'students': len({student_id for student_id, _, _, _, _ in surcharges[:new_charges]}),
+        'billed_earlier_charges': len(surcharges) - new_charges,
+        'dry_run': dry_run
+    }
+    if not surcharges:
+        return report
+    
+    try:
+        structures = late_fee_structures({year_id for _, _, year_id, _, _ in surcharges})
+        today = date.today()
+        now = datetime.utcnow()
+        ids = _insert_surcharges([
+            {
+                'student_id': student_id,
+                'fee_structure_id': structures[year_id],
+                'class_grade_id': class_id,
+                'amount_due': from_paisa(surcharge),
+                'amount': 0,
+                'payment_method': FeePayment.PAYMENT_CASH,
+                'payment_date': as_of,
+                'due_date': as_of,
+                'status': FeePayment.status_for(0, surcharge, as_of, today),
+                'is_archived': False,
+                'remarks': f'Late fee {period}',
+                'created_by_id': created_by_id,
+                'created_at': now,
+                'updated_at': now
+            }
+            for student_id, class_id, year_id, surcharge, _ in surcharges
+        ])
+        
+        # New charges: one LateFeeCharge per surcharge; earlier ones get their link
+        charges = LateFeeCharge.__table__
+        new_rows = [
+            dict(charge, amount=from_paisa(surcharge), surcharge_payment_id=id, created_at=now)
+            for (_, _, _, surcharge, charge), id in zip(surcharges[:new_charges], ids)
+        ]
+        for start in range(0, len(new_rows), CHUNK_SIZE):
+            db.session.execute(charges.insert(), new_rows[start:start + CHUNK_SIZE])
+        if len(surcharges) > new_charges:
+            db.session.execute(
+                charges.update().where(charges.c.id == db.bindparam('b_id')).values(
+                    surcharge_payment_id=db.bindparam('b_payment_id')
+                ),
+                [
+                    {'b_id': charge_id, 'b_payment_id': id}
+                    for (_, _, _, _, charge_id), id in zip(surcharges[new_charges:], ids[new_charges:])
+                ]
+            )
+        
+        # Core INSERTs skip the ORM events: refresh the derived tables here
+        connection = db.session.connection()
+        StudentLedger.refresh({student_id for student_id, _, _, _, _ in surcharges}, connection=connection)
+        CollectionCube.refresh_where(db.and_(
+            FeePayment.created_at == now,
+            FeePayment.fee_structure_id.in_(list(structures.values()))
+        ), connection=connection)
+        DataVersion.bump([DataVersion.FEE_PAYMENT], connection=connection)
+        
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return report
@@ -0,0 +1,92 @@
+"""
+Money Helpers
+
+All amounts in the system are Pakistani Rupees with 2 decimal places.
+This module keeps them exact.
+
+Why this module?
+- float(5000.10) is not exactly 5000.10; adding thousands of floats drifts
+- SQLite stores Numeric(10, 2) columns as floating point (REAL), so even
+  SUM() in the database can drift over years of payments
+- Counting in paisa (1 Rupee = 100 paisa) with integers is always exact
+
+What it provides:
+- to_decimal(): any amount -> Decimal with 2 decimal places
+- to_paisa() / from_paisa(): Decimal <-> integer paisa
+- Money: column type that stores integer paisa and returns Decimal
+- paisa(): SQL expression that turns an amount column into integer paisa
+- money_sum(): exact SQL SUM of an amount column, returned as Decimal
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import BigInteger, Integer, cast, func, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+TWO_PLACES = Decimal('0.01')
+
+
+def to_decimal(value):
+    """
+    Convert an amount to Decimal with 2 decimal places
+    
+    Floats are converted through str() so 0.1 becomes Decimal('0.10'),
+    not Decimal('0.1000000000000000055511151231257827').
+    None stays None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        value = str(value)
+    return Decimal(value).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def to_paisa(value):
+    """Convert an amount in Rupees to integer paisa (None stays None)"""
+    if value is None:
+        return None
+    return int(to_decimal(value) * 100)
+
+
+def from_paisa(value):
+    """Convert integer paisa to a Decimal amount in Rupees (None stays None)"""
+    if value is None:
+        return None
+    return (Decimal(int(value)) / 100).quantize(TWO_PLACES)
+
+
+class Money(TypeDecorator):
+    """
+    Column type for exact amounts
+    
+    Stored as an integer number of paisa, read back as Decimal Rupees.
+    Use it for new tables (ledgers, aggregates); func.sum() on a Money
+    column is exact in every database and also returns Decimal.
+    """
+    
+    impl = BigInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return to_paisa(value)
+    
+    def process_result_value(self, value, dialect):
+        return from_paisa(value)
+
+
+def paisa(expression):
+    """
+    SQL expression: an amount (Numeric column or expression) as integer paisa
+    
+    ROUND() first, because the stored REAL may be 4999.9999999.
+    """
+    return cast(func.round(expression * 100), Integer)
+
+
+def money_sum(expression):
+    """
+    Exact SQL SUM of an amount, returned as Decimal
+    
+    Sums integer paisa in the database (CAST strategy), so the result is
+    exact no matter how many rows are added. Empty sums return 0.00.
+    """
+    return type_coerce(func.coalesce(func.sum(paisa(expression)), 0), Money())
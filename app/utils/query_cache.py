@@ -0,0 +1,195 @@
+"""
+Query Cache for Reference Data
+
+This caches the results of small, hot lookups (active classes, current
+academic year, fees of a class) and throws them away automatically when
+one of the tables they read is changed.
+
+Why a query cache?
+- These lookups run on nearly every request, but classes, years and fee
+  structures change a few times a year
+- A cache hit costs no query at all
+
+How does invalidation work?
+- Every cached result is tagged with the tables it reads
+- Each tag has a "stamp"; a cached result is only used while the stamps
+  of all its tags are the same as when it was stored
+- Session events collect the tables written by each flush (ORM objects
+  and bulk UPDATE / DELETE / INSERT statements); after COMMIT their
+  stamps are changed. After a rollback nothing changes
+- Inside a transaction that already wrote one of the tags, the cache is
+  bypassed, so the code sees its own uncommitted changes
+
+Backends (QUERY_CACHE_BACKEND):
+- 'memory': stamps are counters in this process (one worker only)
+- 'file': stamps are small files in QUERY_CACHE_DIR; every worker checks
+  them with os.stat(), so a change made by one worker is seen by all
+  (results themselves are still kept per process)
+
+Cached ORM objects are stored detached and merged into the current
+session without SQL (session.merge(load=False)).
+
+Example:
+    classes = cached_query('class_grade:active', ['class_grade'],
+                           lambda: ClassGrade.query.filter_by(is_active=True).all())
+"""
+
+from app import db
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+import os
+import pickle
+import tempfile
+import threading
+
+# Tables that cached results may depend on (writes to others are ignored)
+CACHED_TABLES = {'academic_year', 'class_grade', 'discount_rule', 'fee_structure', 'fee_structure_classes'}
+
+
+class MemoryBackend:
+    """Stamps are in-process counters"""
+    
+    def __init__(self):
+        self.results = {}
+        self._stamps = {}
+        self._lock = threading.Lock()
+    
+    def stamp(self, tag):
+        return self._stamps.get(tag, 0)
+    
+    def bump(self, tag):
+        with self._lock:
+            self._stamps[tag] = self._stamps.get(tag, 0) + 1
+
+
+class FileBackend(MemoryBackend):
+    """Stamps are files shared by every worker on this machine"""
+    
+    def __init__(self, folder):
+        super().__init__()
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+    
+    def stamp(self, tag):
+        try:
+            stat = os.stat(os.path.join(self.folder, tag))
+        except FileNotFoundError:
+            return None
+        # A bump replaces the file, so the inode changes even when the clock does not
+        return (stat.st_ino, stat.st_mtime_ns)
+    
+    def bump(self, tag):
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        os.close(fd)
+        os.replace(temp_path, os.path.join(self.folder, tag))
+
+
+def _backend():
+    """The cache backend of the current app (created on first use)"""
+    backend = current_app.extensions.get('query_cache')
+    if backend is None:
+        if current_app.config.get('QUERY_CACHE_BACKEND') == 'file':
+            backend = FileBackend(current_app.config['QUERY_CACHE_DIR'])
+        else:
+            backend = MemoryBackend()
+        current_app.extensions['query_cache'] = backend
+    return backend
+
+
+def _attach(value):
+    """Merge cached (detached) ORM objects into the current session, without SQL"""
+    if isinstance(value, list):
+        return [_attach(item) for item in value]
+    if not isinstance(value, db.Model):
+        return value
+    existing = db.session.identity_map.get(inspect(value).key)
+    return existing if existing is not None else db.session.merge(value, load=False)
+
+
+def cached_query(key, tags, load):
+    """
+    Return a cached lookup result, running load() on a miss
+    
+    Parameters:
+    key: Unique name of the lookup (include its parameters)
+    tags: Table names the lookup reads (must be in CACHED_TABLES)
+    load: Function without arguments that runs the query; returns an ORM
+          object, a list of ORM objects, None or plain values
+    
+    Returns:
+    The result, with ORM objects attached to the current session
+    """
+    unknown = set(tags) - CACHED_TABLES
+    if unknown:
+        raise ValueError(f'Not a cached table: {", ".join(sorted(unknown))}')
+    
+    # This transaction changed a tag: the cache cannot show its own writes
+    if db.session.info.get('query_cache_written', set()) & set(tags):
+        return load()
+    
+    backend = _backend()
+    stamps = tuple(backend.stamp(tag) for tag in tags)
+    entry = backend.results.get(key)
+    if entry is not None and entry[0] == stamps:
+        return _attach(entry[1])
+    
+    value = load()
+    # Detached copies, so later changes to the session's objects do not leak in
+    backend.results[key] = (stamps, pickle.loads(pickle.dumps(value)))
+    return value
+
+
+def mark_written(session, tables):
+    """
+    Record tables written with statements the events cannot see
+    (e.g. Core UPDATEs on session.connection()); they are invalidated on commit
+    """
+    _written(session).update(table for table in tables if table in CACHED_TABLES)
+
+
+def invalidate(tags):
+    """Change the stamps of the given tables (results using them are dropped)"""
+    backend = _backend()
+    for tag in tags:
+        backend.bump(tag)
+
+
+# ========== EVENT LISTENERS ==========
+# Collect tables written in the transaction; invalidate them after commit
+
+def _written(session):
+    """Set of cached tables written in the session's current transaction"""
+    return session.info.setdefault('query_cache_written', set())
+
+
+@event.listens_for(Session, 'after_flush')
+def collect_flushed_tables(session, flush_context):
+    """Tables of every inserted, changed or deleted object"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        _written(session).update(
+            table.name for table in inspect(obj).mapper.tables if table.name in CACHED_TABLES
+        )
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def collect_bulk_statement_tables(orm_execute_state):
+    """Tables written by bulk statements (Query.update(), table.insert(), ...)"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table.name in CACHED_TABLES:
+            _written(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_committed_tables(session):
+    """The writes are visible to everyone now: drop results that read them"""
+    written = session.info.pop('query_cache_written', None)
+    if written and has_app_context():
+        invalidate(written)
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_rolled_back_tables(session):
+    """Nothing was written after all"""
+    session.info.pop('query_cache_written', None)
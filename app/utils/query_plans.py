@@ -0,0 +1,105 @@
+"""
+Query Plan Checks
+
+This module runs EXPLAIN QUERY PLAN on the queries that run on almost
+every page and checks that SQLite answers them from an index.
+
+Why this module?
+- The composite/partial indexes only help if SQLite actually picks them
+- A small change to a query (e.g. a different IN (...) list) can silently
+  turn an index lookup into a full table scan
+- Running `flask check-query-plans` after a model or query change catches that
+
+Each hot query lists the indexes that are acceptable for it.
+"""
+
+from datetime import date
+from app import db
+
+
+def _hot_queries():
+    """
+    Build the hot queries exactly as the routes build them
+    
+    Returns:
+    List of (name, query, accepted index names)
+    """
+    from app.models import Student, FeePayment, StudentLedger
+    
+    return [
+        (
+            'view_student: recent payments',
+            FeePayment.query.filter_by(student_id=1).order_by(FeePayment.payment_date.desc()).limit(10),
+            ['ix_fee_payment_student_payment_date']
+        ),
+        (
+            'student ledger: recompute one student',
+            StudentLedger._balances_select([1]),
+            ['ix_fee_payment_student_status', 'ix_fee_payment_student_payment_date']
+        ),
+        (
+            'list_students: class + active filter',
+            Student.query.filter_by(class_grade_id=1).filter_by(is_active=True).order_by(Student.student_id.desc()),
+            ['ix_student_class_active']
+        ),
+        (
+            'defaulters: overdue fees by due date',
+            FeePayment.query.filter(
+                FeePayment.open_status_filter(),
+                FeePayment.due_date < date.today()
+            ).order_by(FeePayment.due_date),
+            ['ix_fee_payment_open_due_date']
+        ),
+        (
+            'view_student: siblings',
+            Student.query.filter(Student.family_id == 1, Student.id != 1),
+            ['ix_student_family_id']
+        ),
+    ]
+
+
+def explain(query):
+    """
+    Return the EXPLAIN QUERY PLAN detail lines for a query
+    
+    Accepts an ORM query or a Core select. Parameters are rendered
+    inline so the plan matches what SQLite sees for the real query.
+    """
+    statement = getattr(query, 'statement', query)
+    sql = str(statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    rows = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)).all()
+    return [row[-1] for row in rows]
+
+
+def _is_table_scan(line):
+    """
+    True for a plan line that reads a whole table without an index
+    
+    Scans of subqueries (e.g. "SCAN ledger_rows") read rows that were
+    already found through an index, so they do not count.
+    """
+    if not line.startswith('SCAN ') or 'INDEX' in line:
+        return False
+    return line.split()[1] in db.metadata.tables
+
+
+def check_query_plans():
+    """
+    Check every hot query
+    
+    Returns:
+    List of dictionaries: name, plan (list of strings), ok (bool)
+    A query is ok when it uses one of its accepted indexes and never
+    does a plain full table scan.
+    """
+    results = []
+    for name, query, accepted in _hot_queries():
+        plan = explain(query)
+        uses_index = any(index in line for line in plan for index in accepted)
+        full_scan = any(_is_table_scan(line) for line in plan)
+        results.append({
+            'name': name,
+            'plan': plan,
+            'ok': uses_index and not full_scan
+        })
+    return results
@@ -0,0 +1,425 @@
+"""
+Statement Reconciliation
+
+This checks digital payments (Easypaisa, JazzCash, bank transfer) against
+the provider's statement file (CSV or XLSX) and marks them as verified.
+
+Why reconciliation?
+- Cashiers record the transaction ID a parent shows them; until now they
+  compared those by hand against the provider's statement
+- A month's statement has thousands of lines; checking each one with a
+  query (or by eye) is slow
+
+How does it work?
+1. The statement is read row by row (csv reader / openpyxl read-only mode);
+   the header row is found by its column names (see COLUMN_ALIASES)
+2. The payments of the provider's method whose transaction ID appears on
+   the statement are loaded with a few IN (...) queries (unique index on
+   transaction_id) into a dictionary: transaction ID -> payment (a hash
+   index in memory)
+3. Every statement line is matched:
+   - by transaction ID (dictionary lookup), checking the amount
+   - otherwise by amount + date (within FALLBACK_DAYS) + account name,
+     among the payments of that method in the statement's date range
+4. Lines are flagged: MATCHED, AMOUNT_MISMATCH, DUPLICATE (same
+   transaction twice on the statement, or two lines for one payment),
+   UNMATCHED (no payment found) or INVALID (unreadable row). Payments of
+   the period that are on no line are listed as "not on statement"
+5. apply=True writes VERIFIED / MISMATCH with one UPDATE per status
+   (flask reconcile-statement, or the upload page /reconciliation/)
+
+Group payments (family payments) are matched the same way as individual
+payments; payments that belong to a group are checked through their group.
+"""
+
+from app import db
+from app.models import DataVersion, FeePayment, GroupPayment
+from app.utils.money import from_paisa, to_paisa
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+import csv
+import io
+import re
+import zipfile
+
+# Statement provider -> payment method of its payments
+PROVIDERS = {
+    'easypaisa': FeePayment.PAYMENT_EASYPAISA,
+    'jazzcash': FeePayment.PAYMENT_JAZZCASH,
+    'bank': FeePayment.PAYMENT_BANK_TRANSFER
+}
+
+# Column names understood in statements (compared in lower case, words joined by _)
+COLUMN_ALIASES = {
+    'transaction_id': ('transaction_id', 'transaction_no', 'transaction_number', 'tid', 'trx_id', 'txn_id',
+                       'reference', 'reference_no', 'ref_no'),
+    'amount': ('amount', 'credit', 'credit_amount', 'amount_pkr', 'amount_rs'),
+    'date': ('date', 'transaction_date', 'txn_date', 'value_date', 'posting_date'),
+    'account': ('account_name', 'account_title', 'sender_name', 'sender', 'customer_name', 'name', 'from_account')
+}
+
+# Date formats tried for text dates
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d-%b-%Y', '%d %b %Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M')
+
+# Rows searched for the header line (statements often start with a title block)
+HEADER_SEARCH_ROWS = 20
+
+# Fallback matching: statement date and payment date may differ by this many days
+FALLBACK_DAYS = 3
+
+# Transaction IDs / payment ids per IN (...) statement
+LOOKUP_CHUNK_SIZE = 500
+
+# Line results
+MATCHED = 'MATCHED'
+AMOUNT_MISMATCH = 'AMOUNT_MISMATCH'
+DUPLICATE = 'DUPLICATE'
+UNMATCHED = 'UNMATCHED'
+INVALID = 'INVALID'
+
+# One statement line (amount in paisa)
+StatementLine = namedtuple('StatementLine', ['line', 'transaction_id', 'amount', 'date', 'account'])
+
+# One recorded payment: kind is 'payment' (FeePayment) or 'group' (GroupPayment); amount in paisa
+Candidate = namedtuple('Candidate', ['kind', 'id', 'number', 'transaction_id', 'amount', 'date', 'account', 'verification_status'])
+
+
+class ReconciliationError(Exception):
+    """Raised when the statement cannot be read (unknown format, no header row)"""
+
+
+# ========== READING THE STATEMENT ==========
+
+def _header_key(value):
+    """Column name in comparable form: 'Transaction ID' -> 'transaction_id'"""
+    return re.sub(r'[^a-z0-9]+', '_', str(value or '').strip().lower()).strip('_')
+
+
+def _name_key(value):
+    """Account name in comparable form (lower case, letters and digits only)"""
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(value or '').lower()).split())
+
+
+def _text(value):
+    """Cell as stripped text ('' for empty); whole-number floats lose their .0"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _parse_date(value):
+    """Date of a cell (datetime / date / text), None if unreadable"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _text(value)
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(value):
+    """Amount of a cell in paisa, None if unreadable or not positive"""
+    text = re.sub(r'(?i)rs\.?|pkr|,|\s', '', _text(value))
+    try:
+        amount = to_paisa(Decimal(text))
+    except (InvalidOperation, ValueError):
+        return None
+    return amount if amount > 0 else None
+
+
+def _rows(file, filename):
+    """Cell values of every row of a CSV or XLSX file (streamed)"""
+    if filename.lower().endswith('.xlsx'):
+        try:
+            workbook = load_workbook(file, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError) as error:
+            raise ReconciliationError('The .xlsx file could not be opened (damaged or not an Excel workbook).') from error
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+    elif filename.lower().endswith('.csv'):
+        try:
+            yield from csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+        except UnicodeDecodeError as error:
+            raise ReconciliationError('The CSV file is not UTF-8 text. Save it as "CSV UTF-8" and upload it again.') from error
+        except csv.Error as error:
+            raise ReconciliationError(f'The CSV file could not be read: {error}') from error
+    else:
+        raise ReconciliationError('The statement must be a .csv or .xlsx file.')
+
+
+def _columns(header):
+    """Position of each field in a header row, None if the row is not the header"""
+    keys = [_header_key(value) for value in header]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in keys:
+                columns[field] = keys.index(alias)
+                break
+    required = ('transaction_id', 'amount', 'date')
+    return columns if all(field in columns for field in required) else None
+
+
+def read_statement(file, filename):
+    """
+    Read a statement file
+    
+    Returns:
+    (lines, invalid): StatementLine list and [(line number, reason), ...]
+    """
+    rows = _rows(file, filename)
+    columns = None
+    line_number = 0
+    for line_number, row in enumerate(rows, start=1):
+        columns = _columns(row)
+        if columns or line_number >= HEADER_SEARCH_ROWS:
+            break
+    if not columns:
+        raise ReconciliationError('No header row with transaction ID, amount and date columns was found.')
+    
+    def cell(row, field):
+        index = columns.get(field)
+        return row[index] if index is not None and index < len(row) else None
+    
+    lines, invalid = [], []
+    for line_number, row in enumerate(rows, start=line_number + 1):
+        if not any(_text(value) for value in row):
+            continue
+        transaction_id = _text(cell(row, 'transaction_id'))
+        amount = _parse_amount(cell(row, 'amount'))
+        line_date = _parse_date(cell(row, 'date'))
+        if amount is None or line_date is None:
+            invalid.append((line_number, 'Unreadable amount or date'))
+            continue
+        lines.append(StatementLine(line_number, transaction_id, amount, line_date, _name_key(cell(row, 'account'))))
+    return lines, invalid
+
+
+# ========== LOADING PAYMENTS ==========
+
+def _payment_select(model, number_column, amount_column):
+    """Recorded payments as Candidate columns (individual payments of a group are left out)"""
+    statement = db.select(
+        model.id, number_column, model.transaction_id, amount_column,
+        model.payment_date, model.account_name, model.verification_status
+    )
+    if model is FeePayment:
+        statement = statement.where(FeePayment.group_payment_id.is_(None))
+    return statement
+
+
+def _candidates(statement, kind):
+    """Candidate tuples of a payment query"""
+    return [
+        Candidate(kind, id, number, transaction_id, to_paisa(amount), payment_date, _name_key(account), status)
+        for id, number, transaction_id, amount, payment_date, account, status in db.session.execute(statement)
+    ]
+
+
+def _sources():
+    """(kind, model, query) of each payment table"""
+    return (
+        ('payment', FeePayment, _payment_select(FeePayment, FeePayment.receipt_number, FeePayment.amount)),
+        ('group', GroupPayment, _payment_select(GroupPayment, GroupPayment.group_payment_number, GroupPayment.total_amount))
+    )
+
+
+def _by_transaction_id(transaction_ids, method):
+    """
+    Hash index of the payments with these transaction IDs: {transaction ID: Candidate}
+    
+    Only payments of the statement provider's method: a Jazzcash ID that
+    happens to equal an Easypaisa one must not verify the Easypaisa payment.
+    """
+    index = {}
+    transaction_ids = sorted(transaction_ids)
+    for kind, model, statement in _sources():
+        for start in range(0, len(transaction_ids), LOOKUP_CHUNK_SIZE):
+            chunk = transaction_ids[start:start + LOOKUP_CHUNK_SIZE]
+            for candidate in _candidates(statement.where(
+                model.payment_method == method,
+                model.transaction_id.in_(chunk)
+            ), kind):
+                index[candidate.transaction_id] = candidate
+    return index
+
+
+def _in_period(method, first_day, last_day):
+    """Payments of one method between two dates"""
+    candidates = []
+    for kind, model, statement in _sources():
+        candidates += _candidates(statement.where(
+            model.payment_method == method,
+            model.payment_date.between(first_day, last_day)
+        ), kind)
+    return candidates
+
+
+# ========== MATCHING ==========
+
+def _accounts_match(line_account, payment_account):
+    """Same account name (one may be a shortened form of the other)"""
+    if not line_account or not payment_account:
+        return False
+    return line_account in payment_account or payment_account in line_account
+
+
+def _fallback(line, by_amount, used):
+    """
+    Payment for a line without a known transaction ID: same amount, close date,
+    same account name; without an account match only if there is one candidate
+    
+    Returns:
+    (Candidate or None, matched_by)
+    """
+    close = [
+        candidate for candidate in by_amount.get(line.amount, [])
+        if (candidate.kind, candidate.id) not in used
+        and abs((candidate.date - line.date).days) <= FALLBACK_DAYS
+    ]
+    same_account = [c for c in close if _accounts_match(line.account, c.account)]
+    if same_account:
+        return min(same_account, key=lambda c: (abs((c.date - line.date).days), c.id)), 'amount_date_account'
+    if len(close) == 1:
+        return close[0], 'amount_date'
+    return None, None
+
+
+def _line_result(line, result, candidate=None, matched_by=None, note=''):
+    """One row of the reconciliation report"""
+    return {
+        'line': line.line,
+        'transaction_id': line.transaction_id,
+        'amount': from_paisa(line.amount),
+        'date': line.date,
+        'account': line.account,
+        'result': result,
+        'matched_by': matched_by,
+        'payment_kind': candidate.kind if candidate else None,
+        'payment_id': candidate.id if candidate else None,
+        'payment_number': candidate.number if candidate else None,
+        'payment_amount': from_paisa(candidate.amount) if candidate else None,
+        'note': note
+    }
+
+
+def reconcile(file, filename, provider, apply=False):
+    """
+    Match a provider statement against the recorded payments
+    
+    Parameters:
+    file: Binary file object of the statement
+    filename: Its name (.csv or .xlsx)
+    provider: 'easypaisa', 'jazzcash' or 'bank'
+    apply: Write VERIFIED / MISMATCH on the matched payments and commit
+    
+    Returns:
+    Report dictionary: summary (count per result), lines, not_on_statement, applied
+    """
+    if provider not in PROVIDERS:
+        raise ReconciliationError(f'Unknown provider: {provider}')
+    method = PROVIDERS[provider]
+    lines, invalid = read_statement(file, filename)
+    
+    by_transaction = _by_transaction_id({line.transaction_id for line in lines if line.transaction_id}, method)
+    period = []
+    if lines:
+        first_day = min(line.date for line in lines)
+        last_day = max(line.date for line in lines)
+        period = _in_period(method, first_day - timedelta(days=FALLBACK_DAYS), last_day + timedelta(days=FALLBACK_DAYS))
+    by_amount = {}
+    for candidate in period:
+        by_amount.setdefault(candidate.amount, []).append(candidate)
+    
+    results, seen_ids, used = [], set(), set()
+    # Transaction ID matches first, so fallback matching cannot take their payments
+    ordered = sorted(lines, key=lambda line: (line.transaction_id not in by_transaction, line.line))
+    for line in ordered:
+        if line.transaction_id and line.transaction_id in seen_ids:
+            results.append(_line_result(line, DUPLICATE, note='Transaction ID appears earlier in the statement'))
+            continue
+        if line.transaction_id:
+            seen_ids.add(line.transaction_id)
+        
+        candidate = by_transaction.get(line.transaction_id)
+        matched_by = 'transaction_id' if candidate else None
+        if candidate is None:
+            candidate, matched_by = _fallback(line, by_amount, used)
+        if candidate is None:
+            results.append(_line_result(line, UNMATCHED))
+            continue
+        
+        key = (candidate.kind, candidate.id)
+        if key in used:
+            results.append(_line_result(line, DUPLICATE, candidate, matched_by, 'Payment already matched by another line'))
+        elif candidate.amount != line.amount:
+            used.add(key)
+            results.append(_line_result(line, AMOUNT_MISMATCH, candidate, matched_by))
+        else:
+            used.add(key)
+            results.append(_line_result(line, MATCHED, candidate, matched_by))
+    
+    results.sort(key=lambda row: row['line'])
+    for line_number, reason in invalid:
+        results.append(_line_result(StatementLine(line_number, None, None, None, None), INVALID, note=reason))
+    
+    # Recorded in the statement's period, but on no line
+    not_on_statement = []
+    if lines:
+        not_on_statement = [
+            candidate for candidate in period
+            if (candidate.kind, candidate.id) not in used
+            and first_day <= candidate.date <= last_day
+            and candidate.verification_status != FeePayment.VERIFICATION_VERIFIED
+        ]
+    
+    summary = {result: 0 for result in (MATCHED, AMOUNT_MISMATCH, DUPLICATE, UNMATCHED, INVALID)}
+    for row in results:
+        summary[row['result']] += 1
+    
+    report = {
+        'provider': provider,
+        'summary': summary,
+        'lines': results,
+        'not_on_statement': not_on_statement,
+        'applied': False
+    }
+    if apply:
+        apply_verification(results)
+        report['applied'] = True
+    return report
+
+
+def apply_verification(results):
+    """
+    Write the verification status of matched payments and commit
+    
+    One UPDATE per table and status (per LOOKUP_CHUNK_SIZE payments).
+    """
+    now = datetime.utcnow()
+    statuses = {MATCHED: FeePayment.VERIFICATION_VERIFIED, AMOUNT_MISMATCH: FeePayment.VERIFICATION_MISMATCH}
+    changed = set()
+    for kind, model in (('payment', FeePayment), ('group', GroupPayment)):
+        for result, status in statuses.items():
+            ids = [row['payment_id'] for row in results if row['result'] == result and row['payment_kind'] == kind]
+            for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+                db.session.execute(model.__table__.update().where(
+                    model.id.in_(ids[start:start + LOOKUP_CHUNK_SIZE])
+                ).values(verification_status=status, verified_at=now))
+                changed.add(model.__tablename__)
+    if changed:
+        DataVersion.bump(changed)
+    db.session.commit()
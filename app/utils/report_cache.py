@@ -0,0 +1,197 @@
+"""
+Report Result Cache
+
+This keeps finished reports (report dictionaries, DataFrames, .xlsx files)
+as files under instance/report_cache/ and serves them again until the
+data behind them changes.
+
+Why a cache?
+- Reports and exports are recomputed on every click, even when nothing
+  was paid or edited since the last run
+- A cached report costs one small query (the data versions) and one
+  file read
+
+How does it know the data changed?
+- Every report names the tables it reads (e.g. fee_payment, student)
+- The cache key = report name + parameters + DataVersion counters of
+  those tables (see app/models/data_version.py)
+- Any write to those tables bumps a counter, so the next request has a
+  new key and rebuilds; the outdated file is deleted right away
+
+Size limit:
+- When the folder grows past REPORT_CACHE_MAX_BYTES, the least recently
+  used files are deleted (a file's modification time is its "last used"
+  time; every cache hit touches the file)
+
+Files are written by the application itself (pickle for Python objects,
+the finished file for exports), never uploaded by users. DataFrames are
+pickled too: Parquet would need pyarrow, which is not a dependency.
+
+Example:
+    report = cached_report('revenue', {'period': 'month'}, [DataVersion.FEE_PAYMENT],
+                           lambda: revenue_report(period='month'))
+"""
+
+from app.models import DataVersion
+from flask import current_app
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+
+def cache_dir():
+    """Folder that holds the cached reports (created if missing)"""
+    folder = current_app.config['REPORT_CACHE_DIR']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _digest(value):
+    """Short stable hash of a JSON-able value (dates etc. become strings)"""
+    text = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:24]
+
+
+def _file_prefix(name, params):
+    """File name part shared by every version of one report + parameters"""
+    return f'{name}-{_digest(params)}-'
+
+
+def _open(path):
+    """Open a cached file and mark it as recently used (None if missing)"""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    os.utime(path)
+    return f
+
+
+def _write(folder, file_name, write):
+    """
+    Create a cache file atomically (temp file + rename),
+    so other workers never read half a file
+    """
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(temp_path, os.path.join(folder, file_name))
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+def _remove_outdated(folder, prefix, keep):
+    """Delete older versions of the same report + parameters"""
+    for entry in os.scandir(folder):
+        if entry.name.startswith(prefix) and entry.name != keep:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def evict(max_bytes=None):
+    """
+    Delete least recently used files until the cache fits in max_bytes
+    
+    Returns:
+    Number of files deleted
+    """
+    folder = cache_dir()
+    max_bytes = current_app.config['REPORT_CACHE_MAX_BYTES'] if max_bytes is None else max_bytes
+    
+    files = []
+    for entry in os.scandir(folder):
+        if entry.is_file() and not entry.name.endswith('.tmp'):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    
+    total = sum(size for _, size, _ in files)
+    deleted = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def clear():
+    """Delete every cached report; returns the number of files deleted"""
+    return evict(max_bytes=0)
+
+
+def _lookup(name, params, tables, extension):
+    """Folder, file name and shared prefix of a report at the current data versions"""
+    tables = [tables] if isinstance(tables, str) else list(tables)
+    prefix = _file_prefix(name, params)
+    return cache_dir(), prefix, prefix + _digest(DataVersion.current(tables)) + extension
+
+
+def _cleanup(folder, prefix, file_name):
+    """After storing a file: drop its outdated versions and enforce the size limit"""
+    _remove_outdated(folder, prefix, keep=file_name)
+    evict()
+
+
+def cached_file(name, params, tables, write, extension='.xlsx'):
+    """
+    Return a cached file (e.g. an Excel export), writing it on a miss
+    
+    The export is written straight into the cache folder, so big files
+    are never held in memory.
+    
+    Parameters:
+    name: Report name (e.g. 'defaulters')
+    params: JSON-able parameters that change the result (dates, filters)
+    tables: Table name or list of table names the report reads
+            (DataVersion.FEE_PAYMENT, DataVersion.STUDENT, ...)
+    write: Function that writes the file into the binary file object it gets
+    extension: File extension of the cached file
+    
+    Returns:
+    Open binary file (ready for send_file); it stays readable even if
+    another worker evicts the cache file meanwhile
+    """
+    folder, prefix, file_name = _lookup(name, params, tables, extension)
+    path = os.path.join(folder, file_name)
+    
+    cached = _open(path)
+    if cached is None:
+        _write(folder, file_name, write)
+        # Opened before eviction, so even an oversized export is still sent
+        cached = open(path, 'rb')
+        _cleanup(folder, prefix, file_name)
+    return cached
+
+
+def cached_report(name, params, tables, build):
+    """
+    Return a cached report object (dictionary, DataFrame), building it on a miss
+    
+    Parameters:
+    name, params, tables: As in cached_file()
+    build: Function without arguments that computes the report
+    
+    Returns:
+    The report (unpickled from disk or freshly built)
+    """
+    folder, prefix, file_name = _lookup(name, params, tables, '.pkl')
+    
+    cached = _open(os.path.join(folder, file_name))
+    if cached is not None:
+        with cached:
+            return pickle.load(cached)
+    
+    value = build()
+    _write(folder, file_name, lambda f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL))
+    _cleanup(folder, prefix, file_name)
+    return value
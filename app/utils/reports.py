@@ -0,0 +1,278 @@
+"""
+Revenue Reports
+
+This builds the revenue / collection / payment method reports from
+the fee payments, using pandas instead of ORM objects.
+
+Why pandas?
+- A yearly report covers every payment of the year (hundreds of thousands
+  of rows after a few years)
+- Loading FeePayment objects and calling to_dict() lazy-loads the student
+  and fee structure of every row: one extra query per payment
+- Here ONE narrow SELECT reads the covering index ix_fee_payment_collections
+  (plus the payment_allocation rows of lump-sum payments and the advance
+  payments kept as credit) and adds up amounts per day (and per method / class / fee structure
+  when the report is split). pandas then maps fee structures to fee
+  types, rolls days up into months or years and pivots, all with
+  vectorized operations
+- Sending one Python tuple per payment would be the slow part (seconds
+  for a million rows), so the database only sends per-day totals
+
+Advance credit is counted once, when the cash comes in: a deposit under
+the method and date of its payment (as "Advance payment" when split by
+class or fee type, it belongs to no fee yet), and fees later paid from
+the wallet (allocations with the method CREDIT) are left out.
+
+Money stays exact: amounts are added up as integer paisa (see app/utils/money.py)
+and only turned into Decimal for the final table.
+
+Example:
+    revenue_report(date(2025, 4, 1), date(2026, 3, 31), period='month', by='method')
+    -> one row per month, one column per payment method, plus totals
+"""
+
+from app import db
+from app.models import (
+    AcademicYear, ArchivedYear, ClassGrade, CreditEntry, FeePayment, FeeStructure, PaymentAllocation
+)
+from app.utils.archive import archived_table, attached_archives
+from app.utils.money import from_paisa, paisa
+import numpy as np
+import pandas as pd
+
+# Period name -> (numpy date unit, label format)
+PERIODS = {
+    'day': ('D', '%Y-%m-%d'),
+    'month': ('M', '%Y-%m'),
+    'year': ('Y', '%Y'),
+}
+
+# "Split by" name -> fee_payment column the SELECT groups on
+GROUPINGS = {
+    'method': 'payment_method',
+    'class': 'class_grade_id',  # the class the fee was charged to, not the student's current one
+    'fee_type': 'fee_structure_id',
+}
+
+# "Split by" key of advance payments when split by class or fee type
+# (ids start at 1, so it never clashes with a class or fee structure)
+ADVANCE_KEY = 0
+
+
+def _collections_select(payments, allocations, start=None, end=None, by=None):
+    """
+    SELECTs of money received, added up per day (and per "split by" column)
+    
+    Two of them (UNION ALL them), so every rupee is counted once under the method and date it
+    was received:
+    - paid on the fee rows themselves: amount - allocated, with the row's
+      method and date (only fee_payment columns, so SQLite answers it from
+      the covering index without reading the table)
+    - lump-sum payments: the PaymentAllocation rows, with their own method
+      and date (class / fee type come from their fee row); draw-downs
+      from credit (method CREDIT) are not money received
+    payment_date is read as the stored text (no date object per row);
+    pandas parses the column at once.
+    """
+    direct = paisa(payments.c.amount) - paisa(payments.c.allocated)
+    key_columns = [payments.c.payment_date]
+    if by is not None:
+        key_columns.append(payments.c[GROUPINGS[by]])
+    on_rows = db.select(
+        db.type_coerce(payments.c.payment_date, db.String).label('payment_date'),
+        *[column.label('key') for column in key_columns[1:]],
+        db.func.sum(direct).label('paisa'),
+        db.func.count().label('payments')
+    ).where(direct > 0).group_by(*key_columns)
+    
+    allocation_keys = [allocations.c.payment_date]
+    if by == 'method':
+        allocation_keys.append(allocations.c.payment_method)
+    elif by is not None:
+        allocation_keys.append(payments.c[GROUPINGS[by]])
+    allocated = db.select(
+        db.type_coerce(allocations.c.payment_date, db.String).label('payment_date'),
+        *[column.label('key') for column in allocation_keys[1:]],
+        db.type_coerce(db.func.sum(allocations.c.amount), db.BigInteger).label('paisa'),  # Money: paisa already
+        db.func.count().label('payments')
+    ).where(allocations.c.payment_method != FeePayment.PAYMENT_CREDIT).group_by(*allocation_keys)
+    if by not in (None, 'method'):
+        allocated = allocated.join(payments, payments.c.id == allocations.c.fee_payment_id)
+    
+    if start:
+        on_rows = on_rows.where(payments.c.payment_date >= start)
+        allocated = allocated.where(allocations.c.payment_date >= start)
+    if end:
+        on_rows = on_rows.where(payments.c.payment_date <= end)
+        allocated = allocated.where(allocations.c.payment_date <= end)
+    return [on_rows, allocated]
+
+
+def _deposits_select(start=None, end=None, by=None):
+    """
+    SELECT of advance payments kept as credit, added up per day
+    
+    Same columns as _collections_select(). Credit entries are never
+    archived, so this reads the live table only.
+    """
+    entries = CreditEntry.__table__
+    key_columns = [entries.c.payment_date]
+    if by == 'method':
+        key_columns.append(entries.c.payment_method)
+    statement = db.select(
+        db.type_coerce(entries.c.payment_date, db.String).label('payment_date'),
+        *[column.label('key') for column in key_columns[1:]],
+        *([db.literal(ADVANCE_KEY).label('key')] if by not in (None, 'method') else []),
+        db.type_coerce(db.func.sum(entries.c.amount), db.BigInteger).label('paisa'),  # Money: paisa already
+        db.func.count().label('payments')
+    ).where(
+        entries.c.kind == CreditEntry.KIND_DEPOSIT,
+        entries.c.payment_date.is_not(None)
+    ).group_by(*key_columns)
+    if start:
+        statement = statement.where(entries.c.payment_date >= start)
+    if end:
+        statement = statement.where(entries.c.payment_date <= end)
+    return statement
+
+
+def _archived_years_between(start=None, end=None):
+    """Archived academic years that overlap the date range"""
+    query = db.select(ArchivedYear.academic_year_id).join(
+        AcademicYear, AcademicYear.id == ArchivedYear.academic_year_id
+    )
+    if start:
+        query = query.where(AcademicYear.end_date >= start)
+    if end:
+        query = query.where(AcademicYear.start_date <= end)
+    return db.session.execute(query).scalars().all()
+
+
+def _key_lookup(by):
+    """
+    Map the grouped ids to what the report shows (vectorized with Series.map)
+    
+    fee_type: fee structure id -> fee type (advance payments: "Advance payment")
+    (class ids and payment methods are shown as they are)
+    """
+    if by != 'fee_type':
+        return None
+    pairs = dict(db.session.execute(db.select(FeeStructure.id, FeeStructure.fee_type)).all())
+    pairs[ADVANCE_KEY] = dict(CreditEntry.KINDS)[CreditEntry.KIND_DEPOSIT]
+    return pd.Series(pairs)
+
+
+def load_collections(start=None, end=None, by=None, include_archived=False):
+    """
+    Load per-day money received between two dates into a DataFrame
+    
+    Parameters:
+    start, end: Date range (inclusive); None = open-ended
+    by: None, 'method', 'class' or 'fee_type'
+    include_archived: Also read archived years in the range (ATTACHes their files)
+    
+    Returns:
+    DataFrame with columns: payment_date (datetime64), key (method, class id
+    or fee type; only when by is set), paisa (int64), payments (int64)
+    """
+    year_ids = _archived_years_between(start, end) if include_archived else []
+    
+    with attached_archives(year_ids) as (connection, schemas):
+        payments, allocations = FeePayment.__table__, PaymentAllocation.__table__
+        selects = _collections_select(payments, allocations, start, end, by) + [_deposits_select(start, end, by)]
+        for schema in schemas.values():
+            selects += _collections_select(
+                archived_table(payments, schema), archived_table(allocations, schema), start, end, by
+            )
+        statement = db.union_all(*selects)
+        result = connection.execute(statement)
+        frame = pd.DataFrame(result.all(), columns=list(result.keys()))
+    
+    frame['payment_date'] = pd.to_datetime(frame['payment_date'], format='ISO8601')
+    frame['paisa'] = frame['paisa'].astype(np.int64)
+    frame['payments'] = frame['payments'].astype(np.int64)
+    lookup = _key_lookup(by)
+    if lookup is not None:
+        frame['key'] = frame['key'].map(lookup)
+    return frame
+
+
+def _period_keys(dates, period):
+    """Truncate a datetime column to day / month / year (vectorized)"""
+    unit, _ = PERIODS[period]
+    return dates.values.astype(f'datetime64[{unit}]')
+
+
+def _column_labels(by, keys):
+    """Readable column headings for the "group by" values"""
+    if by == 'class':
+        names = dict(db.session.execute(db.select(ClassGrade.id, ClassGrade.class_name)).all())
+        names[ADVANCE_KEY] = dict(CreditEntry.KINDS)[CreditEntry.KIND_DEPOSIT]
+        return [names.get(k, 'No class') if pd.notna(k) else 'No class' for k in keys]
+    if by == 'method':
+        methods = dict(FeePayment.PAYMENT_METHODS)
+        return [methods.get(k, k) for k in keys]
+    return [str(k) for k in keys]
+
+
+def revenue_report(start=None, end=None, period='month', by=None, include_archived=False):
+    """
+    Revenue (money received) per period, optionally split by a column
+    
+    Parameters:
+    start, end: Date range (inclusive)
+    period: 'day', 'month' or 'year'
+    by: None, 'method', 'class' or 'fee_type'
+    include_archived: Include archived years in the range
+    
+    Returns:
+    Dictionary ready for a template or Excel:
+    {
+        'columns': ['Cash', 'Easypaisa', ...],     # empty when by is None
+        'rows': [{'period': '2025-04', 'values': [Decimal, ...], 'total': Decimal}, ...],
+        'totals': [Decimal, ...],                  # per column
+        'grand_total': Decimal,
+        'payments_count': int
+    }
+    """
+    if period not in PERIODS:
+        raise ValueError(f'Unknown period: {period}')
+    if by is not None and by not in GROUPINGS:
+        raise ValueError(f'Unknown grouping: {by}')
+    
+    frame = load_collections(start, end, by, include_archived)
+    if frame.empty:
+        return {'period': period, 'by': by, 'columns': [], 'rows': [], 'totals': [],
+                'grand_total': from_paisa(0), 'payments_count': 0}
+    
+    keys = _period_keys(frame['payment_date'], period)
+    
+    if by is None:
+        table = frame.groupby(keys)['paisa'].sum().to_frame('total')
+        columns = []
+    else:
+        table = frame.groupby([keys, frame['key']], dropna=False)['paisa'].sum().unstack(fill_value=0)
+        columns = list(table.columns)
+    
+    values = table.to_numpy(dtype=np.int64)
+    row_totals = values.sum(axis=1)
+    column_totals = values.sum(axis=0)
+    _, label_format = PERIODS[period]
+    
+    rows = []
+    for key, row_values, row_total in zip(table.index, values, row_totals):
+        rows.append({
+            'period': pd.Timestamp(key).strftime(label_format),
+            'values': [from_paisa(v) for v in row_values] if columns else [],
+            'total': from_paisa(row_total)
+        })
+    
+    return {
+        'period': period,
+        'by': by,
+        'columns': _column_labels(by, columns) if columns else [],
+        'rows': rows,
+        'totals': [from_paisa(v) for v in column_totals] if columns else [],
+        'grand_total': from_paisa(row_totals.sum()),
+        'payments_count': int(frame['payments'].sum())
+    }
@@ -0,0 +1,201 @@
+"""
+Year-End Rollover
+
+This moves the school from one academic year to the next in one go:
+1. Promote every active student one class up (by ClassGrade.order);
+   students in the highest class graduate (marked inactive)
+2. Clone the current year's fee structures (and their class links, late
+   fee rules and installment plans, one year later) into the new year
+3. Archive the current year's settled (PAID) payments
+4. Make the new year the current year
+
+Why one operation?
+- Doing this student by student through the edit page takes hours
+- Everything runs in ONE transaction: it either fully happens or not at all
+- Each class is promoted with a single UPDATE statement
+
+Run it with: flask rollover --to 2026-2027 [--dry-run]
+"""
+
+from app import db
+from app.models import (
+    AcademicYear, ClassGrade, Student, FeeStructure, FeePayment, DataVersion, FeeInstallment, InstallmentPlan,
+    LateFeeRule, fee_structure_classes
+)
+from app.models.counters import refresh_counters
+from datetime import datetime
+
+
+class RolloverError(Exception):
+    """Raised when a rollover cannot be done (nothing is changed)"""
+
+
+def _add_one_year(day):
+    """Same day next year (28 Feb for 29 Feb)"""
+    try:
+        return day.replace(year=day.year + 1)
+    except ValueError:
+        return day.replace(year=day.year + 1, day=28)
+
+
+def rollover(target_year_name, dry_run=False):
+    """
+    Roll the current academic year over into target_year_name
+    
+    Parameters:
+    target_year_name: Name of the new year (e.g. "2026-2027"); created if missing
+    dry_run: Do everything, report it, then roll back
+    
+    Returns:
+    Report dictionary (source/target year, promotions, cloned fees, archived payments)
+    """
+    source = AcademicYear.get_current()
+    if not source:
+        raise RolloverError('There is no current academic year to roll over from.')
+    if source.year_name == target_year_name:
+        raise RolloverError(f'{target_year_name} is already the current academic year.')
+    
+    target = AcademicYear.query.filter_by(year_name=target_year_name).first()
+    if target and target.fee_structures.count():
+        raise RolloverError(f'{target_year_name} already has fee structures; it looks rolled over already.')
+    
+    report = {
+        'source_year': source.year_name,
+        'target_year': target_year_name,
+        'dry_run': dry_run,
+        'promotions': [],
+        'fee_structures_cloned': 0,
+        'class_links_cloned': 0,
+        'late_fee_rules_cloned': 0,
+        'installment_plans_cloned': 0,
+        'payments_archived': 0
+    }
+    
+    try:
+        # ========== 1. NEW ACADEMIC YEAR ==========
+        if not target:
+            target = AcademicYear(
+                year_name=target_year_name,
+                start_date=_add_one_year(source.start_date),
+                end_date=_add_one_year(source.end_date),
+                is_current=False
+            )
+            db.session.add(target)
+            db.session.flush()
+        
+        # ========== 2. PROMOTE STUDENTS ==========
+        # Highest class first, so students moved up are not moved again
+        classes = ClassGrade.query.filter_by(is_active=True).order_by(ClassGrade.order.desc()).all()
+        student_table = Student.__table__
+        now = datetime.utcnow()
+        
+        for position, class_grade in enumerate(classes):
+            in_this_class = db.and_(
+                student_table.c.class_grade_id == class_grade.id,
+                student_table.c.is_active == True
+            )
+            if position == 0:
+                # Highest class: graduate (keep the class for history)
+                values = {'is_active': False, 'updated_at': now}
+                next_class_name = None
+            else:
+                next_class = classes[position - 1]
+                values = {'class_grade_id': next_class.id, 'updated_at': now}
+                next_class_name = next_class.class_name
+            
+            # Raw UPDATE: fee rows keep the class they were charged to
+            # (fee_payment.class_grade_id), so the cube needs no refresh
+            moved = db.session.execute(student_table.update().where(in_this_class).values(**values)).rowcount
+            report['promotions'].append({
+                'from_class': class_grade.class_name,
+                'to_class': next_class_name,
+                'students': moved
+            })
+        
+        # ========== 3. CLONE FEE STRUCTURES ==========
+        # Fee structures are few (tens), so the ORM is fine for them;
+        # the class links are copied with one executemany.
+        # The "Late Fee" surcharge structure is not cloned: apply-late-fees
+        # creates the new year's own when it first charges one
+        links = []
+        fees = source.fee_structures.filter(
+            FeeStructure.is_active == True,
+            FeeStructure.fee_type != FeeStructure.FEE_TYPE_LATE
+        ).all()
+        for fee in fees:
+            clone = FeeStructure(
+                fee_type=fee.fee_type,
+                fee_name=fee.fee_name,
+                amount=fee.amount,
+                academic_year_id=target.id,
+                due_date_offset=fee.due_date_offset,
+                is_recurring=fee.is_recurring,
+                is_active=True
+            )
+            db.session.add(clone)
+            db.session.flush()
+            report['fee_structures_cloned'] += 1
+            
+            rule = fee.late_fee_rule
+            if rule:
+                db.session.add(LateFeeRule(
+                    fee_structure_id=clone.id,
+                    rule_type=rule.rule_type,
+                    value=rule.value,
+                    grace_days=rule.grace_days,
+                    repeat_monthly=rule.repeat_monthly,
+                    is_active=rule.is_active
+                ))
+                report['late_fee_rules_cloned'] += 1
+            
+            # Without its plan, generate-fees would bill the fee in one go
+            plan = fee.installment_plan
+            if plan and plan.installments:
+                db.session.add(InstallmentPlan(
+                    fee_structure_id=clone.id,
+                    is_active=plan.is_active,
+                    installments=[
+                        FeeInstallment(number=part.number, name=part.name, percentage=part.percentage,
+                                       due_date=_add_one_year(part.due_date))
+                        for part in plan.installments
+                    ]
+                ))
+                report['installment_plans_cloned'] += 1
+            
+            class_ids = db.session.execute(
+                db.select(fee_structure_classes.c.class_grade_id)
+                .where(fee_structure_classes.c.fee_structure_id == fee.id)
+            ).scalars().all()
+            links.extend({'fee_structure_id': clone.id, 'class_grade_id': class_id} for class_id in class_ids)
+        
+        if links:
+            db.session.execute(fee_structure_classes.insert(), links)
+        report['class_links_cloned'] = len(links)
+        
+        # ========== 4. ARCHIVE SETTLED PAYMENTS ==========
+        source_fee_ids = db.select(FeeStructure.id).where(FeeStructure.academic_year_id == source.id)
+        report['payments_archived'] = db.session.execute(
+            FeePayment.__table__.update().where(
+                FeePayment.status == FeePayment.STATUS_PAID,
+                FeePayment.is_archived == False,
+                FeePayment.fee_structure_id.in_(source_fee_ids)
+            ).values(is_archived=True)
+        ).rowcount
+        
+        # Bulk updates bypass the ORM events: recount class sizes and
+        # invalidate cached reports here
+        refresh_counters(family_ids=[], class_ids=None, group_payment_ids=[])
+        DataVersion.bump([DataVersion.STUDENT, DataVersion.FEE_PAYMENT])
+        
+        # ========== 5. SWITCH CURRENT YEAR ==========
+        AcademicYear.set_current(target.id, commit=False)
+        
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return report
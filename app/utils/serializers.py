@@ -0,0 +1,316 @@
+"""
+Batch Serializers
+
+This turns lists of model objects into plain dictionaries (or JSON bytes)
+with a fixed number of queries, whatever the length of the list.
+
+Why serializers?
+- Each model's to_dict() lazy-loads what it needs: Student.to_dict()
+  loads the class, FeePayment.to_dict() the student and the fee structure,
+  GroupPayment.to_dict() serializes every child payment one by one
+- Serializing a list that way costs one or more queries per object
+- A serializer declares what it needs; before dumping a list it loads
+  every related object with ONE query per relationship and sets it on
+  each object (no lazy load later); child lists are fetched for all
+  parents at once
+
+The dictionaries have the same keys and values as the models' to_dict().
+
+Example:
+    students = Student.query.filter_by(class_grade_id=5).all()
+    StudentSerializer().dump(students)        -> [{...}, {...}]   (2 queries in total)
+    StudentSerializer().dump_json(students)   -> b'[{...}, {...}]'
+"""
+
+from app import db
+from app.models import (
+    AcademicYear, ClassGrade, Family, FeePayment, FeeStructure, GroupPayment,
+    PaymentAllocation, PaymentReceipt, Student, fee_structure_classes
+)
+from app.utils.money import to_decimal
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import set_committed_value
+import orjson
+
+
+def _json_default(value):
+    """Types orjson does not know: money is written as an exact string"""
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'Cannot serialize {type(value).__name__}')
+
+
+def to_json(data):
+    """orjson bytes of plain data (dates as ISO strings, Decimal as string)"""
+    return orjson.dumps(data, default=_json_default)
+
+
+def _plain(value):
+    """Column value as it appears in to_dict() output"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return to_decimal(value)
+    return value
+
+
+def _load_expired(objects):
+    """
+    Reload expired objects (e.g. after a commit) with one query per model,
+    instead of one refresh query per object on first attribute access
+    """
+    expired = {}
+    for obj in objects:
+        state = inspect(obj)
+        if state.expired_attributes and state.key is not None:
+            expired.setdefault(type(obj), []).append(state.identity[0])
+    for model, ids in expired.items():
+        db.session.query(model).filter(model.id.in_(ids)).all()
+
+
+def prefetch(objects, relationship_name):
+    """
+    Load a many-to-one relationship for many objects with one query
+    
+    The loaded objects are set on the relationship attribute as if it had
+    been lazy-loaded, so `obj.<relationship_name>` is then answered without SQL.
+    
+    Returns:
+    The related objects (one per object, None where there is none)
+    """
+    objects = [obj for obj in objects if obj is not None]
+    if not objects:
+        return []
+    relationship = inspect(type(objects[0])).relationships[relationship_name]
+    (local_column, remote_column), = relationship.local_remote_pairs
+    target = relationship.mapper.class_
+    
+    missing = [obj for obj in objects if relationship_name in inspect(obj).unloaded]
+    ids = {getattr(obj, local_column.key) for obj in missing} - {None}
+    if ids:
+        remote = getattr(target, remote_column.key)
+        loaded = {getattr(row, remote_column.key): row for row in db.session.query(target).filter(remote.in_(ids))}
+        for obj in missing:
+            set_committed_value(obj, relationship_name, loaded.get(getattr(obj, local_column.key)))
+    return [getattr(obj, relationship_name) for obj in objects]
+
+
+class Serializer:
+    """
+    Base serializer
+    
+    Subclasses declare:
+    - model: the model class
+    - fields: column names copied as they are (dates -> ISO string, money -> Decimal)
+    - prefetch: many-to-one relationships (dotted paths allowed) loaded in bulk
+    and may override extra() (values computed per object) and
+    batch_extra() (values needing bulk queries, e.g. child lists).
+    """
+    
+    model = None
+    fields = ()
+    prefetch = ()
+    
+    def extra(self, obj):
+        """Computed values for one object (relationships are already loaded)"""
+        return {}
+    
+    def batch_extra(self, objects):
+        """Values that need bulk queries: {object id: {key: value}}"""
+        return {}
+    
+    def load(self, objects):
+        """Load everything the serializer needs for these objects (fixed number of queries)"""
+        _load_expired(objects)
+        for path in self.prefetch:
+            level = objects
+            for name in path.split('.'):
+                level = prefetch(level, name)
+    
+    def dump(self, objects):
+        """List of dictionaries for a list of objects"""
+        objects = list(objects)
+        if not objects:
+            return []
+        self.load(objects)
+        batch = self.batch_extra(objects)
+        
+        rows = []
+        for obj in objects:
+            row = {name: _plain(getattr(obj, name)) for name in self.fields}
+            row.update(self.extra(obj))
+            row.update(batch.get(obj.id, {}))
+            rows.append(row)
+        return rows
+    
+    def dump_one(self, obj):
+        """Dictionary for one object (None stays None)"""
+        return self.dump([obj])[0] if obj is not None else None
+    
+    def dump_json(self, objects):
+        """orjson bytes of dump(objects)"""
+        return to_json(self.dump(objects))
+
+
+# ========== MODEL SERIALIZERS ==========
+
+class ClassGradeSerializer(Serializer):
+    model = ClassGrade
+    fields = ('id', 'class_name', 'class_code', 'order', 'is_active', 'active_students')
+
+
+class AcademicYearSerializer(Serializer):
+    model = AcademicYear
+    fields = ('id', 'year_name', 'start_date', 'end_date', 'is_current')
+
+
+class FamilySerializer(Serializer):
+    model = Family
+    fields = ('id', 'family_code', 'father_name', 'father_cnic', 'father_contact',
+              'mother_name', 'address', 'students_count')
+
+
+class StudentSerializer(Serializer):
+    model = Student
+    fields = ('id', 'student_id', 'first_name', 'last_name', 'father_name', 'date_of_birth',
+              'gender', 'admission_date', 'admission_number', 'address', 'parent_guardian_name',
+              'parent_primary_contact', 'parent_secondary_contact', 'is_active')
+    prefetch = ('class_grade',)
+    
+    def extra(self, obj):
+        return {
+            'full_name': obj.get_full_name(),
+            'age': obj.get_age(),
+            'class_name': obj.class_grade.class_name if obj.class_grade else None
+        }
+
+
+class FeeStructureSerializer(Serializer):
+    model = FeeStructure
+    fields = ('id', 'fee_type', 'fee_name', 'amount', 'due_date_offset', 'is_recurring', 'is_active')
+    prefetch = ('academic_year',)
+    
+    def extra(self, obj):
+        return {'academic_year': obj.academic_year.year_name if obj.academic_year else None}
+    
+    def batch_extra(self, objects):
+        """Class names of every fee structure in one query (instead of applicable_classes.all())"""
+        classes = {obj.id: [] for obj in objects}
+        rows = db.session.execute(
+            db.select(fee_structure_classes.c.fee_structure_id, ClassGrade.class_name)
+            .join(ClassGrade, ClassGrade.id == fee_structure_classes.c.class_grade_id)
+            .where(fee_structure_classes.c.fee_structure_id.in_(classes))
+            .order_by(ClassGrade.order)
+        )
+        for fee_structure_id, class_name in rows:
+            classes[fee_structure_id].append(class_name)
+        return {fee_id: {'applicable_classes': names} for fee_id, names in classes.items()}
+
+
+class FeePaymentSerializer(Serializer):
+    model = FeePayment
+    fields = ('id', 'student_id', 'fee_structure_id', 'amount', 'amount_due', 'discount', 'installment_id', 'payment_method', 'payment_date',
+              'due_date', 'status', 'receipt_number', 'transaction_id', 'account_name')
+    prefetch = ('student', 'fee_structure')
+    
+    def extra(self, obj):
+        return {
+            'student_name': obj.student.get_full_name() if obj.student else None,
+            'fee_name': obj.fee_structure.fee_name if obj.fee_structure else None
+        }
+
+
+class GroupPaymentSerializer(Serializer):
+    model = GroupPayment
+    fields = ('id', 'group_payment_number', 'total_amount', 'payment_method', 'payment_date',
+              'receipt_number', 'status', 'students_count')
+    prefetch = ('family',)
+    
+    def extra(self, obj):
+        return {
+            'family_code': obj.family.family_code if obj.family else None,
+            'father_name': obj.family.father_name if obj.family else None
+        }
+    
+    def batch_extra(self, objects):
+        """
+        Child payments of every group payment: two queries, serialized as one batch
+        
+        The children are the fees linked to the group and the fees it paid
+        through allocations; 'allocations' says how much each one received.
+        """
+        group_ids = [obj.id for obj in objects]
+        allocations = PaymentAllocation.query.filter(
+            PaymentAllocation.group_payment_id.in_(group_ids)
+        ).order_by(PaymentAllocation.id).all()
+        children = FeePayment.query.filter(db.or_(
+            FeePayment.group_payment_id.in_(group_ids),
+            FeePayment.id.in_({allocation.fee_payment_id for allocation in allocations})
+        )).order_by(FeePayment.id).all()
+        rows = dict(zip([child.id for child in children], FeePaymentSerializer().dump(children)))
+        
+        payments = {group_id: {} for group_id in group_ids}
+        paid_by = {group_id: [] for group_id in group_ids}
+        for child in children:
+            if child.group_payment_id in payments:
+                payments[child.group_payment_id][child.id] = rows[child.id]
+        for allocation in allocations:
+            payments[allocation.group_payment_id][allocation.fee_payment_id] = rows[allocation.fee_payment_id]
+            paid_by[allocation.group_payment_id].append(allocation.to_dict())
+        return {
+            group_id: {
+                'fee_payments': [children_rows[id] for id in sorted(children_rows)],
+                'allocations': paid_by[group_id]
+            }
+            for group_id, children_rows in payments.items()
+        }
+
+
+class PaymentReceiptSerializer(Serializer):
+    model = PaymentReceipt
+    fields = ('id', 'receipt_number', 'receipt_date', 'pdf_file_path')
+    prefetch = ('payment', 'group_payment')
+    
+    def extra(self, obj):
+        return {'is_group_receipt': obj.is_group_receipt()}
+    
+    def batch_extra(self, objects):
+        """Payment details: individual and group payments each serialized as one batch"""
+        payments = [obj.payment for obj in objects if obj.payment_id]
+        groups = [obj.group_payment for obj in objects if not obj.payment_id and obj.group_payment_id]
+        details = {}
+        for payment, row in zip(payments, FeePaymentSerializer().dump(payments)):
+            details[('payment', payment.id)] = row
+        for group, row in zip(groups, GroupPaymentSerializer().dump(groups)):
+            details[('group', group.id)] = row
+        
+        result = {}
+        for obj in objects:
+            if obj.payment_id:
+                key = ('payment', obj.payment_id)
+            elif obj.group_payment_id:
+                key = ('group', obj.group_payment_id)
+            else:
+                key = None
+            result[obj.id] = {'payment_details': details.get(key)}
+        return result
+
+
+# Serializer of each model (for code that handles several kinds of objects)
+SERIALIZERS = {
+    serializer.model: serializer
+    for serializer in (
+        ClassGradeSerializer, AcademicYearSerializer, FamilySerializer, StudentSerializer,
+        FeeStructureSerializer, FeePaymentSerializer, GroupPaymentSerializer, PaymentReceiptSerializer
+    )
+}
+
+
+def serialize(objects):
+    """Dictionaries for a list of objects of one model (picks the serializer)"""
+    objects = list(objects)
+    if not objects:
+        return []
+    return SERIALIZERS[type(objects[0])]().dump(objects)
@@ -78,10 +78,37 @@ class Config:
     # Backup directory
     BACKUP_DIR = os.path.join(basedir, 'backups')
     
+    # ========== ARCHIVE ==========
+    # Closed academic years are moved here, one SQLite file per year
+    # (flask archive-year YEAR)
+    ARCHIVE_DIR = os.path.join(basedir, 'instance', 'archive')
+    
+    # ========== REPORT CACHE ==========
+    # Finished reports are kept here and reused until their data changes
+    REPORT_CACHE_DIR = os.path.join(basedir, 'instance', 'report_cache')
+    
+    # Least recently used reports are removed above this size
+    REPORT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+    
+    # ========== QUERY CACHE ==========
+    # Reference data lookups (classes, current year, fees of a class)
+    # 'file': changes are seen by every worker process; 'memory': one process only
+    QUERY_CACHE_BACKEND = os.environ.get('QUERY_CACHE_BACKEND') or 'file'
+    QUERY_CACHE_DIR = os.path.join(basedir, 'instance', 'query_cache')
+    
+    # ========== ANALYTICS MIRROR ==========
+    # Parquet copy of the fee data for analytic queries (flask analytics-sync)
+    ANALYTICS_DIR = os.path.join(basedir, 'instance', 'analytics')
+    
     # ========== PAGINATION ==========
     # Records per page
     RECORDS_PER_PAGE = 50
     
+    # ========== JSON API ==========
+    # Records per page of /api/v1 lists (clients may ask for up to the maximum with ?limit=)
+    API_PAGE_SIZE = 50
+    API_MAX_PAGE_SIZE = 200
+    
     # ========== RECEIPT SETTINGS ==========
     # Receipt number format
     RECEIPT_NUMBER_PREFIX = 'RCP'
@@ -127,6 +154,7 @@ class TestingConfig(Config):
     """
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # In-memory database for tests
+    QUERY_CACHE_BACKEND = 'memory'
 
 
 # Configuration dictionary
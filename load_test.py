@@ -0,0 +1,369 @@
+"""
+Load Test Harness
+
+This script measures how the system behaves when several cashiers
+work at the same time against one SQLite database file.
+
+Why this script?
+- Student IDs and receipt numbers are generated by reading the last
+  number and adding one (read-max-then-increment)
+- Two workers doing this at the same moment can pick the same number
+- SQLite allows only one writer at a time, so busy workers can hit
+  "database is locked" errors
+- We need real numbers to know how many cashiers the system supports
+
+What it does:
+- Creates a fresh SQLite database with a little reference data
+- Starts several worker processes (one per "cashier")
+- Each worker adds students through the Flask test client
+  (POST /students/add) and posts individual and group payments
+- Reports throughput, p50/p99 latency, lock timeouts and
+  duplicate-number violations
+
+Usage: python load_test.py --workers 4 --operations 50
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+# Operation names (one row each in the report)
+OP_ADD_STUDENT = 'add_student'
+OP_PAYMENT = 'payment'
+OP_GROUP_PAYMENT = 'group_payment'
+
+# Outcome names
+OUTCOME_OK = 'ok'
+OUTCOME_LOCK = 'lock_timeout'
+OUTCOME_DUPLICATE = 'duplicate'
+OUTCOME_ERROR = 'error'
+
+
+def classify_error(message):
+    """
+    Turn an error message into an outcome name
+    
+    Returns:
+    (outcome, detail) - detail is the duplicated column for UNIQUE violations
+    """
+    if 'database is locked' in message:
+        return OUTCOME_LOCK, None
+    if 'UNIQUE constraint failed' in message:
+        # Example: "UNIQUE constraint failed: student.student_id"
+        detail = message.split('UNIQUE constraint failed:')[-1].strip().split()[0]
+        return OUTCOME_DUPLICATE, detail
+    return OUTCOME_ERROR, message.splitlines()[0][:120] if message else None
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def setup_database(db_url):
+    """
+    Create a fresh database with the reference data the workers need
+    
+    Returns:
+    Dictionary of IDs (admin user, class, fee structure, family, students)
+    """
+    os.environ['DATABASE_URL'] = db_url
+    from app import create_app, db
+    from app.models import User, ClassGrade, AcademicYear, Family, Student, FeeStructure
+    
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        
+        admin = User(username='admin', email='admin@school.com')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        
+        year = AcademicYear(
+            year_name='LOAD-TEST',
+            start_date=date.today() - timedelta(days=30),
+            end_date=date.today() + timedelta(days=335),
+            is_current=True
+        )
+        class_grade = ClassGrade(class_name='Load Test Class', class_code='LT1', order=1)
+        db.session.add_all([year, class_grade])
+        db.session.flush()
+        
+        fee_structure = FeeStructure(
+            fee_type=FeeStructure.FEE_TYPE_MONTHLY,
+            fee_name='Monthly Fee',
+            amount=5000,
+            academic_year_id=year.id,
+            is_recurring=True
+        )
+        db.session.add(fee_structure)
+        fee_structure.applicable_classes = [class_grade]
+        family = Family(father_name='Load Test Family', father_contact='+92-300-0000000')
+        family.generate_family_code()
+        db.session.add(family)
+        db.session.flush()
+        
+        # Two siblings used as the target of every payment
+        students = []
+        for first_name in ('Ahmed', 'Ali'):
+            student = Student(
+                first_name=first_name,
+                last_name='Khan',
+                father_name='Load Test Family',
+                date_of_birth=date(2012, 1, 1),
+                gender='M',
+                class_grade_id=class_grade.id,
+                admission_date=date.today(),
+                parent_guardian_name='Load Test Family',
+                parent_primary_contact='+92-300-0000000',
+                family_id=family.id
+            )
+            db.session.add(student)
+            db.session.flush()
+            students.append(student.id)
+        
+        db.session.commit()
+        
+        return {
+            'admin_id': admin.id,
+            'class_grade_id': class_grade.id,
+            'fee_structure_id': fee_structure.id,
+            'family_id': family.id,
+            'student_ids': students
+        }
+
+
+class _ErrorCapture(logging.Handler):
+    """Logging handler that remembers the last error logged by a route"""
+    
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.last_message = None
+    
+    def emit(self, record):
+        self.last_message = record.getMessage()
+
+
+def worker(worker_no, db_url, operations, seed, start_barrier, results_queue):
+    """
+    One simulated cashier
+    
+    Runs in its own process with its own app, engine and connection,
+    exactly like one gunicorn worker would.
+    """
+    os.environ['DATABASE_URL'] = db_url
+    from flask.logging import default_handler
+    from app import create_app, db
+    from app.models import FeePayment, GroupPayment, FeeStructure
+    
+    app = create_app('development')
+    app.config.update(WTF_CSRF_ENABLED=False, LOGIN_DISABLED=True)
+    capture = _ErrorCapture()
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(capture)
+    client = app.test_client()
+    
+    def add_student(i):
+        capture.last_message = None
+        response = client.post('/students/add', data={
+            'first_name': f'Worker{worker_no}',
+            'last_name': f'Student{i}',
+            'father_name': 'Load Test',
+            'date_of_birth': '2012-01-01',
+            'gender': 'M',
+            'class_grade_id': str(seed['class_grade_id']),
+            'admission_date': date.today().isoformat(),
+            'parent_guardian_name': 'Load Test',
+            'parent_primary_contact': '+92-300-0000000',
+            'has_siblings': 'no',
+            'family_id': '0',
+            'is_active': 'True'
+        })
+        # A successful add redirects to the student page
+        if response.status_code == 302:
+            return OUTCOME_OK, None
+        return classify_error(capture.last_message or f'HTTP {response.status_code}')
+    
+    def new_payment(student_id, group_payment=None):
+        # Pass the FeeStructure object: update_status() reads payment.fee_structure
+        return FeePayment(
+            student_id=student_id,
+            fee_structure=db.session.get(FeeStructure, seed['fee_structure_id']),
+            amount=5000,
+            payment_method=FeePayment.PAYMENT_CASH,
+            due_date=date.today() + timedelta(days=30),
+            status=FeePayment.STATUS_PAID,
+            group_payment=group_payment,
+            created_by_id=seed['admin_id']
+        )
+    
+    def post_payment(i):
+        with app.app_context():
+            try:
+                db.session.add(new_payment(seed['student_ids'][i % len(seed['student_ids'])]))
+                db.session.commit()
+                return OUTCOME_OK, None
+            except Exception as e:
+                db.session.rollback()
+                return classify_error(str(e))
+    
+    def post_group_payment(i):
+        with app.app_context():
+            try:
+                group_payment = GroupPayment(
+                    family_id=seed['family_id'],
+                    total_amount=5000 * len(seed['student_ids']),
+                    payment_method=GroupPayment.PAYMENT_CASH,
+                    students_count=len(seed['student_ids']),
+                    created_by_id=seed['admin_id']
+                )
+                db.session.add(group_payment)
+                for student_id in seed['student_ids']:
+                    db.session.add(new_payment(student_id, group_payment))
+                db.session.commit()
+                return OUTCOME_OK, None
+            except Exception as e:
+                db.session.rollback()
+                return classify_error(str(e))
+    
+    results = []
+    start_barrier.wait()
+    for i in range(operations):
+        # Mix: half student admissions, the rest mostly individual payments
+        if i % 2 == 0:
+            op, func = OP_ADD_STUDENT, add_student
+        elif i % 6 == 5:
+            op, func = OP_GROUP_PAYMENT, post_group_payment
+        else:
+            op, func = OP_PAYMENT, post_payment
+        
+        started = time.perf_counter()
+        outcome, detail = func(i)
+        results.append((op, time.perf_counter() - started, outcome, detail))
+    
+    results_queue.put(results)
+
+
+def integrity_scan(db_url):
+    """
+    Look for duplicate numbers the database constraints cannot catch
+    
+    Receipt numbers are unique per table, but group payments and
+    individual payments share the RCP-YYYY-XXXXX sequence.
+    """
+    os.environ['DATABASE_URL'] = db_url
+    from app import create_app, db
+    from sqlalchemy import text
+    
+    app = create_app('development')
+    with app.app_context():
+        shared_receipts = db.session.execute(text(
+            "SELECT COUNT(*) FROM fee_payment fp "
+            "JOIN group_payment gp ON gp.receipt_number = fp.receipt_number"
+        )).scalar()
+        students = db.session.execute(text("SELECT COUNT(*) FROM student")).scalar()
+        payments = db.session.execute(text("SELECT COUNT(*) FROM fee_payment")).scalar()
+    return {'shared_receipts': shared_receipts, 'students': students, 'payments': payments}
+
+
+def print_report(results, elapsed, workers, scan):
+    """Print the summary table"""
+    by_op = defaultdict(list)
+    for row in results:
+        by_op[row[0]].append(row)
+    
+    print("\n" + "=" * 78)
+    print(f"Load Test Results ({workers} workers)")
+    print("=" * 78)
+    print(f"{'Operation':<15}{'Count':>7}{'OK':>7}{'Locked':>8}{'Dup':>6}{'Error':>7}{'p50 ms':>10}{'p99 ms':>10}")
+    print("-" * 78)
+    
+    for op in (OP_ADD_STUDENT, OP_PAYMENT, OP_GROUP_PAYMENT, None):
+        rows = results if op is None else by_op.get(op, [])
+        outcomes = Counter(r[2] for r in rows)
+        latencies = [r[1] * 1000 for r in rows]
+        if op is None:
+            print("-" * 78)
+        print(
+            f"{op or 'TOTAL':<15}{len(rows):>7}{outcomes[OUTCOME_OK]:>7}{outcomes[OUTCOME_LOCK]:>8}"
+            f"{outcomes[OUTCOME_DUPLICATE]:>6}{outcomes[OUTCOME_ERROR]:>7}"
+            f"{percentile(latencies, 50):>10.1f}{percentile(latencies, 99):>10.1f}"
+        )
+    
+    ok = sum(1 for r in results if r[2] == OUTCOME_OK)
+    print("-" * 78)
+    print(f"Wall time:  {elapsed:.2f} s")
+    print(f"Throughput: {len(results) / elapsed:.1f} ops/s attempted, {ok / elapsed:.1f} ops/s successful")
+    
+    duplicates = Counter(r[3] for r in results if r[2] == OUTCOME_DUPLICATE)
+    if duplicates:
+        print("\nDuplicate-number violations (UNIQUE constraint):")
+        for column, count in duplicates.most_common():
+            print(f"  {column}: {count}")
+    
+    errors = Counter(r[3] for r in results if r[2] == OUTCOME_ERROR)
+    if errors:
+        print("\nOther errors:")
+        for message, count in errors.most_common(5):
+            print(f"  {count} x {message}")
+    
+    print(f"\nRows written: {scan['students']} students, {scan['payments']} fee payments")
+    print(f"Receipt numbers shared by a group and an individual payment: {scan['shared_receipts']}")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test for the Fee Management System')
+    parser.add_argument('--workers', type=int, default=4, help='Number of parallel worker processes (cashiers)')
+    parser.add_argument('--operations', type=int, default=50, help='Operations per worker')
+    parser.add_argument('--db', default=os.path.join(basedir, 'instance', 'load_test.db'),
+                        help='SQLite file to use (it is deleted and recreated)')
+    args = parser.parse_args()
+    
+    db_path = os.path.abspath(args.db)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    db_url = 'sqlite:///' + db_path
+    
+    print(f"Preparing {db_path} ...")
+    seed = setup_database(db_url)
+    
+    # 'spawn' gives every worker a clean interpreter, like separate server processes
+    ctx = multiprocessing.get_context('spawn')
+    start_barrier = ctx.Barrier(args.workers + 1)
+    results_queue = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(n, db_url, args.operations, seed, start_barrier, results_queue))
+        for n in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    
+    # Wait until every worker has imported the app, then release them together
+    print(f"Running {args.workers} workers x {args.operations} operations ...")
+    start_barrier.wait()
+    started = time.perf_counter()
+    
+    results = []
+    for _ in processes:
+        results.extend(results_queue.get())
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    
+    print_report(results, elapsed, args.workers, integrity_scan(db_url))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Covering index for revenue reports
+
+ix_fee_payment_collections (payment_date, payment_method, student_id,
+fee_structure_id, amount) lets the revenue report add up a date range
+from the index alone. It starts with payment_date, so it replaces
+ix_fee_payment_payment_date.
+
+Revision ID: a1d5c8e94b27
+Revises: f3c7e9a15d08
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d5c8e94b27'
+down_revision = 'f3c7e9a15d08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_fee_payment_collections', 'fee_payment',
+        ['payment_date', 'payment_method', 'student_id', 'fee_structure_id', 'amount'], unique=False
+    )
+    op.drop_index('ix_fee_payment_payment_date', table_name='fee_payment')
+
+
+def downgrade():
+    op.create_index('ix_fee_payment_payment_date', 'fee_payment', ['payment_date'], unique=False)
+    op.drop_index('ix_fee_payment_collections', table_name='fee_payment')
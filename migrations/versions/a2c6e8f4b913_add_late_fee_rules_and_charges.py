@@ -0,0 +1,60 @@
+"""Add late_fee_rule and late_fee_charge tables
+
+Late-fee rules per fee structure and the surcharges charged in bulk by
+`flask apply-late-fees` (app/utils/late_fees.py).
+
+Revision ID: a2c6e8f4b913
+Revises: f1b8d3e5a742
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c6e8f4b913'
+down_revision = 'f1b8d3e5a742'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('late_fee_rule',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fee_structure_id', sa.Integer(), nullable=False),
+    sa.Column('rule_type', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('grace_days', sa.Integer(), nullable=False),
+    sa.Column('repeat_monthly', sa.Boolean(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['fee_structure_id'], ['fee_structure.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fee_structure_id')
+    )
+    op.create_table('late_fee_charge',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fee_payment_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('rule_id', sa.Integer(), nullable=True),
+    sa.Column('period', sa.String(length=7), nullable=False),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['fee_payment_id'], ['fee_payment.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['rule_id'], ['late_fee_rule.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fee_payment_id', 'period', name='uq_late_fee_charge_payment_period')
+    )
+    with op.batch_alter_table('late_fee_charge', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_late_fee_charge_student_id'), ['student_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('late_fee_charge', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_late_fee_charge_student_id'))
+    
+    op.drop_table('late_fee_charge')
+    op.drop_table('late_fee_rule')
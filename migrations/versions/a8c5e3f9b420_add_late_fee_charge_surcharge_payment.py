@@ -0,0 +1,37 @@
+"""Add late_fee_charge.surcharge_payment_id
+
+Late fee charges were only recorded in late_fee_charge, so the ledger,
+allocation, defaulters, the collection cube and the forecast never saw
+them. Each surcharge is now billed as a fee_payment row of the year's
+"Late Fee" structure; this column links the charge to it.
+
+Existing charges keep NULL here: the next `flask apply-late-fees --user
+<name>` run bills them as fee rows.
+
+Revision ID: a8c5e3f9b420
+Revises: f7b4d2e8a319
+Create Date: 2026-10-20 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c5e3f9b420'
+down_revision = 'f7b4d2e8a319'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('late_fee_charge', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('surcharge_payment_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_late_fee_charge_surcharge_payment_id', 'fee_payment',
+                                    ['surcharge_payment_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    with op.batch_alter_table('late_fee_charge', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_late_fee_charge_surcharge_payment_id', type_='foreignkey')
+        batch_op.drop_column('surcharge_payment_id')
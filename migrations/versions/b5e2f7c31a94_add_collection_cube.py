@@ -0,0 +1,63 @@
+"""Add collection_cube: charged/collected per year, class, month, fee type and method
+
+The table is filled from fee_payment in the same migration.
+Rebuild any time with: flask rebuild-cube
+
+Revision ID: b5e2f7c31a94
+Revises: a1d5c8e94b27
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e2f7c31a94'
+down_revision = 'a1d5c8e94b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('collection_cube',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('academic_year_id', sa.Integer(), nullable=False),
+    sa.Column('class_grade_id', sa.Integer(), nullable=True),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('fee_type', sa.String(length=50), nullable=False),
+    sa.Column('payment_method', sa.String(length=20), nullable=False),
+    sa.Column('fees_count', sa.Integer(), nullable=False),
+    sa.Column('charged', sa.BigInteger(), nullable=False),
+    sa.Column('collected', sa.BigInteger(), nullable=False),
+    sa.Column('paid_count', sa.Integer(), nullable=False),
+    sa.Column('on_time_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['academic_year_id'], ['academic_year.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['class_grade_id'], ['class_grade.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('academic_year_id', 'class_grade_id', 'month', 'fee_type', 'payment_method', name='uq_collection_cube_cell')
+    )
+    
+    # Backfill from existing fee payments (one grouped pass)
+    op.execute("""
+        INSERT INTO collection_cube (academic_year_id, class_grade_id, month, fee_type, payment_method,
+                                     fees_count, charged, collected, paid_count, on_time_count, updated_at)
+        SELECT fs.academic_year_id, s.class_grade_id, SUBSTR(CAST(fp.due_date AS VARCHAR), 1, 7),
+               fs.fee_type, fp.payment_method,
+               COUNT(fp.id),
+               SUM(CAST(ROUND(fs.amount * 100) AS INTEGER)),
+               SUM(CASE WHEN fp.amount > 0 THEN CAST(ROUND(fp.amount * 100) AS INTEGER) ELSE 0 END),
+               SUM(CASE WHEN fp.status = 'PAID' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN fp.status = 'PAID' AND fp.payment_date <= fp.due_date THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM fee_payment fp
+        JOIN fee_structure fs ON fs.id = fp.fee_structure_id
+        JOIN student s ON s.id = fp.student_id
+        GROUP BY fs.academic_year_id, s.class_grade_id, SUBSTR(CAST(fp.due_date AS VARCHAR), 1, 7),
+                 fs.fee_type, fp.payment_method
+    """)
+
+
+def downgrade():
+    op.drop_table('collection_cube')
@@ -0,0 +1,58 @@
+"""Add discount_rule table and fee_payment.discount / discount_rule_id
+
+Sibling / scholarship discounts, compiled by app/utils/discounts.py and
+stored on each fee payment when it is generated or paid.
+
+Revision ID: b7d3f1a9c264
+Revises: a2c6e8f4b913
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3f1a9c264'
+down_revision = 'a2c6e8f4b913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('discount_rule',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('rule_type', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('min_family_size', sa.Integer(), nullable=True),
+    sa.Column('class_grade_id', sa.Integer(), nullable=True),
+    sa.Column('fee_type', sa.String(length=50), nullable=True),
+    sa.Column('student_id', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['class_grade_id'], ['class_grade.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('discount_rule', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_discount_rule_student_id'), ['student_id'], unique=False)
+    
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('discount', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('discount_rule_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_fee_payment_discount_rule_id', 'discount_rule', ['discount_rule_id'], ['id'],
+                                    ondelete='SET NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_fee_payment_discount_rule_id', type_='foreignkey')
+        batch_op.drop_column('discount_rule_id')
+        batch_op.drop_column('discount')
+    
+    with op.batch_alter_table('discount_rule', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_discount_rule_student_id'))
+    
+    op.drop_table('discount_rule')
@@ -0,0 +1,59 @@
+"""Composite and partial indexes tuned to the hot query shapes
+
+Replaces the single-column student_id/status indexes on fee_payment with
+indexes that match how the pages filter:
+- student page: student_id + status IN (...), student_id ORDER BY payment_date
+- student list: class_grade_id + is_active ORDER BY student_id
+- defaulters: open fees (partial index) ORDER BY due_date
+
+Check with: flask check-query-plans
+
+Revision ID: b7e3c1d94f20
+Revises: a9adcdfc7506
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3c1d94f20'
+down_revision = 'a9adcdfc7506'
+branch_labels = None
+depends_on = None
+
+OPEN_STATUS_WHERE = "status IN ('PENDING', 'OVERDUE', 'PARTIAL')"
+
+
+def upgrade():
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        # Covered by the composite indexes (student_id is their first column)
+        batch_op.drop_index('ix_fee_payment_student_id')
+        # Only 4 distinct values; SQLite would pick it over the partial index
+        batch_op.drop_index('ix_fee_payment_status')
+        batch_op.create_index('ix_fee_payment_student_status', ['student_id', 'status'], unique=False)
+        batch_op.create_index('ix_fee_payment_student_payment_date', ['student_id', 'payment_date'], unique=False)
+    
+    # Partial index: only rows that still have money to collect
+    op.create_index(
+        'ix_fee_payment_open_due_date', 'fee_payment', ['due_date', 'student_id'], unique=False,
+        sqlite_where=sa.text(OPEN_STATUS_WHERE),
+        postgresql_where=sa.text(OPEN_STATUS_WHERE)
+    )
+    
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        batch_op.create_index('ix_student_class_active', ['class_grade_id', 'is_active', 'student_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        batch_op.drop_index('ix_student_class_active')
+    
+    op.drop_index('ix_fee_payment_open_due_date', table_name='fee_payment')
+    
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.drop_index('ix_fee_payment_student_payment_date')
+        batch_op.drop_index('ix_fee_payment_student_status')
+        batch_op.create_index('ix_fee_payment_status', ['status'], unique=False)
+        batch_op.create_index('ix_fee_payment_student_id', ['student_id'], unique=False)
@@ -0,0 +1,75 @@
+"""Record credit draw-downs as payment_allocation rows
+
+apply_credit wrote the method CREDIT and its date over fee rows that were
+already partly paid, and the revenue report counted advance payments only
+when a wallet paid a fee, as CREDIT. Draw-downs are now PaymentAllocation
+rows (method CREDIT, no group payment) and deposits keep the method and
+date of the payment they came from.
+
+Existing data:
+- every APPLIED credit entry becomes an allocation row dated the day it
+  was applied, and fee_payment.allocated grows by it (the method and date
+  already overwritten on partly paid rows cannot be recovered)
+- deposits take the method and date of their group payment; those whose
+  payment was archived keep NULL and stay out of the revenue report
+
+Run `flask rebuild-cube` afterwards.
+
+Revision ID: b9d6f4a2c531
+Revises: a8c5e3f9b420
+Create Date: 2026-10-20 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d6f4a2c531'
+down_revision = 'a8c5e3f9b420'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('credit_entry', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('payment_method', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('payment_date', sa.Date(), nullable=True))
+        batch_op.create_index('ix_credit_entry_kind_date', ['kind', 'payment_date'], unique=False)
+    
+    op.execute("""
+        UPDATE credit_entry SET
+            payment_method = (SELECT payment_method FROM group_payment WHERE group_payment.id = credit_entry.group_payment_id),
+            payment_date = (SELECT payment_date FROM group_payment WHERE group_payment.id = credit_entry.group_payment_id)
+        WHERE kind = 'DEPOSIT' AND group_payment_id IS NOT NULL
+    """)
+    op.execute("""
+        INSERT INTO payment_allocation (fee_payment_id, group_payment_id, amount, payment_method, payment_date, created_at)
+        SELECT fee_payment_id, NULL, -amount, 'CREDIT', DATE(created_at), created_at
+        FROM credit_entry
+        WHERE kind = 'APPLIED' AND fee_payment_id IN (SELECT id FROM fee_payment)
+    """)
+    # payment_allocation.amount is paisa, fee_payment.allocated rupees
+    op.execute("""
+        UPDATE fee_payment SET allocated = allocated + (
+            SELECT SUM(amount) FROM payment_allocation
+            WHERE payment_allocation.fee_payment_id = fee_payment.id AND payment_allocation.payment_method = 'CREDIT'
+        ) / 100.0
+        WHERE id IN (SELECT fee_payment_id FROM payment_allocation WHERE payment_method = 'CREDIT')
+    """)
+
+
+def downgrade():
+    op.execute("""
+        UPDATE fee_payment SET allocated = allocated - (
+            SELECT SUM(amount) FROM payment_allocation
+            WHERE payment_allocation.fee_payment_id = fee_payment.id AND payment_allocation.payment_method = 'CREDIT'
+        ) / 100.0
+        WHERE id IN (SELECT fee_payment_id FROM payment_allocation WHERE payment_method = 'CREDIT')
+    """)
+    op.execute("DELETE FROM payment_allocation WHERE payment_method = 'CREDIT'")
+    
+    with op.batch_alter_table('credit_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_credit_entry_kind_date')
+        batch_op.drop_column('payment_date')
+        batch_op.drop_column('payment_method')
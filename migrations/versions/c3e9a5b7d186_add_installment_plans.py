@@ -0,0 +1,59 @@
+"""Add installment_plan / fee_installment and fee_payment.installment_id / amount_due
+
+One-time fees split into dated parts; one fee_payment row per part
+(app/utils/installments.py).
+
+Revision ID: c3e9a5b7d186
+Revises: b7d3f1a9c264
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e9a5b7d186'
+down_revision = 'b7d3f1a9c264'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('installment_plan',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fee_structure_id', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['fee_structure_id'], ['fee_structure.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fee_structure_id')
+    )
+    op.create_table('fee_installment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('plan_id', sa.Integer(), nullable=False),
+    sa.Column('number', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('percentage', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['plan_id'], ['installment_plan.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('plan_id', 'number', name='uq_fee_installment_plan_number')
+    )
+    
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('installment_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('amount_due', sa.Numeric(precision=10, scale=2), nullable=True))
+        batch_op.create_foreign_key('fk_fee_payment_installment_id', 'fee_installment', ['installment_id'], ['id'],
+                                    ondelete='RESTRICT')
+
+
+def downgrade():
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_fee_payment_installment_id', type_='foreignkey')
+        batch_op.drop_column('amount_due')
+        batch_op.drop_column('installment_id')
+    
+    op.drop_table('fee_installment')
+    op.drop_table('installment_plan')
@@ -0,0 +1,56 @@
+"""Add student_ledger table with per-student running balances
+
+The table is filled from fee_payment in the same migration, so existing
+databases get correct balances right away. Rebuild any time with:
+flask rebuild-ledger
+
+Revision ID: c4a8e2f61b37
+Revises: b7e3c1d94f20
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8e2f61b37'
+down_revision = 'b7e3c1d94f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_ledger',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('total_charged', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('total_paid', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('outstanding', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('open_fees_count', sa.Integer(), nullable=False),
+    sa.Column('last_payment_date', sa.Date(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+    
+    # Backfill from existing fee payments (one grouped pass)
+    op.execute("""
+        INSERT INTO student_ledger (student_id, total_charged, total_paid, outstanding,
+                                    open_fees_count, last_payment_date, updated_at)
+        SELECT fp.student_id,
+               COALESCE(SUM(fs.amount), 0),
+               COALESCE(SUM(CASE WHEN fp.amount > 0 THEN fp.amount ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN fp.status IN ('PENDING', 'OVERDUE', 'PARTIAL')
+                                 THEN fs.amount - (CASE WHEN fp.amount > 0 THEN fp.amount ELSE 0 END)
+                                 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN fp.status IN ('PENDING', 'OVERDUE', 'PARTIAL') THEN 1 ELSE 0 END), 0),
+               MAX(CASE WHEN fp.amount > 0 THEN fp.payment_date END),
+               CURRENT_TIMESTAMP
+        FROM fee_payment fp
+        JOIN fee_structure fs ON fs.id = fp.fee_structure_id
+        GROUP BY fp.student_id
+    """)
+
+
+def downgrade():
+    op.drop_table('student_ledger')
@@ -0,0 +1,70 @@
+"""Store student_ledger amounts as integer paisa
+
+student_ledger is derived data, so the table is recreated with BigInteger
+money columns and refilled from fee_payment. Amounts are converted with
+CAST(ROUND(amount * 100) AS INTEGER) so every total is exact.
+
+Revision ID: d2f6a9c03e51
+Revises: c4a8e2f61b37
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6a9c03e51'
+down_revision = 'c4a8e2f61b37'
+branch_labels = None
+depends_on = None
+
+
+def _create_ledger(money_type):
+    op.create_table('student_ledger',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('total_charged', money_type, nullable=False),
+    sa.Column('total_paid', money_type, nullable=False),
+    sa.Column('outstanding', money_type, nullable=False),
+    sa.Column('open_fees_count', sa.Integer(), nullable=False),
+    sa.Column('last_payment_date', sa.Date(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+
+
+def _backfill(scale):
+    # scale = '' for paisa, ' / 100.0' for rupees
+    op.execute(f"""
+        INSERT INTO student_ledger (student_id, total_charged, total_paid, outstanding,
+                                    open_fees_count, last_payment_date, updated_at)
+        SELECT student_id, charged{scale}, paid{scale}, outstanding{scale},
+               open_fees_count, last_payment_date, CURRENT_TIMESTAMP
+        FROM (
+            SELECT fp.student_id AS student_id,
+                   COALESCE(SUM(CAST(ROUND(fs.amount * 100) AS INTEGER)), 0) AS charged,
+                   COALESCE(SUM(CASE WHEN fp.amount > 0 THEN CAST(ROUND(fp.amount * 100) AS INTEGER) ELSE 0 END), 0) AS paid,
+                   COALESCE(SUM(CASE WHEN fp.status IN ('PENDING', 'OVERDUE', 'PARTIAL')
+                                     THEN CAST(ROUND(fs.amount * 100) AS INTEGER)
+                                          - (CASE WHEN fp.amount > 0 THEN CAST(ROUND(fp.amount * 100) AS INTEGER) ELSE 0 END)
+                                     ELSE 0 END), 0) AS outstanding,
+                   COALESCE(SUM(CASE WHEN fp.status IN ('PENDING', 'OVERDUE', 'PARTIAL') THEN 1 ELSE 0 END), 0) AS open_fees_count,
+                   MAX(CASE WHEN fp.amount > 0 THEN fp.payment_date END) AS last_payment_date
+            FROM fee_payment fp
+            JOIN fee_structure fs ON fs.id = fp.fee_structure_id
+            GROUP BY fp.student_id
+        ) AS balances
+    """)
+
+
+def upgrade():
+    op.drop_table('student_ledger')
+    _create_ledger(sa.BigInteger())
+    _backfill('')
+
+
+def downgrade():
+    op.drop_table('student_ledger')
+    _create_ledger(sa.Numeric(precision=12, scale=2))
+    _backfill(' / 100.0')
@@ -0,0 +1,62 @@
+"""Add credit_wallet and credit_entry tables
+
+Advance-payment credit per family and per student: allocate-payment
+deposits what is left over, fee generation draws it down
+(app/utils/credit.py).
+
+Revision ID: d5f2b8c4e617
+Revises: c3e9a5b7d186
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f2b8c4e617'
+down_revision = 'c3e9a5b7d186'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('credit_wallet',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('family_id', sa.Integer(), nullable=True),
+    sa.Column('student_id', sa.Integer(), nullable=True),
+    sa.Column('balance', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('(family_id IS NULL) <> (student_id IS NULL)', name='ck_credit_wallet_one_owner'),
+    sa.ForeignKeyConstraint(['family_id'], ['family.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('family_id'),
+    sa.UniqueConstraint('student_id')
+    )
+    op.create_table('credit_entry',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('wallet_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('group_payment_id', sa.Integer(), nullable=True),
+    sa.Column('fee_payment_id', sa.Integer(), nullable=True),
+    sa.Column('created_by_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['fee_payment_id'], ['fee_payment.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['group_payment_id'], ['group_payment.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['wallet_id'], ['credit_wallet.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('credit_entry', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_credit_entry_wallet_id'), ['wallet_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('credit_entry', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_credit_entry_wallet_id'))
+    
+    op.drop_table('credit_entry')
+    op.drop_table('credit_wallet')
@@ -0,0 +1,49 @@
+"""Add counter cache columns: family.students_count, class_grade.active_students
+
+Both are filled in the same migration; group_payment.students_count
+already exists and is recounted too.
+Repair any time with: flask repair-counters
+
+Revision ID: d9e3b7a4c152
+Revises: c8d4a6f2e913
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e3b7a4c152'
+down_revision = 'c8d4a6f2e913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('family', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('students_count', sa.Integer(), server_default='0', nullable=False))
+    
+    with op.batch_alter_table('class_grade', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('active_students', sa.Integer(), server_default='0', nullable=False))
+    
+    op.execute("""
+        UPDATE family SET students_count =
+            (SELECT COUNT(*) FROM student WHERE student.family_id = family.id)
+    """)
+    op.execute("""
+        UPDATE class_grade SET active_students =
+            (SELECT COUNT(*) FROM student WHERE student.class_grade_id = class_grade.id AND student.is_active = 1)
+    """)
+    op.execute("""
+        UPDATE group_payment SET students_count =
+            (SELECT COUNT(*) FROM fee_payment WHERE fee_payment.group_payment_id = group_payment.id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('class_grade', schema=None) as batch_op:
+        batch_op.drop_column('active_students')
+    
+    with op.batch_alter_table('family', schema=None) as batch_op:
+        batch_op.drop_column('students_count')
@@ -0,0 +1,38 @@
+"""Add verification_status / verified_at to fee_payment and group_payment
+
+Filled by statement reconciliation (app/utils/reconciliation.py).
+
+Revision ID: e4a7c2d9b361
+Revises: d9e3b7a4c152
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c2d9b361'
+down_revision = 'd9e3b7a4c152'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('verification_status', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('verified_at', sa.DateTime(), nullable=True))
+    
+    with op.batch_alter_table('group_payment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('verification_status', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('verified_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('group_payment', schema=None) as batch_op:
+        batch_op.drop_column('verified_at')
+        batch_op.drop_column('verification_status')
+    
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.drop_column('verified_at')
+        batch_op.drop_column('verification_status')
@@ -0,0 +1,64 @@
+"""Add fee_payment.class_grade_id (class the fee was charged to)
+
+The collection cube and the revenue report by class used the student's
+current class, so promoting students at rollover moved last year's fees
+into the new class. The class is now stored on the fee row.
+
+Existing rows are filled in as well as the database allows: the student's
+current class when the fee applies to it, otherwise the fee's only class,
+otherwise the student's current class. Run `flask rebuild-cube` afterwards.
+
+The revenue covering index swaps student_id (only read to find the class)
+for class_grade_id.
+
+Revision ID: e6a3c9d5b218
+Revises: d5f2b8c4e617
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a3c9d5b218'
+down_revision = 'd5f2b8c4e617'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('class_grade_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_fee_payment_class_grade_id', 'class_grade', ['class_grade_id'], ['id'],
+                                    ondelete='SET NULL')
+    
+    op.execute("""
+        UPDATE fee_payment SET class_grade_id = COALESCE(
+            (SELECT student.class_grade_id FROM student
+             JOIN fee_structure_classes ON fee_structure_classes.class_grade_id = student.class_grade_id
+             WHERE student.id = fee_payment.student_id
+               AND fee_structure_classes.fee_structure_id = fee_payment.fee_structure_id),
+            (SELECT MIN(class_grade_id) FROM fee_structure_classes
+             WHERE fee_structure_id = fee_payment.fee_structure_id HAVING COUNT(*) = 1),
+            (SELECT class_grade_id FROM student WHERE student.id = fee_payment.student_id)
+        )
+    """)
+    
+    op.drop_index('ix_fee_payment_collections', table_name='fee_payment')
+    op.create_index(
+        'ix_fee_payment_collections', 'fee_payment',
+        ['payment_date', 'payment_method', 'class_grade_id', 'fee_structure_id', 'amount'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_fee_payment_collections', table_name='fee_payment')
+    op.create_index(
+        'ix_fee_payment_collections', 'fee_payment',
+        ['payment_date', 'payment_method', 'student_id', 'fee_structure_id', 'amount'], unique=False
+    )
+    
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_fee_payment_class_grade_id', type_='foreignkey')
+        batch_op.drop_column('class_grade_id')
@@ -0,0 +1,26 @@
+"""Add fee_payment.is_archived for year-end rollover
+
+Revision ID: e8b1d47a2c96
+Revises: d2f6a9c03e51
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b1d47a2c96'
+down_revision = 'd2f6a9c03e51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_archived', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.drop_column('is_archived')
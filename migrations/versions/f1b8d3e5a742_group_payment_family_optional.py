@@ -0,0 +1,30 @@
+"""Make group_payment.family_id optional
+
+A lump sum allocated over one student's fees (app/utils/allocation.py)
+is recorded as a group payment even when the student has no family.
+
+Revision ID: f1b8d3e5a742
+Revises: e4a7c2d9b361
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b8d3e5a742'
+down_revision = 'e4a7c2d9b361'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('group_payment', schema=None) as batch_op:
+        batch_op.alter_column('family_id', existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade():
+    # Fails while group payments without a family exist
+    with op.batch_alter_table('group_payment', schema=None) as batch_op:
+        batch_op.alter_column('family_id', existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,50 @@
+"""Add archived_year and archived_student_year summary tables
+
+Rows are written by `flask archive-year YEAR` when a closed year's
+payments are moved to instance/archive/. Nothing to backfill.
+
+Revision ID: f3c7e9a15d08
+Revises: e8b1d47a2c96
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c7e9a15d08'
+down_revision = 'e8b1d47a2c96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_year',
+    sa.Column('academic_year_id', sa.Integer(), nullable=False),
+    sa.Column('file_name', sa.String(length=255), nullable=False),
+    sa.Column('payments_count', sa.Integer(), nullable=False),
+    sa.Column('group_payments_count', sa.Integer(), nullable=False),
+    sa.Column('receipts_count', sa.Integer(), nullable=False),
+    sa.Column('total_collected', sa.BigInteger(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['academic_year_id'], ['academic_year.id'], ondelete='RESTRICT'),
+    sa.PrimaryKeyConstraint('academic_year_id'),
+    sa.UniqueConstraint('file_name')
+    )
+    op.create_table('archived_student_year',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('academic_year_id', sa.Integer(), nullable=False),
+    sa.Column('fees_count', sa.Integer(), nullable=False),
+    sa.Column('total_charged', sa.BigInteger(), nullable=False),
+    sa.Column('total_paid', sa.BigInteger(), nullable=False),
+    sa.Column('last_payment_date', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['academic_year_id'], ['archived_year.academic_year_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('student_id', 'academic_year_id')
+    )
+
+
+def downgrade():
+    op.drop_table('archived_student_year')
+    op.drop_table('archived_year')
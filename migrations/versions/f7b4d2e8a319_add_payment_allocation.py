@@ -0,0 +1,67 @@
+"""Add payment_allocation and fee_payment.allocated
+
+allocate-payment wrote its method, date and group over fee rows that were
+already partly paid. Each lump-sum payment a fee receives is now its own
+payment_allocation row; fee_payment.allocated is the part of amount
+recorded there. The revenue covering index also carries allocated.
+
+Revision ID: f7b4d2e8a319
+Revises: e6a3c9d5b218
+Create Date: 2026-10-20 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b4d2e8a319'
+down_revision = 'e6a3c9d5b218'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payment_allocation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fee_payment_id', sa.Integer(), nullable=False),
+    sa.Column('group_payment_id', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('payment_method', sa.String(length=20), nullable=False),
+    sa.Column('payment_date', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['fee_payment_id'], ['fee_payment.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['group_payment_id'], ['group_payment.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('payment_allocation', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_payment_allocation_fee_payment_id'), ['fee_payment_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_payment_allocation_group_payment_id'), ['group_payment_id'], unique=False)
+        batch_op.create_index('ix_payment_allocation_date_method', ['payment_date', 'payment_method'], unique=False)
+    
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('allocated', sa.Numeric(precision=10, scale=2), server_default='0', nullable=False))
+    
+    op.drop_index('ix_fee_payment_collections', table_name='fee_payment')
+    op.create_index(
+        'ix_fee_payment_collections', 'fee_payment',
+        ['payment_date', 'payment_method', 'class_grade_id', 'fee_structure_id', 'amount', 'allocated'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_fee_payment_collections', table_name='fee_payment')
+    op.create_index(
+        'ix_fee_payment_collections', 'fee_payment',
+        ['payment_date', 'payment_method', 'class_grade_id', 'fee_structure_id', 'amount'], unique=False
+    )
+    
+    with op.batch_alter_table('fee_payment', schema=None) as batch_op:
+        batch_op.drop_column('allocated')
+    
+    with op.batch_alter_table('payment_allocation', schema=None) as batch_op:
+        batch_op.drop_index('ix_payment_allocation_date_method')
+        batch_op.drop_index(batch_op.f('ix_payment_allocation_group_payment_id'))
+        batch_op.drop_index(batch_op.f('ix_payment_allocation_fee_payment_id'))
+    
+    op.drop_table('payment_allocation')